@@ -0,0 +1,162 @@
+""" measures the throughput and the peak memory of the parser accessors and of the output formats on synthetic emails
+
+    python -m benchmarks.benchmark_parser [--corpus NAME] [--repeat N] [--save FILE] [--compare FILE] [--tolerance FRACTION]
+
+the results of a run can be saved and later runs compared against them, the script exits with 1 if a benchmark got slower
+than the tolerance allows, so that regressions are caught before a release
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, NamedTuple
+
+from benchmarks.synthetic_corpus import CORPORA
+from eml_analyzer.library.analysis import AnalysisOptions, process_options
+from eml_analyzer.library.outputs import AbstractOutput, StandardOutput, JsonOutput, JsonLinesOutput
+from eml_analyzer.library.parser import ParsedEmail
+
+
+class BenchmarkResult(NamedTuple):
+    seconds: float
+    messages_per_second: float
+    peak_memory_kb: float
+
+
+ACCESSORS: Dict[str, Callable[[ParsedEmail], any]] = {
+    'get_header': lambda parsed_email: parsed_email.get_header(),
+    'get_part_index': lambda parsed_email: parsed_email.get_part_index(),
+    'get_structure': lambda parsed_email: parsed_email.get_structure(),
+    'get_text_content': lambda parsed_email: parsed_email.get_text_content(),
+    'get_html_content': lambda parsed_email: parsed_email.get_html_content(),
+    'get_attachments': lambda parsed_email: [attachment.content for attachment in parsed_email.get_attachments()],
+    'get_embedded_clickable_urls_from_html_and_text': lambda parsed_email: parsed_email.get_embedded_clickable_urls_from_html_and_text(),
+    'get_reloaded_content_from_html': lambda parsed_email: parsed_email.get_reloaded_content_from_html(),
+}
+
+OUTPUTS: Dict[str, Callable[[], AbstractOutput]] = {
+    'StandardOutput': StandardOutput,
+    'JsonOutput': JsonOutput,
+    'JsonLinesOutput': JsonLinesOutput,
+}
+
+ALL_OPTIONS = AnalysisOptions(show_header=True, show_structure=True, show_urls=True, show_tracking=True,
+                              show_attachments=True, show_text=True, show_html=True, extract_content=True)
+
+
+@contextlib.contextmanager
+def _discard_standard_output():
+    """ the cli formatter keeps a reference to the original standard output, so the file descriptor itself is redirected """
+    sys.stdout.flush()
+    saved_file_descriptor = os.dup(1)
+    with open(os.devnull, mode='w') as null_file:
+        os.dup2(null_file.fileno(), 1)
+        try:
+            with contextlib.redirect_stdout(null_file):
+                yield
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved_file_descriptor, 1)
+            os.close(saved_file_descriptor)
+
+
+def _measure(run: Callable[[any], None], prepare: Callable[[], any], repeat: int) -> BenchmarkResult:
+    """ the fastest of the repetitions is used as time, a fresh input is prepared for each repetition as the views are memoized """
+    timings = list()
+    for _ in range(repeat):
+        prepared_input = prepare()
+        start = time.perf_counter()
+        run(prepared_input)
+        timings.append(time.perf_counter() - start)
+
+    prepared_input = prepare()
+    tracemalloc.start()
+    try:
+        run(prepared_input)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    seconds = min(timings)
+    return BenchmarkResult(seconds=seconds, messages_per_second=1 / seconds if seconds > 0 else float('inf'), peak_memory_kb=peak_memory / 1024)
+
+
+def _run_output(output_factory: Callable[[], AbstractOutput], eml_content: bytes) -> None:
+    parsed_email = ParsedEmail(eml_content=eml_content)
+    output_format = output_factory()
+    with _discard_standard_output():
+        process_options(output_format=output_format, parsed_email=parsed_email, options=ALL_OPTIONS)
+        output_format.get_final_output(parsed_email=parsed_email)
+
+
+def run_benchmarks(corpus_names: list, repeat: int) -> Dict[str, Dict[str, BenchmarkResult]]:
+    results = dict()
+    for corpus_name in corpus_names:
+        eml_content = CORPORA[corpus_name]()
+        corpus_results = dict()
+        corpus_results['parse'] = _measure(run=lambda content: ParsedEmail(eml_content=content), prepare=lambda: eml_content, repeat=repeat)
+        for accessor_name, accessor in ACCESSORS.items():
+            corpus_results[accessor_name] = _measure(run=accessor, prepare=lambda: ParsedEmail(eml_content=eml_content), repeat=repeat)
+        for output_name, output_factory in OUTPUTS.items():
+            corpus_results[output_name] = _measure(run=lambda content: _run_output(output_factory=output_factory, eml_content=content),
+                                                   prepare=lambda: eml_content, repeat=repeat)
+        results[corpus_name] = corpus_results
+    return results
+
+
+def print_results(results: Dict[str, Dict[str, BenchmarkResult]]) -> None:
+    for corpus_name, corpus_results in results.items():
+        print('{} ({} KB)'.format(corpus_name, len(CORPORA[corpus_name]()) // 1024))
+        print('  {:<48} {:>12} {:>14} {:>16}'.format('benchmark', 'time [ms]', 'messages/sec', 'peak memory [KB]'))
+        for benchmark_name, result in corpus_results.items():
+            print('  {:<48} {:>12.2f} {:>14.1f} {:>16.0f}'.format(benchmark_name, result.seconds * 1000, result.messages_per_second, result.peak_memory_kb))
+        print()
+
+
+def find_regressions(results: Dict[str, Dict[str, BenchmarkResult]], baseline: dict, tolerance: float) -> list:
+    """ returns a description of every benchmark which is slower or needs more memory than the baseline plus the tolerance """
+    regressions = list()
+    for corpus_name, corpus_results in results.items():
+        for benchmark_name, result in corpus_results.items():
+            baseline_result = baseline.get(corpus_name, dict()).get(benchmark_name)
+            if baseline_result is None:
+                continue
+            for metric in ['seconds', 'peak_memory_kb']:
+                current_value = getattr(result, metric)
+                if current_value > baseline_result[metric] * (1 + tolerance):
+                    regressions.append('{} / {}: {} {:.4f} -> {:.4f}'.format(corpus_name, benchmark_name, metric, baseline_result[metric], current_value))
+    return regressions
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description='Benchmarks the parser and the output formats on synthetic emails')
+    argument_parser.add_argument('--corpus', action='append', choices=sorted(CORPORA), help='corpus to run, can be specified multiple times (default: all)')
+    argument_parser.add_argument('--repeat', type=int, default=5, help='repetitions per benchmark, the fastest one is reported')
+    argument_parser.add_argument('--save', help='saves the results as JSON to the given file')
+    argument_parser.add_argument('--compare', help='compares the results with a file which was written with --save')
+    argument_parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown relative to the baseline (default: 0.25)')
+    arguments = argument_parser.parse_args()
+
+    results = run_benchmarks(corpus_names=arguments.corpus or list(CORPORA), repeat=arguments.repeat)
+    print_results(results=results)
+
+    if arguments.save:
+        with open(arguments.save, mode='w') as output_file:
+            json.dump({corpus_name: {benchmark_name: result._asdict() for benchmark_name, result in corpus_results.items()}
+                       for corpus_name, corpus_results in results.items()}, output_file, indent=4)
+
+    if arguments.compare:
+        with open(arguments.compare, mode='r') as input_file:
+            baseline = json.load(input_file)
+        regressions = find_regressions(results=results, baseline=baseline, tolerance=arguments.tolerance)
+        for regression in regressions:
+            print('regression: ' + regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
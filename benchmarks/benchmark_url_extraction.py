@@ -0,0 +1,31 @@
+""" measures the URL and tracking pixel extraction on HTML documents of growing size, the time per link should stay constant """
+import timeit
+
+from eml_analyzer.library.parser.url_extractor import scan_html, get_clickable_urls_from_html_scan
+
+
+def create_newsletter_html(number_of_links: int) -> str:
+    parts = ['<html><body>']
+    for x in range(number_of_links):
+        parts.append('<p>Article {0} <a href="https://news.example.com/article/{0}?utm=mail&amp;id={0}">https://news.example.com/article/{0}</a>'.format(x))
+        parts.append('<img src="https://tracking.example.com/pixel/{0}.gif" width="1" height="1"></p>\n'.format(x))
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def extract_urls(html_data: str) -> None:
+    html_scan = scan_html(html_data=html_data)
+    get_clickable_urls_from_html_scan(html_scan=html_scan)
+
+
+def main():
+    print('{:>8} {:>12} {:>12} {:>16}'.format('links', 'size [KB]', 'time [ms]', 'time/link [us]'))
+    for number_of_links in [250, 500, 1000, 2000, 4000, 8000, 16000]:
+        html_data = create_newsletter_html(number_of_links=number_of_links)
+        repetitions = 5
+        seconds = min(timeit.repeat(lambda: extract_urls(html_data=html_data), number=1, repeat=repetitions))
+        print('{:>8} {:>12.0f} {:>12.2f} {:>16.2f}'.format(number_of_links, len(html_data) / 1024, seconds * 1000, seconds / number_of_links * 1000000))
+
+
+if __name__ == '__main__':
+    main()
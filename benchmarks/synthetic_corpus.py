@@ -0,0 +1,89 @@
+""" generates synthetic emails which stress single parts of the parser, all messages are deterministic so that runs are comparable """
+import base64
+import email.header
+from typing import Callable, Dict
+
+
+def _create_header_block(extra_headers: str = '') -> str:
+    return ('From: Sender <sender@example.com>\n'
+            'To: Receiver <receiver@example.com>\n'
+            'Subject: Benchmark\n'
+            'Date: Mon, 1 Jan 2024 10:00:00 +0000\n'
+            'Message-ID: <benchmark@example.com>\n'
+            'MIME-Version: 1.0\n'
+            + extra_headers)
+
+
+def create_message_with_many_headers(number_of_headers: int = 2000) -> bytes:
+    """ a plain text message with a long chain of Received headers as produced by many relaying servers """
+    received_headers = ''.join(
+        'Received: from relay{0}.example.com (relay{0}.example.com [10.0.{1}.{2}])\n'
+        '\tby relay{3}.example.com with ESMTPS id {0:08x}; Mon, 1 Jan 2024 10:00:00 +0000\n'.format(x, x // 256 % 256, x % 256, x + 1)
+        for x in range(number_of_headers))
+    message = _create_header_block(extra_headers=received_headers) + 'Content-Type: text/plain; charset="utf-8"\n\nHello World\n'
+    return message.encode('utf-8')
+
+
+def create_deeply_nested_message(depth: int = 200) -> bytes:
+    """ multipart containers nested into each other, every level carries a small text part """
+    parts = [_create_header_block(), 'Content-Type: multipart/mixed; boundary="level-0"\n\n']
+    for level in range(depth):
+        parts.append('--level-{}\nContent-Type: text/plain\n\nText of level {}\n'.format(level, level))
+        parts.append('--level-{}\nContent-Type: multipart/mixed; boundary="level-{}"\n\n'.format(level, level + 1))
+    parts.append('--level-{}\nContent-Type: text/plain\n\nInnermost text\n--level-{}--\n'.format(depth, depth))
+    for level in reversed(range(depth)):
+        parts.append('--level-{}--\n'.format(level))
+    return ''.join(parts).encode('utf-8')
+
+
+def create_newsletter_message(number_of_links: int = 5000) -> bytes:
+    """ a large HTML part with thousands of links and tracking pixels, as well as a text alternative """
+    html_parts = ['<html><body>']
+    text_parts = []
+    for x in range(number_of_links):
+        html_parts.append('<p>Article {0} <a href="https://news.example.com/article/{0}?utm=mail&amp;id={0}">https://news.example.com/article/{0}</a>'.format(x))
+        html_parts.append('<img src="https://tracking.example.com/pixel/{0}.gif" width="1" height="1"></p>\n'.format(x))
+        text_parts.append('Article {0}: https://news.example.com/article/{0}\n'.format(x))
+    html_parts.append('</body></html>\n')
+    message = (_create_header_block() +
+               'Content-Type: multipart/alternative; boundary="alternative"\n\n'
+               '--alternative\nContent-Type: text/plain; charset="utf-8"\n\n' + ''.join(text_parts) +
+               '--alternative\nContent-Type: text/html; charset="utf-8"\n\n' + ''.join(html_parts) +
+               '--alternative--\n')
+    return message.encode('utf-8')
+
+
+def create_message_with_attachments(number_of_attachments: int = 20, attachment_size: int = 512 * 1024) -> bytes:
+    """ a text part followed by many base64 encoded attachments """
+    parts = [_create_header_block(), 'Content-Type: multipart/mixed; boundary="mixed"\n\n',
+             '--mixed\nContent-Type: text/plain\n\nSee the attached files\n']
+    for x in range(number_of_attachments):
+        content = bytes((x + y) % 256 for y in range(256)) * (attachment_size // 256)
+        encoded_content = base64.encodebytes(content).decode('ascii')
+        parts.append('--mixed\nContent-Type: application/octet-stream; name="file_{0}.bin"\n'
+                     'Content-Disposition: attachment; filename="file_{0}.bin"\n'
+                     'Content-Transfer-Encoding: base64\n\n{1}'.format(x, encoded_content))
+    parts.append('--mixed--\n')
+    return ''.join(parts).encode('ascii')
+
+
+def create_message_with_encoded_headers(number_of_headers: int = 500) -> bytes:
+    """ headers which consist of RFC 2047 encoded words in different charsets and encodings """
+    encoded_headers = []
+    for x in range(number_of_headers):
+        charset = ['utf-8', 'iso-8859-1', 'windows-1252'][x % 3]
+        encoded_value = email.header.Header('Größenänderung Nummer {} für Prüfung'.format(x), charset=charset).encode()
+        encoded_headers.append('X-Encoded-{}: {}\n'.format(x, encoded_value))
+    subject = email.header.Header('Dies ist ein dämlicher Test ' * 20, charset='utf-8').encode()
+    message = _create_header_block(extra_headers=''.join(encoded_headers)).replace('Subject: Benchmark', 'Subject: ' + subject)
+    message += 'Content-Type: text/plain; charset="utf-8"\n\nHello World\n'
+    return message.encode('ascii')
+
+
+CORPORA: Dict[str, Callable[[], bytes]] = {
+    'many_headers': create_message_with_many_headers,
+    'deep_nesting': create_deeply_nested_message,
+    'large_html': create_newsletter_message,
+    'attachments': create_message_with_attachments,
+    'encoded_headers': create_message_with_encoded_headers,
+}
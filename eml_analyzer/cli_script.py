@@ -1,16 +1,34 @@
 import argparse
 import io
+import itertools
+import json
 import os
 import sys
+import time
+from typing import List
+
 from cli_formatter.output_formatting import warning, error, info, print_headline_banner
 
+from eml_analyzer.library.analysis import AnalysisOptions, create_output, process_options, is_result_cacheable, get_cached_final_output
+from eml_analyzer.library.batch import collect_inputs, read_file_list, run_batch
+from eml_analyzer.library.extraction import extract_attachments
 from eml_analyzer.library.outputs import AbstractOutput, StandardOutput, JsonOutput
-from eml_analyzer.library.parser import ParsedEmail, EmlParsingException, Attachment
+from eml_analyzer.library.parser import ParsedEmail, EmlParsingException, Attachment, Instrumentation, ResultCache, ResourceLimits, ResourceLimitException
+from eml_analyzer.library.parser.result_cache import DEFAULT_MAX_SIZE_BYTES
+from eml_analyzer.library.server import ServerSettings, serve
+from eml_analyzer.library.summary import summarize_batch
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        _main_batch(arguments=sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        _main_serve(arguments=sys.argv[2:])
+        return
+
     argument_parser = argparse.ArgumentParser(prog='emlAnalyzer', description='A CLI script to analyze an email in the EML format for viewing headers, extracting attachments, etc.')
-    argument_parser.add_argument('-i', '--input', help="Path to the EML file. Accepts standard input if omitted", type=argparse.FileType('r', encoding='utf-8'), nargs='?', default=sys.stdin)
+    argument_parser.add_argument('-i', '--input', help="Path to the EML file. Accepts standard input if omitted", type=argparse.FileType('rb'), nargs='?', default=sys.stdin.buffer)
     argument_parser.add_argument('--header', action='store_true', default=False, help="Shows the headers")
     argument_parser.add_argument('-x', '--tracking', action='store_true', default=False, help="Shows content which is reloaded from external resources in the HTML part")
     argument_parser.add_argument('-a', '--attachments', action='store_true', default=False, help="Lists attachments")
@@ -20,8 +38,14 @@ def main():
     argument_parser.add_argument('-u', '--url', action='store_true', default=False, help="Shows embedded clickable links and urls in the HTML and text part")
     argument_parser.add_argument('-ea', '--extract', type=int, default=None, help="Extracts the x-th attachment. Can not be used together with the '--format' parameter.")
     argument_parser.add_argument('--extract-all', action='store_true', default=None, help="Extracts all attachments. If a output format is specified the content of the attachments will be included in the structural output as a base64 encoded blob")
+    argument_parser.add_argument('-j', '--jobs', type=int, default=1, help="Number of attachments which are extracted concurrently by '--extract-all' (default is 1)")
     argument_parser.add_argument('-o', '--output', type=str, default=None, help="Path for the extracted attachment (default is filename in working directory)")
-    argument_parser.add_argument('--format', default='', const='', nargs='?', choices=['json'], help='Specifies a structured output format, the default format is not machine-readable')
+    argument_parser.add_argument('--format', default='', const='', nargs='?', choices=['json', 'jsonl'], help='Specifies a structured output format, the default format is not machine-readable')
+    argument_parser.add_argument('--timings', action='store_true', default=False, help="Shows the time spent in the processing stages (parsing, decoding, URL extraction, serialization, ...)")
+    argument_parser.add_argument('--embedded', action='store_true', default=False, help="Analyzes attached emails (message/rfc822 parts and .eml attachments) recursively with the same options")
+    argument_parser.add_argument('--archive-hashes', action='store_true', default=False, help="Hashes the members of zip, tar and gzip attachments, which are listed with the attachments")
+    _add_cache_arguments(argument_parser=argument_parser)
+    _add_limit_arguments(argument_parser=argument_parser)
     arguments = argument_parser.parse_args()
 
     if not arguments.input:
@@ -31,65 +55,170 @@ def main():
 
     output_format: AbstractOutput = _get_output_from_cli_arguments_or_exit_on_error(specified_format=arguments.format)
 
-    eml_file = _read_eml_file_or_exit_on_error(output_format=output_format, input_file=arguments.input)
-    parsed_email: ParsedEmail = _parse_eml_file_or_exit_on_error(output_format=output_format, eml_content=eml_file)
+    options = AnalysisOptions(show_header=arguments.header,
+                              show_structure=arguments.structure,
+                              show_urls=arguments.url,
+                              show_tracking=arguments.tracking,
+                              show_attachments=arguments.attachments,
+                              show_text=arguments.text,
+                              show_html=arguments.html,
+                              extract_content=arguments.extract_all is not None,
+                              show_timings=arguments.timings,
+                              show_embedded_emails=arguments.embedded,
+                              hash_archive_members=arguments.archive_hashes)
 
     # use default functionality if no options are specified
-    is_default_functionality = not (arguments.header or
-                                    arguments.tracking or
-                                    arguments.attachments or
-                                    arguments.text or
-                                    arguments.html or
-                                    arguments.structure or
-                                    arguments.url or
-                                    arguments.extract is not None)
-
-    if is_default_functionality:
-        arguments.structure = True
-        arguments.url = True
-        arguments.tracking = True
-        arguments.attachments = True
-
-    if arguments.header:
-        output_format.process_option_show_header(parsed_email=parsed_email)
-    if arguments.structure:
-        output_format.process_option_show_structure(parsed_email=parsed_email)
-    if arguments.url:
-        output_format.process_option_show_embedded_urls_in_html_and_text(parsed_email=parsed_email)
-    if arguments.tracking:
-        output_format.process_option_show_reloaded_content_from_html(parsed_email=parsed_email)
-    if arguments.attachments:
-        output_format.process_option_show_attachments(parsed_email=parsed_email, extract_content=arguments.extract)
-    if arguments.text:
-        output_format.process_option_show_text(parsed_email=parsed_email)
-    if arguments.html:
-        output_format.process_option_show_html(parsed_email=parsed_email)
-
-    if arguments.extract is not None:
-        if isinstance(output_format, StandardOutput):
-            _extract_attachment(parsed_email=parsed_email, attachment_number=arguments.extract, output_path=arguments.output)
-        else:
-            output_format.output_error_and_exit(exception=None, error_message="The '--extract' argument can only be used if no output format is specified")
+    if arguments.extract is None:
+        options = options.with_default_selection()
+
+    limits = _get_limits_from_arguments(arguments=arguments)
+    eml_file = _read_eml_file_or_exit_on_error(output_format=output_format, input_file=arguments.input)
+    result_cache = ResultCache(directory=arguments.cache_dir, max_size_bytes=arguments.cache_size) if arguments.cache_dir is not None else None
+    try:
+        if result_cache is not None and arguments.extract is None and is_result_cacheable(output_format=output_format, options=options):
+            _output_cached_result_or_exit_on_error(output_format=output_format, eml_content=eml_file, options=options, result_cache=result_cache, limits=limits)
+            return
+
+        instrumentation = Instrumentation() if arguments.timings else None
+        parsed_email: ParsedEmail = _parse_eml_file_or_exit_on_error(output_format=output_format, eml_content=eml_file, instrumentation=instrumentation,
+                                                                     limits=limits, result_cache=result_cache)
+
+        process_options(output_format=output_format, parsed_email=parsed_email, options=options)
+
+        if arguments.extract is not None:
+            if isinstance(output_format, StandardOutput):
+                _extract_attachment(parsed_email=parsed_email, attachment_number=arguments.extract, output_path=arguments.output)
+            else:
+                output_format.output_error_and_exit(exception=None, error_message="The '--extract' argument can only be used if no output format is specified")
+
+        if arguments.extract_all is not None and isinstance(output_format, StandardOutput):
+            _extract_all_attachments(parsed_email=parsed_email, path=arguments.output, jobs=arguments.jobs)
+
+        final_output = output_format.get_final_output(parsed_email=parsed_email)
+        if final_output:
+            print(final_output)
+    finally:
+        # the database connection is also closed if the script exits on an error
+        if result_cache is not None:
+            result_cache.close()
+
+
+def _main_batch(arguments: List[str]):
+    argument_parser = argparse.ArgumentParser(prog='emlAnalyzer batch', description='Analyzes multiple emails in the EML format and outputs one result per email')
+    argument_parser.add_argument('inputs', nargs='*', help="Directories (searched recursively for *.eml and *.mbox files), Maildir directories, mbox files, glob patterns or paths of EML files")
+    argument_parser.add_argument('-l', '--file-list', type=argparse.FileType('r', encoding='utf-8'), default=None, help="Path to a file which contains one input per line, use '-' for standard input")
+    argument_parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1, help="Number of worker processes (default is the number of CPUs)")
+    argument_parser.add_argument('--header', action='store_true', default=False, help="Includes the headers")
+    argument_parser.add_argument('-x', '--tracking', action='store_true', default=False, help="Includes content which is reloaded from external resources in the HTML part")
+    argument_parser.add_argument('-a', '--attachments', action='store_true', default=False, help="Includes the attachments")
+    argument_parser.add_argument('--text', action='store_true', default=False, help="Includes the plaintext")
+    argument_parser.add_argument('--html', action='store_true', default=False, help="Includes the HTML")
+    argument_parser.add_argument('-s', '--structure', action='store_true', default=False, help="Includes the structure of the E-Mail")
+    argument_parser.add_argument('-u', '--url', action='store_true', default=False, help="Includes embedded clickable links and urls in the HTML and text part")
+    argument_parser.add_argument('--format', default='json', choices=['json', 'jsonl'], help='Specifies the structured output format, jsonl writes one compact record per line (default is json)')
+    argument_parser.add_argument('--timings', action='store_true', default=False, help="Includes the time spent in the processing stages of each email")
+    argument_parser.add_argument('--embedded', action='store_true', default=False, help="Includes the analysis of attached emails (message/rfc822 parts and .eml attachments)")
+    argument_parser.add_argument('--archive-hashes', action='store_true', default=False, help="Includes the hashes of the members of zip, tar and gzip attachments")
+    argument_parser.add_argument('--summary', action='store_true', default=False, help="Outputs one report which clusters the emails by shared HTML, attachments, URL sets and header order instead of one result per email")
+    argument_parser.add_argument('--summary-top', type=int, default=20, help="Number of the largest clusters per kind in the summary (default is 20)")
+    argument_parser.add_argument('--min-cluster-size', type=int, default=2, help="Minimum number of emails which share an item to be listed as cluster in the summary (default is 2)")
+    _add_cache_arguments(argument_parser=argument_parser)
+    _add_limit_arguments(argument_parser=argument_parser)
+    arguments = argument_parser.parse_args(arguments)
+
+    if not arguments.inputs and arguments.file_list is None:
+        warning('No input specified')
+        argument_parser.print_help()
+        exit()
 
-    if arguments.extract_all is not None and isinstance(output_format, StandardOutput):
-        _extract_all_attachments(parsed_email=parsed_email, path=arguments.output)
+    options = AnalysisOptions(show_header=arguments.header,
+                              show_structure=arguments.structure,
+                              show_urls=arguments.url,
+                              show_tracking=arguments.tracking,
+                              show_attachments=arguments.attachments,
+                              show_text=arguments.text,
+                              show_html=arguments.html,
+                              show_timings=arguments.timings,
+                              show_embedded_emails=arguments.embedded,
+                              hash_archive_members=arguments.archive_hashes).with_default_selection()
+
+    inputs = arguments.inputs
+    if arguments.file_list is not None:
+        inputs = itertools.chain(inputs, read_file_list(file_list=arguments.file_list))
+
+    limits = _get_limits_from_arguments(arguments=arguments)
+    batch_inputs = collect_inputs(inputs=inputs)
+    if arguments.summary:
+        summary = summarize_batch(batch_inputs=batch_inputs, workers=arguments.workers, cache_directory=arguments.cache_dir, cache_size=arguments.cache_size,
+                                  limits=limits)
+        summary_dict = summary.to_dict(min_count=arguments.min_cluster_size, limit=arguments.summary_top)
+        print(json.dumps(summary_dict, indent=4) if arguments.format == 'json' else json.dumps(summary_dict, separators=(',', ':')))
+        return
 
-    final_output = output_format.get_final_output(parsed_email=parsed_email)
-    if final_output:
-        print(final_output)
+    for result in run_batch(batch_inputs=batch_inputs, output_format_name=arguments.format, options=options, workers=arguments.workers,
+                            cache_directory=arguments.cache_dir, cache_size=arguments.cache_size, limits=limits):
+        sys.stdout.write(result.output)
+        sys.stdout.flush()
+
+
+def _main_serve(arguments: List[str]):
+    default_settings = ServerSettings()
+    argument_parser = argparse.ArgumentParser(prog='emlAnalyzer serve', description='Keeps a pool of workers running and analyzes emails which are posted to /analyze, the response is the same JSON as with --format json')
+    argument_parser.add_argument('--host', default='127.0.0.1', help="Address to listen on (default is 127.0.0.1)")
+    argument_parser.add_argument('--port', type=int, default=8025, help="Port to listen on (default is 8025)")
+    argument_parser.add_argument('--unix-socket', default=None, help="Path of a Unix domain socket to listen on instead of a TCP port")
+    argument_parser.add_argument('-w', '--workers', type=int, default=default_settings.workers, help="Number of worker processes (default is the number of CPUs)")
+    argument_parser.add_argument('--max-concurrent-requests', type=int, default=default_settings.max_concurrent_requests, help="Requests above this limit are rejected with 503 (default is {})".format(default_settings.max_concurrent_requests))
+    argument_parser.add_argument('--timeout', type=float, default=default_settings.timeout_seconds, help="Seconds after which an analysis is answered with 504 (default is {})".format(default_settings.timeout_seconds))
+    argument_parser.add_argument('--max-body-size', type=int, default=default_settings.max_body_size, help="Maximum size of an email in bytes, larger emails are rejected with 413 (default is {})".format(default_settings.max_body_size))
+    _add_limit_arguments(argument_parser=argument_parser)
+    arguments = argument_parser.parse_args(arguments)
+
+    settings = ServerSettings(workers=arguments.workers,
+                              max_concurrent_requests=arguments.max_concurrent_requests,
+                              timeout_seconds=arguments.timeout,
+                              max_body_size=arguments.max_body_size,
+                              limits=_get_limits_from_arguments(arguments=arguments))
+
+    if arguments.unix_socket is None:
+        info('Listening on http://{}:{}/analyze'.format(arguments.host, arguments.port))
+    else:
+        info('Listening on Unix domain socket {}'.format(arguments.unix_socket))
+    serve(settings=settings, host=arguments.host, port=arguments.port, unix_socket_path=arguments.unix_socket)
+
+
+def _add_cache_arguments(argument_parser: argparse.ArgumentParser) -> None:
+    argument_parser.add_argument('--cache-dir', default=None, help="Directory of a result cache, duplicate emails, HTML parts and attachments are looked up instead of being analyzed again")
+    argument_parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_SIZE_BYTES, help="Maximum size of the result cache in bytes, the least recently used results are evicted (default is {})".format(DEFAULT_MAX_SIZE_BYTES))
+
+
+def _add_limit_arguments(argument_parser: argparse.ArgumentParser) -> None:
+    default_limits = ResourceLimits()
+    argument_parser.add_argument('--no-limits', action='store_true', default=False, help="Disables the resource limits, only use it for trusted emails")
+    argument_parser.add_argument('--max-input-bytes', type=int, default=None, help="Emails above this size in bytes are not parsed (default is {})".format(default_limits.max_input_bytes))
+    argument_parser.add_argument('--max-decoded-bytes-per-part', type=int, default=None, help="Text, HTML and attachments above this decoded size in bytes are skipped (default is {})".format(default_limits.max_decoded_bytes_per_part))
+    argument_parser.add_argument('--max-decoded-bytes-total', type=int, default=None, help="Maximum number of decoded bytes per email, the remaining parts are skipped (default is {})".format(default_limits.max_decoded_bytes_total))
+    argument_parser.add_argument('--max-parts', type=int, default=None, help="Maximum number of analyzed MIME parts per email (default is {})".format(default_limits.max_parts))
+    argument_parser.add_argument('--max-depth', type=int, default=None, help="Maximum nesting depth of analyzed MIME parts (default is {})".format(default_limits.max_depth))
+
+
+def _get_limits_from_arguments(arguments: argparse.Namespace) -> ResourceLimits:
+    """ the given limits replace the default limits or, with '--no-limits', are the only limits """
+    limits = ResourceLimits.unlimited() if arguments.no_limits else ResourceLimits()
+    given_limits = {name: getattr(arguments, name) for name in ['max_input_bytes', 'max_decoded_bytes_per_part', 'max_decoded_bytes_total', 'max_parts', 'max_depth']
+                    if getattr(arguments, name) is not None}
+    return limits._replace(**given_limits)
 
 
 def _get_output_from_cli_arguments_or_exit_on_error(specified_format: str) -> AbstractOutput:
-    if specified_format == '':
-        return StandardOutput()
-    elif specified_format == 'json':
-        return JsonOutput()
-    else:
+    try:
+        return create_output(output_format=specified_format)
+    except ValueError:
         error('output format is not valid')
         exit()
 
 
-def _read_eml_file_or_exit_on_error(output_format: AbstractOutput, input_file: io.TextIOWrapper) -> str:
+def _read_eml_file_or_exit_on_error(output_format: AbstractOutput, input_file: io.BufferedReader) -> bytes:
     try:
         with input_file:
             return input_file.read()
@@ -97,13 +226,25 @@ def _read_eml_file_or_exit_on_error(output_format: AbstractOutput, input_file: i
         output_format.output_error_and_exit(exception=e, error_message='File could not be loaded')
 
 
-def _parse_eml_file_or_exit_on_error(output_format: AbstractOutput, eml_content: str) -> ParsedEmail:
+def _parse_eml_file_or_exit_on_error(output_format: AbstractOutput, eml_content: bytes, instrumentation: Instrumentation or None = None,
+                                     limits: ResourceLimits or None = None, result_cache: ResultCache or None = None) -> ParsedEmail:
     try:
-        return ParsedEmail(eml_content=eml_content)
+        return ParsedEmail(eml_content=eml_content, instrumentation=instrumentation, limits=limits, result_cache=result_cache)
     except EmlParsingException as e:
         output_format.output_error_and_exit(exception=e, error_message='File could not be parsed. Sure it is an eml file?')
 
 
+def _output_cached_result_or_exit_on_error(output_format: JsonOutput, eml_content: bytes, options: AnalysisOptions, result_cache: ResultCache,
+                                           limits: ResourceLimits or None = None) -> None:
+    try:
+        final_output = get_cached_final_output(output_format=output_format, eml_content=eml_content, options=options, result_cache=result_cache, limits=limits)
+    except EmlParsingException as e:
+        output_format.output_error_and_exit(exception=e, error_message='File could not be parsed. Sure it is an eml file?')
+        return
+    if final_output:
+        print(final_output)
+
+
 def _extract_attachment(parsed_email: ParsedEmail, attachment_number: int, output_path: str or None):
     print_headline_banner('Attachment Extracting')
 
@@ -130,8 +271,13 @@ def _get_attachment_by_index(parsed_email: ParsedEmail, attachment_number: int)
 def _write_attachment_to_file(attachment: Attachment, output_path: str or None) -> None:
     output_path = _get_output_path_for_attachment(attachment=attachment, output_path=output_path)
 
-    output_file = open(output_path, mode='wb')
-    output_file.write(attachment.content)
+    try:
+        with open(output_path, mode='wb') as output_file:
+            attachment.write_content_to_file(output_file=output_file)
+    except ResourceLimitException as e:
+        os.remove(output_path)
+        error('Attachment [{}] "{}" could not be extracted: {}'.format(attachment.index, attachment.filename, e))
+        return
     info('Attachment [{}] "{}" extracted to {}'.format(attachment.index, attachment.filename, output_path))
 
 
@@ -142,7 +288,7 @@ def _get_output_path_for_attachment(attachment: Attachment, output_path: str or
         return os.path.join(output_path, attachment.filename)
 
 
-def _extract_all_attachments(parsed_email: ParsedEmail, path: str or None):
+def _extract_all_attachments(parsed_email: ParsedEmail, path: str or None, jobs: int):
     print_headline_banner('Extracting All Attachments')
 
     # if no output directory is given then a default directory with the name 'eml_attachments' is used
@@ -152,8 +298,15 @@ def _extract_all_attachments(parsed_email: ParsedEmail, path: str or None):
     if not os.path.exists(path):
         os.makedirs(path)
 
-    for attachment in parsed_email.get_attachments():
-        _write_attachment_to_file(attachment=attachment, output_path=path)
+    total_written_bytes = 0
+    start_time = time.perf_counter()
+    for result in extract_attachments(attachments=parsed_email.get_attachments(), directory=path, jobs=jobs):
+        if result.error_message is None:
+            total_written_bytes += result.written_bytes
+            info('Attachment [{}] "{}" extracted to {} ({} bytes in {:.3f} s)'.format(result.attachment.index, result.attachment.filename, result.output_path, result.written_bytes, result.elapsed_seconds))
+        else:
+            error('Attachment [{}] "{}" could not be extracted: {}'.format(result.attachment.index, result.attachment.filename, result.error_message))
+    info('{} bytes written in {:.3f} s'.format(total_written_bytes, time.perf_counter() - start_time))
 
 
 if __name__ == '__main__':
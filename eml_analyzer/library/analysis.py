@@ -0,0 +1,96 @@
+from typing import NamedTuple
+
+from eml_analyzer.library.outputs import AbstractOutput, StandardOutput, JsonOutput, JsonLinesOutput
+from eml_analyzer.library.parser import ParsedEmail, ResultCache, ResourceLimits
+from eml_analyzer.library.parser.result_cache import get_content_key
+
+
+class AnalysisOptions(NamedTuple):
+    """ the analysis steps which should be applied on an email, mirrors the options of the cli script """
+    show_header: bool = False
+    show_structure: bool = False
+    show_urls: bool = False
+    show_tracking: bool = False
+    show_attachments: bool = False
+    show_text: bool = False
+    show_html: bool = False
+    extract_content: bool = False
+    # the timings are no analysis step of their own, so they do not affect the default selection
+    show_timings: bool = False
+    # applies the selected analysis steps to the embedded emails as well, like the timings it is no analysis step of its own
+    show_embedded_emails: bool = False
+    # the members of archives are listed with the attachments, hashing them requires to decompress them
+    hash_archive_members: bool = False
+
+    def is_any_option_selected(self) -> bool:
+        return (self.show_header or
+                self.show_structure or
+                self.show_urls or
+                self.show_tracking or
+                self.show_attachments or
+                self.show_text or
+                self.show_html)
+
+    def with_default_selection(self) -> 'AnalysisOptions':
+        """ returns the options of the default functionality if no option is selected """
+        if self.is_any_option_selected():
+            return self
+        return self._replace(show_structure=True, show_urls=True, show_tracking=True, show_attachments=True)
+
+
+def create_output(output_format: str) -> AbstractOutput:
+    if output_format == '':
+        return StandardOutput()
+    elif output_format == 'json':
+        return JsonOutput()
+    elif output_format == 'jsonl':
+        return JsonLinesOutput()
+    raise ValueError('output format "{}" is not valid'.format(output_format))
+
+
+def process_options(output_format: AbstractOutput, parsed_email: ParsedEmail, options: AnalysisOptions) -> None:
+    if options.show_header:
+        output_format.process_option_show_header(parsed_email=parsed_email)
+    if options.show_structure:
+        output_format.process_option_show_structure(parsed_email=parsed_email)
+    if options.show_urls:
+        output_format.process_option_show_embedded_urls_in_html_and_text(parsed_email=parsed_email)
+    if options.show_tracking:
+        output_format.process_option_show_reloaded_content_from_html(parsed_email=parsed_email)
+    if options.show_attachments:
+        output_format.process_option_show_attachments(parsed_email=parsed_email, extract_content=options.extract_content, hash_archive_members=options.hash_archive_members)
+    if options.show_text:
+        output_format.process_option_show_text(parsed_email=parsed_email)
+    if options.show_html:
+        output_format.process_option_show_html(parsed_email=parsed_email)
+    if options.show_embedded_emails:
+        # the embedded emails share the instrumentation, so their timings are part of the timings of the enclosing email
+        embedded_options = options._replace(show_timings=False)
+        output_format.process_option_show_embedded_emails(parsed_email=parsed_email, process_embedded_email=lambda embedded_output, embedded_email: process_options(
+            output_format=embedded_output, parsed_email=embedded_email, options=embedded_options))
+    if options.show_timings:
+        output_format.process_option_show_timings(parsed_email=parsed_email)
+
+
+def is_result_cacheable(output_format: AbstractOutput, options: AnalysisOptions) -> bool:
+    """ only the sections of the structured outputs are cached, timings are measured per run and are never cached """
+    return isinstance(output_format, JsonOutput) and not options.show_timings
+
+
+def get_cached_final_output(output_format: JsonOutput, eml_content: bytes, options: AnalysisOptions, result_cache: ResultCache,
+                            limits: ResourceLimits or None = None) -> str or None:
+    """ returns the output of an email which was analyzed with the same options before or analyzes it and caches the result
+
+    the key is the hash of the raw EML, so the result of a duplicate message is returned without parsing it at all,
+    the limits are part of the key as content which exceeds them is missing in the result
+    """
+    limits = limits if limits is not None else ResourceLimits()
+    key = get_content_key(content=eml_content, variant=repr((tuple(options), tuple(limits))))
+    result_dictionary = result_cache.get(namespace='message', key=key)
+    if result_dictionary is None:
+        parsed_email = ParsedEmail(eml_content=eml_content, limits=limits, result_cache=result_cache)
+        result_output = JsonOutput()
+        process_options(output_format=result_output, parsed_email=parsed_email, options=options)
+        result_dictionary = result_output.get_result_dictionary(parsed_email=parsed_email)
+        result_cache.put(namespace='message', key=key, value=result_dictionary)
+    return output_format.get_final_output_from_result_dictionary(result_dictionary=result_dictionary)
@@ -0,0 +1,85 @@
+import asyncio
+import concurrent.futures
+import functools
+import os
+
+from eml_analyzer.library.analysis import AnalysisOptions, process_options
+from eml_analyzer.library.outputs import JsonOutput
+from eml_analyzer.library.parser import ParsedEmail, Instrumentation, ResourceLimits
+
+
+def analyze_to_dictionary(eml_content: str or bytes or None, options: AnalysisOptions, path: str or None = None, limits: ResourceLimits or None = None) -> dict:
+    """ parses and analyzes an email and returns the result dictionary of the JSON output, runs in the executor """
+    instrumentation = Instrumentation() if options.show_timings else None
+    if path is not None:
+        parsed_email = ParsedEmail.from_file(path=path, instrumentation=instrumentation, limits=limits)
+    else:
+        parsed_email = ParsedEmail(eml_content=eml_content, instrumentation=instrumentation, limits=limits)
+    output_format = JsonOutput()
+    process_options(output_format=output_format, parsed_email=parsed_email, options=options)
+    return output_format.get_result_dictionary(parsed_email=parsed_email)
+
+
+class AsyncEmlAnalyzer:
+    """ analyzes emails for asyncio applications without blocking the event loop
+
+    the parsing, decoding and extraction run in an executor, at most max_concurrency emails are handed over to the executor at
+    the same time while any number of callers can wait for their turn, e.g.
+
+        async with AsyncEmlAnalyzer(max_concurrency=8) as analyzer:
+            result = await analyzer.analyze(eml_content=eml_content)
+
+    if a waiting call is cancelled, an analysis which has not been started by the executor yet is cancelled as well
+    """
+    def __init__(self, executor: concurrent.futures.Executor or None = None, max_concurrency: int or None = None, options: AnalysisOptions or None = None,
+                 limits: ResourceLimits or None = None):
+        """ if no executor is given a process pool with one worker per CPU is created and shut down by close(),
+            the limits apply to every analyzed email, by default the limits of ResourceLimits are used """
+        self._executor: concurrent.futures.Executor or None = executor
+        self._owns_executor: bool = executor is None
+        self._max_concurrency: int = max_concurrency if max_concurrency is not None else (os.cpu_count() or 1)
+        self._options: AnalysisOptions = options if options is not None else AnalysisOptions().with_default_selection()
+        self._limits: ResourceLimits or None = limits
+        # the semaphore is created in the event loop which uses the analyzer, as asyncio primitives are bound to a loop in older Python versions
+        self._semaphore: asyncio.Semaphore or None = None
+
+    async def __aenter__(self) -> 'AsyncEmlAnalyzer':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        return self._semaphore
+
+    async def analyze(self, eml_content: str or bytes or bytearray or memoryview, options: AnalysisOptions or None = None) -> dict:
+        """ returns the same dictionary as the JSON output, EmlParsingException is raised if the email can not be parsed """
+        if isinstance(eml_content, (bytearray, memoryview)):
+            # the content is copied as it is handed over to another process and could be changed by the caller while waiting
+            eml_content = bytes(eml_content)
+        return await self._run(function=functools.partial(analyze_to_dictionary, eml_content, self._get_options(options=options), limits=self._limits))
+
+    async def analyze_file(self, path: str, options: AnalysisOptions or None = None) -> dict:
+        """ the file is read in the executor, so the event loop is not blocked by the disk either """
+        return await self._run(function=functools.partial(analyze_to_dictionary, None, self._get_options(options=options), path, self._limits))
+
+    def _get_options(self, options: AnalysisOptions or None) -> AnalysisOptions:
+        return options if options is not None else self._options
+
+    async def _run(self, function: functools.partial) -> dict:
+        async with self._get_semaphore():
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self._get_executor(), function)
+
+    async def close(self) -> None:
+        """ shuts down the executor if it was created by the analyzer, an executor passed by the caller is left running """
+        if self._owns_executor and self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.get_event_loop().run_in_executor(None, functools.partial(executor.shutdown, wait=True))
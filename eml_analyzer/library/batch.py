@@ -0,0 +1,178 @@
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import glob
+import io
+import os
+from typing import NamedTuple, Iterable, Iterator, Callable
+
+from eml_analyzer.library.analysis import AnalysisOptions, create_output, process_options, is_result_cacheable, get_cached_final_output
+from eml_analyzer.library.outputs import JsonOutput
+from eml_analyzer.library.parser import ParsedEmail, EmlParsingException, Instrumentation, ResultCache, ResourceLimits, iter_mailbox_messages
+from eml_analyzer.library.parser.mailbox_reader import is_maildir, is_mbox
+from eml_analyzer.library.parser.result_cache import DEFAULT_MAX_SIZE_BYTES
+
+
+# the number of messages which are handed over to the process pool per worker before results are consumed
+_PENDING_TASKS_PER_WORKER = 4
+
+
+class BatchInput(NamedTuple):
+    source: str
+    # the raw content of a message from a mailbox, EML files are read by the worker itself
+    eml_content: bytes or None = None
+
+
+class BatchResult(NamedTuple):
+    source: str
+    output: str
+    successful: bool
+
+
+def collect_inputs(inputs: Iterable[str]) -> Iterator[BatchInput]:
+    """ resolves directories, glob patterns, mailboxes and file paths to the emails which should be analyzed """
+    for entry in inputs:
+        if os.path.isdir(entry):
+            yield from _walk_directory(directory=entry)
+        elif os.path.isfile(entry):
+            yield from _read_file(path=entry)
+        else:
+            for path in sorted(glob.iglob(entry, recursive=True)):
+                if os.path.isfile(path):
+                    yield from _read_file(path=path)
+
+
+def _walk_directory(directory: str) -> Iterator[BatchInput]:
+    if is_maildir(path=directory):
+        yield from _read_mailbox(path=directory)
+        return
+    for current_directory, child_directories, filenames in os.walk(directory):
+        for filename in sorted(filenames):
+            if filename.lower().endswith(('.eml', '.mbox')):
+                yield from _read_file(path=os.path.join(current_directory, filename))
+        child_directories.sort()
+        for child_directory in list(child_directories):
+            child_path = os.path.join(current_directory, child_directory)
+            if is_maildir(path=child_path):
+                # the messages of a Maildir are read by the mailbox module instead of walking through it
+                child_directories.remove(child_directory)
+                yield from _read_mailbox(path=child_path)
+
+
+def _read_file(path: str) -> Iterator[BatchInput]:
+    if is_mbox(path=path):
+        yield from _read_mailbox(path=path)
+    else:
+        yield BatchInput(source=path)
+
+
+def _read_mailbox(path: str) -> Iterator[BatchInput]:
+    for mailbox_message in iter_mailbox_messages(path=path):
+        yield BatchInput(source=mailbox_message.source, eml_content=mailbox_message.eml_content)
+
+
+def read_file_list(file_list: io.TextIOWrapper) -> Iterator[str]:
+    """ yields the entries of a file which contains one path per line, the file is closed afterwards """
+    with file_list:
+        for line in file_list:
+            line = line.strip()
+            if line:
+                yield line
+
+
+@functools.lru_cache(maxsize=None)
+def open_result_cache(directory: str, max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES) -> ResultCache:
+    """ every worker process opens the cache once and keeps it open for all emails it analyzes """
+    return ResultCache(directory=directory, max_size_bytes=max_size_bytes)
+
+
+def analyze_batch_input(batch_input: BatchInput, output_format_name: str, options: AnalysisOptions, cache_directory: str or None = None,
+                        cache_size: int = DEFAULT_MAX_SIZE_BYTES, limits: ResourceLimits or None = None) -> BatchResult:
+    """ analyzes a single email and returns the output, errors are reported as output instead of being raised """
+    output_format = create_output(output_format=output_format_name)
+    result_cache = open_result_cache(directory=cache_directory, max_size_bytes=cache_size) if cache_directory is not None else None
+    captured_output = io.StringIO()
+    with contextlib.redirect_stdout(captured_output):
+        output_format.process_input_file(file_path=batch_input.source)
+        if result_cache is not None and is_result_cacheable(output_format=output_format, options=options):
+            return _analyze_batch_input_with_result_cache(batch_input=batch_input, output_format=output_format, options=options,
+                                                          result_cache=result_cache, captured_output=captured_output, limits=limits)
+        instrumentation = Instrumentation() if options.show_timings else None
+        try:
+            if batch_input.eml_content is None:
+                parsed_email = ParsedEmail.from_file(path=batch_input.source, instrumentation=instrumentation, limits=limits, result_cache=result_cache)
+            else:
+                parsed_email = ParsedEmail(eml_content=batch_input.eml_content, instrumentation=instrumentation, limits=limits, result_cache=result_cache)
+        except OSError as e:
+            output_format.output_error(exception=e, error_message='File could not be loaded')
+            return BatchResult(source=batch_input.source, output=captured_output.getvalue(), successful=False)
+        except EmlParsingException as e:
+            output_format.output_error(exception=e, error_message='File could not be parsed. Sure it is an eml file?')
+            return BatchResult(source=batch_input.source, output=captured_output.getvalue(), successful=False)
+
+        try:
+            process_options(output_format=output_format, parsed_email=parsed_email, options=options)
+            final_output = output_format.get_final_output(parsed_email=parsed_email)
+        except Exception as e:
+            output_format.output_error(exception=e, error_message='File could not be analyzed')
+            return BatchResult(source=batch_input.source, output=captured_output.getvalue(), successful=False)
+
+        if final_output:
+            print(final_output)
+    return BatchResult(source=batch_input.source, output=captured_output.getvalue(), successful=True)
+
+
+def _analyze_batch_input_with_result_cache(batch_input: BatchInput, output_format: JsonOutput, options: AnalysisOptions, result_cache: ResultCache,
+                                           captured_output: io.StringIO, limits: ResourceLimits or None = None) -> BatchResult:
+    """ the raw EML is read completely, as its hash is the key of the cached result """
+    try:
+        eml_content = batch_input.eml_content
+        if eml_content is None:
+            with open(batch_input.source, mode='rb') as input_file:
+                eml_content = input_file.read()
+    except OSError as e:
+        output_format.output_error(exception=e, error_message='File could not be loaded')
+        return BatchResult(source=batch_input.source, output=captured_output.getvalue(), successful=False)
+
+    try:
+        final_output = get_cached_final_output(output_format=output_format, eml_content=eml_content, options=options, result_cache=result_cache, limits=limits)
+    except EmlParsingException as e:
+        output_format.output_error(exception=e, error_message='File could not be parsed. Sure it is an eml file?')
+        return BatchResult(source=batch_input.source, output=captured_output.getvalue(), successful=False)
+    except Exception as e:
+        output_format.output_error(exception=e, error_message='File could not be analyzed')
+        return BatchResult(source=batch_input.source, output=captured_output.getvalue(), successful=False)
+
+    if final_output:
+        print(final_output)
+    return BatchResult(source=batch_input.source, output=captured_output.getvalue(), successful=True)
+
+
+def run_batch(batch_inputs: Iterable[BatchInput], output_format_name: str, options: AnalysisOptions, workers: int = 1, cache_directory: str or None = None,
+              cache_size: int = DEFAULT_MAX_SIZE_BYTES, limits: ResourceLimits or None = None) -> Iterator[BatchResult]:
+    """ analyzes the given emails and yields the results in the order of the inputs as soon as they are available,
+        if a cache directory is given the results are cached and shared by all worker processes,
+        the limits apply to every email, by default the limits of ResourceLimits are used """
+    analyze = functools.partial(analyze_batch_input, output_format_name=output_format_name, options=options, cache_directory=cache_directory, cache_size=cache_size,
+                                limits=limits)
+    return map_batch_inputs(function=analyze, batch_inputs=batch_inputs, workers=workers)
+
+
+def map_batch_inputs(function: Callable[[BatchInput], any], batch_inputs: Iterable[BatchInput], workers: int = 1) -> Iterator[any]:
+    """ applies the function to the emails on a pool of worker processes and yields the results in the order of the inputs,
+        the function has to be picklable, e.g. a module-level function or a functools.partial of it """
+    if workers <= 1:
+        for batch_input in batch_inputs:
+            yield function(batch_input)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending_results = collections.deque()
+        for batch_input in batch_inputs:
+            pending_results.append(executor.submit(function, batch_input))
+            # limit the number of queued messages so that the inputs and results do not pile up in memory
+            if len(pending_results) >= workers * _PENDING_TASKS_PER_WORKER:
+                yield pending_results.popleft().result()
+        while pending_results:
+            yield pending_results.popleft().result()
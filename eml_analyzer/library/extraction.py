@@ -0,0 +1,64 @@
+import concurrent.futures
+import os
+import time
+from typing import NamedTuple, List
+
+from eml_analyzer.library.parser import Attachment, ResourceLimitException
+
+
+class ExtractionResult(NamedTuple):
+    attachment: Attachment
+    output_path: str
+    written_bytes: int
+    elapsed_seconds: float
+    # the error message if the attachment could not be written
+    error_message: str or None
+
+
+def get_output_filename(attachment: Attachment) -> str:
+    if attachment.filename:
+        return attachment.filename
+    return 'attachment_{}'.format(attachment.index)
+
+
+def get_unique_output_paths(attachments: List[Attachment], directory: str) -> List[str]:
+    """ assigns every attachment a path in the directory, on name collisions a counter is added like 'name (1).ext' """
+    reserved_paths = set()
+    output_paths = list()
+    for attachment in attachments:
+        filename = get_output_filename(attachment=attachment)
+        name, extension = os.path.splitext(filename)
+        output_path = os.path.join(directory, filename)
+        counter = 0
+        while output_path in reserved_paths or os.path.exists(output_path):
+            counter += 1
+            output_path = os.path.join(directory, '{} ({}){}'.format(name, counter, extension))
+        reserved_paths.add(output_path)
+        output_paths.append(output_path)
+    return output_paths
+
+
+def extract_attachment(attachment: Attachment, output_path: str) -> ExtractionResult:
+    start_time = time.perf_counter()
+    try:
+        # the file is created exclusively, so an existing file is never overwritten
+        with open(output_path, mode='xb') as output_file:
+            written_bytes = attachment.write_content_to_file(output_file=output_file)
+    except OSError as e:
+        return ExtractionResult(attachment=attachment, output_path=output_path, written_bytes=0, elapsed_seconds=time.perf_counter() - start_time, error_message=str(e))
+    except ResourceLimitException as e:
+        # the file was created before, but nothing was written to it
+        os.remove(output_path)
+        return ExtractionResult(attachment=attachment, output_path=output_path, written_bytes=0, elapsed_seconds=time.perf_counter() - start_time, error_message=str(e))
+    return ExtractionResult(attachment=attachment, output_path=output_path, written_bytes=written_bytes, elapsed_seconds=time.perf_counter() - start_time, error_message=None)
+
+
+def extract_attachments(attachments: List[Attachment], directory: str, jobs: int = 1) -> List[ExtractionResult]:
+    """ extracts the attachments into the directory, with more than one job the attachments are decoded and written concurrently """
+    output_paths = get_unique_output_paths(attachments=attachments, directory=directory)
+    if jobs <= 1:
+        return [extract_attachment(attachment=attachment, output_path=output_path) for attachment, output_path in zip(attachments, output_paths)]
+
+    # the decoding in binascii and the file operations release the GIL, so threads are sufficient
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(extract_attachment, attachments, output_paths))
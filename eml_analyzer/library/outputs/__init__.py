@@ -1,3 +1,4 @@
 from .abstract_output import AbstractOutput
 from .json_output import JsonOutput
+from .json_lines_output import JsonLinesOutput
 from .standard_output import StandardOutput
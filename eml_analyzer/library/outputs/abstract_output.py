@@ -1,9 +1,14 @@
 import abc
+from typing import Callable
 
 from eml_analyzer.library.parser.parsed_email import ParsedEmail
 
 
 class AbstractOutput(abc.ABC):
+    @abc.abstractmethod
+    def process_input_file(self, file_path: str) -> None:
+        pass
+
     @abc.abstractmethod
     def get_final_output(self, parsed_email: ParsedEmail) -> str or None:
         pass
@@ -29,13 +34,23 @@ class AbstractOutput(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def process_option_show_attachments(self, parsed_email: ParsedEmail, extract_content: bool = False) -> None:
+    def process_option_show_attachments(self, parsed_email: ParsedEmail, extract_content: bool = False, hash_archive_members: bool = False) -> None:
         pass
 
     @abc.abstractmethod
     def process_option_show_reloaded_content_from_html(self, parsed_email: ParsedEmail) -> None:
         pass
 
+    @abc.abstractmethod
+    def process_option_show_embedded_emails(self, parsed_email: ParsedEmail, process_embedded_email: Callable[['AbstractOutput', ParsedEmail], None]) -> None:
+        """ the embedded emails are processed with a new output of the same kind by the given function, e.g. with the same options """
+        pass
+
+    @abc.abstractmethod
+    def process_option_show_timings(self, parsed_email: ParsedEmail) -> None:
+        """ the timings are output with the final output, so that all stages of the analysis are included """
+        pass
+
     def output_error_and_exit(self, exception: Exception or None, error_message: str) -> None:
         self.output_error(exception=exception, error_message=error_message)
         exit()
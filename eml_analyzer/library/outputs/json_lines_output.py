@@ -0,0 +1,63 @@
+import json
+import sys
+import time
+from typing import List
+
+from eml_analyzer.library.outputs.json_output import JsonOutput
+from eml_analyzer.library.parser import ParsedEmail
+
+
+class JsonLinesOutput(JsonOutput):
+    """ writes one compact JSON record per line, each section is written and flushed as soon as it is produced """
+    def __init__(self, output_stream=None):
+        super().__init__()
+        # if no stream is specified the current standard output is used
+        self._output_stream = output_stream
+        self._record_is_started: bool = False
+        # the sections are serialized when they are added, the time is recorded if timings are requested
+        self._serialization_seconds: float = 0.0
+        self._serialized_bytes: int = 0
+
+    def _get_output_stream(self):
+        if self._output_stream is None:
+            return sys.stdout
+        return self._output_stream
+
+    def _add_section(self, key: str, value: any) -> None:
+        separator = ',' if self._record_is_started else '{'
+        self._record_is_started = True
+        start = time.perf_counter()
+        serialized_section = separator + json.dumps(key) + ':' + json.dumps(value, separators=(',', ':'))
+        self._serialization_seconds += time.perf_counter() - start
+        self._serialized_bytes += len(serialized_section)
+        output_stream = self._get_output_stream()
+        output_stream.write(serialized_section)
+        output_stream.flush()
+
+    def _finish_record(self) -> None:
+        output_stream = self._get_output_stream()
+        output_stream.write('}\n' if self._record_is_started else '{}\n')
+        output_stream.flush()
+        self._record_is_started = False
+
+    def output_error(self, exception: Exception, error_message: str) -> None:
+        self._add_section(key='error_message', value=error_message)
+        if exception:
+            self._add_section(key='exception', value=str(exception))
+        self._finish_record()
+
+    def get_final_output_from_result_dictionary(self, result_dictionary: dict) -> str or None:
+        for key, value in result_dictionary.items():
+            self._add_section(key=key, value=value)
+        self._finish_record()
+        return None
+
+    def get_final_output(self, parsed_email: ParsedEmail) -> str or None:
+        error_messages: List[str] = parsed_email.get_error_messages()
+        if len(error_messages) > 0:
+            self._add_section(key="warnings", value=error_messages)
+        if self._show_timings:
+            parsed_email.get_instrumentation().record(stage='serialization', seconds=self._serialization_seconds, processed_bytes=self._serialized_bytes)
+            self._add_section(key="timings", value=JsonOutput._generate_timings_dict(parsed_email=parsed_email))
+        self._finish_record()
+        return None
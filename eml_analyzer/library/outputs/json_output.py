@@ -1,5 +1,6 @@
 import json
-from typing import List
+import time
+from typing import List, Callable
 
 from eml_analyzer.library.outputs.abstract_output import AbstractOutput
 from eml_analyzer.library.parser import ParsedEmail, Attachment, StructureItem
@@ -8,6 +9,13 @@ from eml_analyzer.library.parser import ParsedEmail, Attachment, StructureItem
 class JsonOutput(AbstractOutput):
     def __init__(self):
         self._result_dictionary = dict()
+        self._show_timings: bool = False
+
+    def _add_section(self, key: str, value: any) -> None:
+        self._result_dictionary[key] = value
+
+    def process_input_file(self, file_path: str) -> None:
+        self._add_section(key="file", value=file_path)
 
     def process_option_show_header(self, parsed_email: ParsedEmail) -> None:
         header_dictionary = dict()
@@ -16,14 +24,30 @@ class JsonOutput(AbstractOutput):
                 header_dictionary[key].append(value)
             else:
                 header_dictionary[key] = [value]
-        self._result_dictionary["headers"] = header_dictionary
+        self._add_section(key="headers", value=header_dictionary)
 
     def process_option_show_structure(self, parsed_email: ParsedEmail) -> None:
         structure_item = parsed_email.get_structure()
-        self._result_dictionary["structure"] = JsonOutput._generate_dict_from_structure_item(structure_item=structure_item)
+        self._add_section(key="structure", value=JsonOutput._generate_dict_from_structure_item(structure_item=structure_item))
 
     @staticmethod
     def _generate_dict_from_structure_item(structure_item: StructureItem) -> dict:
+        # the tree is converted iteratively, so deeply nested emails do not exceed the recursion limit
+        root_dict = JsonOutput._generate_dict_of_single_structure_item(structure_item=structure_item)
+        stack = [(structure_item, root_dict)]
+        while stack:
+            current_item, current_dict = stack.pop()
+            if len(current_item.child_items) > 0:
+                child_dicts = list()
+                for child in current_item.child_items:
+                    child_dict = JsonOutput._generate_dict_of_single_structure_item(structure_item=child)
+                    child_dicts.append(child_dict)
+                    stack.append((child, child_dict))
+                current_dict['children'] = child_dicts
+        return root_dict
+
+    @staticmethod
+    def _generate_dict_of_single_structure_item(structure_item: StructureItem) -> dict:
         result_dict = {
             'type': structure_item.content_type,
         }
@@ -32,42 +56,36 @@ class JsonOutput(AbstractOutput):
             result_dict['name'] = structure_item.filename
         if structure_item.content_disposition is not None:
             result_dict['disposition'] = structure_item.content_disposition
-
-        if len(structure_item.child_items) > 0:
-            child_dicts = list()
-            for child in structure_item.child_items:
-                child_dicts.append(JsonOutput._generate_dict_from_structure_item(structure_item=child))
-            result_dict['children'] = child_dicts
-
         return result_dict
 
     def process_option_show_embedded_urls_in_html_and_text(self, parsed_email: ParsedEmail) -> None:
-        self._result_dictionary["urls"] = parsed_email.get_embedded_clickable_urls_from_html_and_text()
+        self._add_section(key="urls", value=parsed_email.get_embedded_clickable_urls_from_html_and_text())
 
     def process_option_show_html(self, parsed_email: ParsedEmail) -> None:
         html = parsed_email.get_html_content()
         if html is not None:
-            self._result_dictionary["html"] = html
+            self._add_section(key="html", value=html)
 
     def process_option_show_text(self, parsed_email: ParsedEmail) -> None:
         text = parsed_email.get_text_content()
         if text is not None:
-            self._result_dictionary["text"] = text
+            self._add_section(key="text", value=text)
 
-    def process_option_show_attachments(self, parsed_email: ParsedEmail, extract_content: bool = False) -> None:
+    def process_option_show_attachments(self, parsed_email: ParsedEmail, extract_content: bool = False, hash_archive_members: bool = False) -> None:
         attachment_list = parsed_email.get_attachments()
-        self._result_dictionary["attachments"] = JsonOutput._generate_attachments_dict_from_attachment_list(attachment_list=attachment_list, extract_content=extract_content)
+        self._add_section(key="attachments", value=JsonOutput._generate_attachments_dict_from_attachment_list(attachment_list=attachment_list, extract_content=extract_content,
+                                                                                                             hash_archive_members=hash_archive_members))
 
     @staticmethod
-    def _generate_attachments_dict_from_attachment_list(attachment_list: List[Attachment], extract_content: bool) -> List[dict]:
+    def _generate_attachments_dict_from_attachment_list(attachment_list: List[Attachment], extract_content: bool, hash_archive_members: bool = False) -> List[dict]:
         result_list = list()
         attachment: Attachment
         for attachment in attachment_list:
-            result_list.append(JsonOutput._generate_attachment_dict_from_attachment(attachment=attachment, extract_content=extract_content))
+            result_list.append(JsonOutput._generate_attachment_dict_from_attachment(attachment=attachment, extract_content=extract_content, hash_archive_members=hash_archive_members))
         return result_list
 
     @staticmethod
-    def _generate_attachment_dict_from_attachment(attachment: Attachment, extract_content: bool) -> dict:
+    def _generate_attachment_dict_from_attachment(attachment: Attachment, extract_content: bool, hash_archive_members: bool = False) -> dict:
         attachment_dict = {
             'type': attachment.content_type,
         }
@@ -75,23 +93,77 @@ class JsonOutput(AbstractOutput):
             attachment_dict['name'] = attachment.filename
         if attachment.content_disposition is not None:
             attachment_dict['disposition'] = attachment.content_disposition
+        hashes = attachment.get_hashes()
+        if hashes is not None:
+            attachment_dict['hashes'] = hashes.to_dict()
+        archive_listing = attachment.get_archive_listing(hash_members=hash_archive_members)
+        if archive_listing is not None:
+            attachment_dict['archive'] = archive_listing.to_dict()
         if extract_content:
             attachment_dict['content_in_base64'] = attachment.get_content_base64_encoded()
         return attachment_dict
 
     def process_option_show_reloaded_content_from_html(self, parsed_email: ParsedEmail) -> None:
-        self._result_dictionary["reloaded_content"] = parsed_email.get_reloaded_content_from_html()
+        self._add_section(key="reloaded_content", value=parsed_email.get_reloaded_content_from_html())
+
+    def process_option_show_embedded_emails(self, parsed_email: ParsedEmail, process_embedded_email: Callable[[AbstractOutput, ParsedEmail], None]) -> None:
+        embedded_email_list = list()
+        for embedded_email in parsed_email.get_embedded_emails():
+            embedded_email_dict = {'part': embedded_email.part_position}
+            if embedded_email.filename is not None:
+                embedded_email_dict['name'] = embedded_email.filename
+            embedded_output = JsonOutput()
+            process_embedded_email(embedded_output, embedded_email.parsed_email)
+            embedded_email_dict.update(embedded_output.get_result_dictionary(parsed_email=embedded_email.parsed_email))
+            embedded_email_list.append(embedded_email_dict)
+        self._add_section(key="embedded_emails", value=embedded_email_list)
+
+    def process_option_show_timings(self, parsed_email: ParsedEmail) -> None:
+        self._show_timings = True
+
+    @staticmethod
+    def _generate_timings_dict(parsed_email: ParsedEmail) -> dict:
+        return {stage: timing.to_dict() for stage, timing in parsed_email.get_instrumentation().get_timings().items()}
 
     def output_error(self, exception: Exception, error_message: str) -> None:
-        error_dict = {
-            'error_message': error_message,
-        }
+        print(self.get_error_output(exception=exception, error_message=error_message))
+
+    def get_error_output(self, exception: Exception or None, error_message: str) -> str:
+        error_dict = dict()
+        if "file" in self._result_dictionary:
+            error_dict['file'] = self._result_dictionary["file"]
+        error_dict['error_message'] = error_message
         if exception:
             error_dict['exception'] = str(exception)
-        print(json.dumps(error_dict, indent=4))
+        return json.dumps(error_dict, indent=4)
 
-    def get_final_output(self, parsed_email: ParsedEmail) -> str or None:
+    def _add_warnings(self, parsed_email: ParsedEmail) -> None:
         error_messages: List[str] = parsed_email.get_error_messages()
         if len(error_messages) > 0:
-            self._result_dictionary['warnings'] = parsed_email.get_error_messages()
+            self._add_section(key="warnings", value=error_messages)
+
+    def get_result_dictionary(self, parsed_email: ParsedEmail) -> dict:
+        """ returns the result as dictionary instead of serializing it, e.g. for further processing in the same program """
+        self._add_warnings(parsed_email=parsed_email)
+        if self._show_timings:
+            self._add_section(key="timings", value=JsonOutput._generate_timings_dict(parsed_email=parsed_email))
+        return self._result_dictionary
+
+    def get_final_output_from_result_dictionary(self, result_dictionary: dict) -> str or None:
+        """ outputs the result dictionary of an earlier analysis of the same email, e.g. from a result cache """
+        for key, value in result_dictionary.items():
+            self._add_section(key=key, value=value)
+        return json.dumps(self._result_dictionary, indent=4)
+
+    def get_final_output(self, parsed_email: ParsedEmail) -> str or None:
+        self._add_warnings(parsed_email=parsed_email)
+        if not self._show_timings:
+            return json.dumps(self._result_dictionary, indent=4)
+
+        # the result is serialized once to measure the serialization and again together with the timings
+        instrumentation = parsed_email.get_instrumentation()
+        start = time.perf_counter()
+        final_output = json.dumps(self._result_dictionary, indent=4)
+        instrumentation.record(stage='serialization', seconds=time.perf_counter() - start, processed_bytes=len(final_output))
+        self._add_section(key="timings", value=JsonOutput._generate_timings_dict(parsed_email=parsed_email))
         return json.dumps(self._result_dictionary, indent=4)
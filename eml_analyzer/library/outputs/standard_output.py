@@ -1,12 +1,15 @@
 from logging import warning
+from typing import Callable
 
 from cli_formatter.output_formatting import print_headline_banner, colorize_string, Color, info, error, warning
 
 from eml_analyzer.library.outputs.abstract_output import AbstractOutput
-from eml_analyzer.library.parser import ParsedEmail, StructureItem, Attachment
+from eml_analyzer.library.parser import ParsedEmail, StructureItem, Attachment, ArchiveListing
 
 
 class StandardOutput(AbstractOutput):
+    _show_timings: bool = False
+
     def __int__(self):
         pass
 
@@ -17,8 +20,28 @@ class StandardOutput(AbstractOutput):
             for message in error_messages:
                 warning(message=message)
             print()
+        if self._show_timings:
+            self._print_timings(parsed_email=parsed_email)
         return
 
+    @staticmethod
+    def _print_timings(parsed_email: ParsedEmail) -> None:
+        print_headline_banner(headline='Timings')
+        timings = parsed_email.get_instrumentation().get_timings()
+        if len(timings) == 0:
+            info('No stages were measured')
+        else:
+            max_width_stage = max(len(stage) for stage in timings) + 5
+            print('stage'.ljust(max_width_stage), 'calls'.rjust(8), 'time [ms]'.rjust(12), 'bytes'.rjust(12))
+            for stage, timing in timings.items():
+                print(colorize_string(text=stage.ljust(max_width_stage), color=Color.CYAN), str(timing.calls).rjust(8),
+                      '{:.3f}'.format(timing.seconds * 1000).rjust(12), str(timing.processed_bytes).rjust(12))
+        print()
+
+    def process_input_file(self, file_path: str) -> None:
+        print_headline_banner(headline='File: {}'.format(file_path))
+        print()
+
     def process_option_show_header(self, parsed_email: ParsedEmail) -> None:
         print_headline_banner(headline='Header')
         max_key_width = max([len(x) for x, _ in parsed_email.get_header()])
@@ -38,11 +61,15 @@ class StandardOutput(AbstractOutput):
         print()
 
     def _print_structure(self, structure: StructureItem, level: int = 0):
-        filename = ('  [' + colorize_string(text=structure.filename, color=Color.CYAN) + ']') if structure.filename is not None else ''
-        type_with_intend = level * '|  ' + '|- {}'.format(structure.content_type)
-        print(type_with_intend.ljust(40), filename)
-        for child_item in structure.child_items:
-            self._print_structure(structure=child_item, level=level + 1)
+        # the tree is printed iteratively, so deeply nested emails do not exceed the recursion limit
+        stack = [(structure, level)]
+        while stack:
+            structure_item, current_level = stack.pop()
+            filename = ('  [' + colorize_string(text=structure_item.filename, color=Color.CYAN) + ']') if structure_item.filename is not None else ''
+            type_with_intend = current_level * '|  ' + '|- {}'.format(structure_item.content_type)
+            print(type_with_intend.ljust(40), filename)
+            for child_item in reversed(structure_item.child_items):
+                stack.append((child_item, current_level + 1))
 
     def process_option_show_embedded_urls_in_html_and_text(self, parsed_email: ParsedEmail) -> None:
         print_headline_banner(headline='URLs in HTML and text part')
@@ -71,22 +98,45 @@ class StandardOutput(AbstractOutput):
             print(text)
         print()
 
-    def process_option_show_attachments(self, parsed_email: ParsedEmail, extract_content: bool = False) -> None:
+    def process_option_show_attachments(self, parsed_email: ParsedEmail, extract_content: bool = False, hash_archive_members: bool = False) -> None:
         print_headline_banner('Attachments')
         attachments_table_rows = list()
+        archive_listings = list()
         attachment: Attachment
         for attachment in parsed_email.get_attachments():
-            attachments_table_rows.append((attachment.filename, attachment.content_type, attachment.content_disposition))
+            hashes = attachment.get_hashes()
+            sha256 = hashes.sha256 if hashes is not None else ''
+            attachments_table_rows.append((attachment.filename, attachment.content_type, str(attachment.content_disposition), sha256))
+            archive_listings.append(attachment.get_archive_listing(hash_members=hash_archive_members))
         if len(attachments_table_rows) == 0:
             info('E-Mail contains no attachments')
         else:
-            max_width_filename = max([len(filename) for (filename, content_type, disposition) in attachments_table_rows]) + 7
-            max_width_content_type = max([len(content_type) for (filename, content_type, disposition) in attachments_table_rows]) + 7
-            for index, (filename, content_type, disposition) in enumerate(attachments_table_rows):
+            max_width_filename = max([len(filename) for (filename, content_type, disposition, sha256) in attachments_table_rows]) + 7
+            max_width_content_type = max([len(content_type) for (filename, content_type, disposition, sha256) in attachments_table_rows]) + 7
+            max_width_disposition = max([len(disposition) for (filename, content_type, disposition, sha256) in attachments_table_rows]) + 7
+            for index, (filename, content_type, disposition, sha256) in enumerate(attachments_table_rows):
                 index_str = '[' + colorize_string(text=str(index + 1), color=Color.CYAN) + ']'
-                print(index_str, filename.ljust(max_width_filename), content_type.ljust(max_width_content_type), disposition)
+                print(index_str, filename.ljust(max_width_filename), content_type.ljust(max_width_content_type), disposition.ljust(max_width_disposition), sha256)
+                if archive_listings[index] is not None:
+                    self._print_archive_listing(archive_listing=archive_listings[index])
         print()
 
+    @staticmethod
+    def _print_archive_listing(archive_listing: ArchiveListing) -> None:
+        if len(archive_listing.members) == 0:
+            info('    {} archive without members'.format(archive_listing.archive_format))
+        max_width_name = max([len(member.name) for member in archive_listing.members], default=0) + 5
+        for member in archive_listing.members:
+            size = '{} bytes'.format(member.size) if member.size is not None else ''
+            compressed_size = '({} compressed)'.format(member.compressed_size) if member.compressed_size is not None else ''
+            encrypted = colorize_string(text='encrypted', color=Color.RED) if member.is_encrypted else ''
+            sha256 = member.hashes.sha256 if member.hashes is not None else ''
+            print('    -', member.name.ljust(max_width_name), size.rjust(16), compressed_size.rjust(22), encrypted, sha256)
+        if archive_listing.is_truncated:
+            warning('    the archive has more members which were not listed')
+        if archive_listing.error_message is not None:
+            warning('    the archive could not be read completely: {}'.format(archive_listing.error_message))
+
     def process_option_show_reloaded_content_from_html(self, parsed_email: ParsedEmail) -> None:
         print_headline_banner(headline='Reloaded Content (aka. Tracking Pixels)')
         sources = parsed_email.get_reloaded_content_from_html()
@@ -99,6 +149,23 @@ class StandardOutput(AbstractOutput):
                 print(' - ' + colorize_string(text=x, color=Color.MAGENTA))
         print()
 
+    def process_option_show_embedded_emails(self, parsed_email: ParsedEmail, process_embedded_email: Callable[[AbstractOutput, ParsedEmail], None]) -> None:
+        embedded_emails = parsed_email.get_embedded_emails()
+        if len(embedded_emails) == 0:
+            print_headline_banner(headline='Embedded E-Mails')
+            info('E-Mail contains no embedded E-Mails')
+            print()
+        for embedded_email in embedded_emails:
+            name = ' "{}"'.format(embedded_email.filename) if embedded_email.filename is not None else ''
+            print_headline_banner(headline='Embedded E-Mail in part {}{}'.format(embedded_email.part_position, name))
+            print()
+            embedded_output = StandardOutput()
+            process_embedded_email(embedded_output, embedded_email.parsed_email)
+            embedded_output.get_final_output(parsed_email=embedded_email.parsed_email)
+
+    def process_option_show_timings(self, parsed_email: ParsedEmail) -> None:
+        self._show_timings = True
+
     def output_error(self, exception: Exception or None, error_message: str) -> None:
         if exception:
             error('Error: {}'.format(exception))
@@ -1,3 +1,12 @@
-from .parsed_email import ParsedEmail, EmlParsingException, PayloadDecodingException
+from .parsed_email import ParsedEmail, EmlParsingException, PayloadDecodingException, EmbeddedEmail
 from .attachment import Attachment
+from .attachment_hashes import AttachmentHashes
+from .archive_inspector import ArchiveListing, ArchiveMember
 from .structure_item import StructureItem
+from .part_index import PartIndex, IndexedPart
+from .view_cache import CacheStatistics
+from .mailbox_reader import iter_parsed_emails, iter_mailbox_messages, MailboxMessage
+from .instrumentation import Instrumentation, NullInstrumentation, StageTiming
+from .header_decoder import HeaderView
+from .resource_limits import ResourceLimits, ResourceLimitException
+from .result_cache import ResultCache
@@ -0,0 +1,237 @@
+import gzip
+import struct
+import tarfile
+import tempfile
+import zipfile
+import zlib
+from typing import NamedTuple, List, Iterator, IO, Callable
+
+from eml_analyzer.library.parser.attachment_hashes import AttachmentHashes, compute_hashes
+from eml_analyzer.library.parser.payload_stream import DEFAULT_CHUNK_SIZE, iter_chunks, open_chunk_stream, write_chunks_to_file
+from eml_analyzer.library.parser.resource_limits import ResourceBudget
+
+# the number of bytes at the beginning of an attachment which are needed to recognize an archive, the tar magic is at offset 257
+ARCHIVE_PREFIX_SIZE = 512
+# zip files need random access, so they are buffered in a temporary file which is only written to disk above this size
+ZIP_BUFFER_MEMORY_SIZE = 16 * 1024 * 1024
+# the original filename in the header of a gzip file is only looked up in this many bytes
+_GZIP_HEADER_SIZE = 64 * 1024
+
+_ZIP_MAGICS = (b'PK\x03\x04', b'PK\x05\x06')
+_GZIP_MAGIC = b'\x1f\x8b'
+_BZIP2_MAGIC = b'BZh'
+_XZ_MAGIC = b'\xfd7zXZ\x00'
+_TAR_MAGIC_OFFSET = 257
+
+
+class ArchiveMember(NamedTuple):
+    name: str
+    # the uncompressed size, None if the archive does not record it
+    size: int or None
+    # the compressed size, None if the members are not compressed individually (e.g. in a compressed tar)
+    compressed_size: int or None
+    is_encrypted: bool
+    # only set if the members are hashed
+    hashes: AttachmentHashes or None = None
+
+    def to_dict(self) -> dict:
+        member_dict = {'name': self.name, 'size': self.size, 'compressed_size': self.compressed_size, 'encrypted': self.is_encrypted}
+        if self.hashes is not None:
+            member_dict['hashes'] = self.hashes.to_dict()
+        return member_dict
+
+
+class ArchiveListing(NamedTuple):
+    # 'zip', 'tar' or 'gzip'
+    archive_format: str
+    members: List[ArchiveMember]
+    # True if the archive has more members than the limit allows to list
+    is_truncated: bool = False
+    # the reason why the archive could not be read completely, e.g. a corrupt archive
+    error_message: str or None = None
+
+    def to_dict(self) -> dict:
+        listing_dict = {'format': self.archive_format, 'members': [member.to_dict() for member in self.members]}
+        if self.is_truncated:
+            listing_dict['truncated'] = True
+        if self.error_message is not None:
+            listing_dict['error_message'] = self.error_message
+        return listing_dict
+
+
+def get_archive_format(prefix: bytes) -> str or None:
+    """ recognizes an archive by the magic bytes at its beginning, compressed tar files are reported by their compression """
+    if prefix.startswith(_ZIP_MAGICS):
+        return 'zip'
+    if prefix.startswith(_GZIP_MAGIC):
+        return 'gzip'
+    if prefix.startswith(_BZIP2_MAGIC):
+        return 'bzip2'
+    if prefix.startswith(_XZ_MAGIC):
+        return 'xz'
+    if prefix[_TAR_MAGIC_OFFSET:_TAR_MAGIC_OFFSET + 5] == b'ustar':
+        return 'tar'
+    return None
+
+
+def inspect_archive(content: bytes, filename: str or None, description: str, hash_members: bool = False, budget: ResourceBudget or None = None) -> ArchiveListing or None:
+    """ lists the members of a zip, tar (also compressed with gzip, bzip2 or xz) or gzip file, returns None if the content is no archive """
+    return inspect_archive_chunks(iter_content_chunks=lambda: iter_chunks(data=content), filename=filename, description=description, hash_members=hash_members, budget=budget)
+
+
+def inspect_archive_chunks(iter_content_chunks: Callable[[], Iterator[bytes]], filename: str or None, description: str, hash_members: bool = False,
+                           budget: ResourceBudget or None = None) -> ArchiveListing or None:
+    """ like inspect_archive, but the content is read from the chunks which are yielded by the function each time it is called
+
+    the content is never held in memory as a whole: tar and gzip files are read as a stream, zip files are buffered in a temporary file
+    which is released after the inspection, the members are hashed chunk by chunk if requested and never extracted,
+    the budget limits the number of listed members, the decompressed bytes and the expansion ratio of the hashed members
+    """
+    archive_format = get_archive_format(prefix=open_chunk_stream(chunks=iter_content_chunks()).read(ARCHIVE_PREFIX_SIZE))
+    if archive_format is None:
+        return None
+    inspection = _ArchiveInspection(iter_content_chunks=iter_content_chunks, filename=filename, description=description, hash_members=hash_members, budget=budget)
+    if archive_format == 'zip':
+        return inspection.inspect_zip()
+    # compressed tar files can only be told apart from compressed single files by reading the tar header
+    listing = inspection.inspect_tar()
+    if listing is None and archive_format == 'gzip':
+        return inspection.inspect_gzip()
+    return listing
+
+
+class _ArchiveInspection:
+    def __init__(self, iter_content_chunks: Callable[[], Iterator[bytes]], filename: str or None, description: str, hash_members: bool, budget: ResourceBudget or None):
+        self._iter_content_chunks: Callable[[], Iterator[bytes]] = iter_content_chunks
+        self._filename: str or None = filename
+        self._description: str = description
+        self._hash_members: bool = hash_members
+        self._budget: ResourceBudget or None = budget
+        self._content_size: int or None = None
+
+    def _open_stream(self) -> IO[bytes]:
+        return open_chunk_stream(chunks=self._iter_content_chunks())
+
+    def _get_content_size(self) -> int:
+        """ the size of the archive is counted in a separate pass, as it is unknown while the archive is streamed """
+        if self._content_size is None:
+            self._content_size = sum(len(chunk) for chunk in self._iter_content_chunks())
+        return self._content_size
+
+    def _is_member_count_exceeded(self, member_count: int) -> bool:
+        return self._budget is not None and self._budget.is_archive_member_count_exceeded(member_count=member_count, description=self._description)
+
+    def _may_hash_member(self, name: str, size: int or None, compressed_size: int or None) -> bool:
+        if not self._hash_members or size is None:
+            return False
+        if self._budget is None:
+            return True
+        member_description = 'The member "{}" of {}'.format(name, self._description)
+        if compressed_size is not None and self._budget.is_expansion_ratio_exceeded(size=size, compressed_size=compressed_size, description=member_description):
+            return False
+        return self._budget.reserve_decoded_bytes(size=size, description=member_description)
+
+    def inspect_zip(self) -> ArchiveListing:
+        members = list()
+        try:
+            with tempfile.SpooledTemporaryFile(max_size=ZIP_BUFFER_MEMORY_SIZE) as zip_buffer, zipfile.ZipFile(self._fill_zip_buffer(zip_buffer=zip_buffer)) as zip_file:
+                for zip_info in zip_file.infolist():
+                    if self._is_member_count_exceeded(member_count=len(members)):
+                        return ArchiveListing(archive_format='zip', members=members, is_truncated=True)
+                    if zip_info.is_dir():
+                        continue
+                    # bit 0 of the general purpose flags marks an encrypted member
+                    is_encrypted = bool(zip_info.flag_bits & 0x1)
+                    hashes = None
+                    if not is_encrypted and self._may_hash_member(name=zip_info.filename, size=zip_info.file_size, compressed_size=zip_info.compress_size):
+                        with zip_file.open(zip_info) as member_file:
+                            hashes = compute_hashes(chunks=_iter_file_chunks(input_file=member_file))
+                    members.append(ArchiveMember(name=zip_info.filename, size=zip_info.file_size, compressed_size=zip_info.compress_size, is_encrypted=is_encrypted, hashes=hashes))
+        except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError, RuntimeError, EOFError, OSError, zlib.error) as e:
+            return ArchiveListing(archive_format='zip', members=members, error_message=str(e))
+        return ArchiveListing(archive_format='zip', members=members)
+
+    def _fill_zip_buffer(self, zip_buffer: IO[bytes]) -> IO[bytes]:
+        write_chunks_to_file(chunks=self._iter_content_chunks(), output_file=zip_buffer)
+        zip_buffer.seek(0)
+        return zip_buffer
+
+    def inspect_tar(self) -> ArchiveListing or None:
+        try:
+            # the stream mode reads the members in order without seeking, a compressed tar is decompressed while it is read
+            tar_file = tarfile.open(fileobj=self._open_stream(), mode='r|*')
+        except (tarfile.TarError, EOFError, OSError, zlib.error):
+            return None
+        members = list()
+        try:
+            with tar_file:
+                for tar_info in tar_file:
+                    if self._is_member_count_exceeded(member_count=len(members)):
+                        return ArchiveListing(archive_format='tar', members=members, is_truncated=True)
+                    # the compressed size of a member is unknown, so the expansion ratio is checked for the archive up to the member,
+                    # which also stops the listing of a compressed tar as the members are skipped by decompressing them
+                    if self._is_expansion_ratio_exceeded_by_tar(tar_info=tar_info):
+                        return ArchiveListing(archive_format='tar', members=members, is_truncated=True)
+                    if not tar_info.isfile():
+                        continue
+                    hashes = None
+                    if self._may_hash_member(name=tar_info.name, size=tar_info.size, compressed_size=None):
+                        hashes = compute_hashes(chunks=_iter_file_chunks(input_file=tar_file.extractfile(tar_info)))
+                    members.append(ArchiveMember(name=tar_info.name, size=tar_info.size, compressed_size=None, is_encrypted=False, hashes=hashes))
+        except (tarfile.TarError, EOFError, OSError, zlib.error) as e:
+            return ArchiveListing(archive_format='tar', members=members, error_message=str(e))
+        return ArchiveListing(archive_format='tar', members=members)
+
+    def _is_expansion_ratio_exceeded_by_tar(self, tar_info: tarfile.TarInfo) -> bool:
+        if self._budget is None or self._budget.limits.max_archive_expansion_ratio is None:
+            return False
+        return self._budget.is_expansion_ratio_exceeded(size=tar_info.offset_data + tar_info.size, compressed_size=self._get_content_size(), description=self._description)
+
+    def inspect_gzip(self) -> ArchiveListing:
+        # the header and the trailer are collected in one pass, the uncompressed size modulo 2^32 is stored in the last four bytes
+        header = bytearray()
+        trailer = b''
+        compressed_size = 0
+        for chunk in self._iter_content_chunks():
+            if len(header) < _GZIP_HEADER_SIZE:
+                header += chunk[:_GZIP_HEADER_SIZE - len(header)]
+            trailer = (trailer + bytes(chunk[-4:]))[-4:]
+            compressed_size += len(chunk)
+        size = struct.unpack('<I', trailer)[0] if compressed_size >= 18 else None
+        name = _get_gzip_member_name(header=bytes(header), filename=self._filename)
+        hashes = None
+        if self._may_hash_member(name=name, size=size, compressed_size=compressed_size):
+            try:
+                with gzip.GzipFile(fileobj=self._open_stream()) as gzip_file:
+                    hashes = compute_hashes(chunks=_iter_file_chunks(input_file=gzip_file, max_size=size))
+            except (EOFError, OSError, zlib.error) as e:
+                return ArchiveListing(archive_format='gzip', members=[ArchiveMember(name=name, size=size, compressed_size=compressed_size, is_encrypted=False)], error_message=str(e))
+        return ArchiveListing(archive_format='gzip', members=[ArchiveMember(name=name, size=size, compressed_size=compressed_size, is_encrypted=False, hashes=hashes)])
+
+
+def _get_gzip_member_name(header: bytes, filename: str or None) -> str:
+    """ returns the original filename from the gzip header, if it is missing the name of the attachment without '.gz' is used """
+    # the FNAME flag is set if a zero-terminated filename follows the ten header bytes, it is preceded by the extra field if FEXTRA is set
+    flags = header[3] if len(header) > 3 else 0
+    position = 10
+    if flags & 0x04 and len(header) >= 12:
+        position += 2 + struct.unpack('<H', header[10:12])[0]
+    if flags & 0x08:
+        end = header.find(b'\0', position)
+        if end != -1:
+            return header[position:end].decode('iso-8859-1')
+    if filename is None:
+        return ''
+    return filename[:-3] if filename.lower().endswith('.gz') else filename
+
+
+def _iter_file_chunks(input_file: IO[bytes], max_size: int or None = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """ reads the decompressed member in chunks, reading stops at max_size if the stream yields more than it declared """
+    read_bytes = 0
+    while max_size is None or read_bytes <= max_size:
+        chunk = input_file.read(chunk_size)
+        if not chunk:
+            return
+        read_bytes += len(chunk)
+        yield chunk
+    raise OSError('The archive member is larger than declared')
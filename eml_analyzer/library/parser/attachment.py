@@ -1,16 +1,131 @@
 import email.message
 import base64
+from typing import Iterator, BinaryIO
 
+from eml_analyzer.library.parser.archive_inspector import ARCHIVE_PREFIX_SIZE, ArchiveListing, get_archive_format, inspect_archive_chunks
+from eml_analyzer.library.parser.attachment_hashes import AttachmentHashes, compute_hashes
+from eml_analyzer.library.parser.payload_stream import DEFAULT_CHUNK_SIZE, iter_decoded_payload, iter_chunks, write_chunks_to_file
 from eml_analyzer.library.parser.printable_filename import get_printable_filename_if_existent
+from eml_analyzer.library.parser.resource_limits import ResourceBudget, ResourceLimitException
+from eml_analyzer.library.parser.result_cache import ResultCache, get_content_key
 
 
 class Attachment:
-    def __init__(self, message: email.message.Message, index: int):
+    # the attachments of many emails can be held in memory, so they have no instance dictionary
+    __slots__ = ('index', 'filename', 'content_type', 'content_disposition', '_message', '_content', '_content_is_decoded', '_budget', '_decoding_is_allowed', '_hashes', '_result_cache',
+                 '_is_archive', '_archive_listing', '_archive_listing_is_hashed')
+
+    def __init__(self, message: email.message.Message, index: int, budget: ResourceBudget or None = None, result_cache: ResultCache or None = None):
         self.index: int = index
         self.filename: str or None = get_printable_filename_if_existent(message=message)
         self.content_type: str = message.get_content_type()
         self.content_disposition: str = message.get_content_disposition()
-        self.content: bytes = message.get_payload(decode=True)
 
-    def get_content_base64_encoded(self) -> str:
-        return base64.b64encode(self.content).decode()
+        # the payload is only decoded if the content is accessed
+        self._message: email.message.Message = message
+        self._content: bytes or None = None
+        self._content_is_decoded: bool = False
+        # the content is not decoded if it exceeds the limits of the budget
+        self._budget: ResourceBudget or None = budget
+        self._decoding_is_allowed: bool or None = None
+        self._hashes: AttachmentHashes or None = None
+        # the hashes of attachments which were seen before are looked up by the hash of the encoded payload
+        self._result_cache: ResultCache or None = result_cache
+        # the archive is recognized by the beginning of the content, so other attachments are not decoded completely for it
+        self._is_archive: bool or None = None
+        self._archive_listing: ArchiveListing or None = None
+        self._archive_listing_is_hashed: bool = False
+
+    @property
+    def content(self) -> bytes or None:
+        """ the decoded payload, it is decoded on the first access and cached afterwards """
+        if not self._content_is_decoded:
+            self._content = self._message.get_payload(decode=True) if self._is_decoding_allowed() else None
+            self._content_is_decoded = True
+        return self._content
+
+    def _is_decoding_allowed(self) -> bool:
+        """ the decoded bytes are reserved once, even if the content is streamed multiple times """
+        if self._budget is None:
+            return True
+        if self._decoding_is_allowed is None:
+            encoded_size = self.encoded_size
+            self._decoding_is_allowed = self._budget.reserve_decoded_bytes(size=encoded_size if encoded_size is not None else 0, description='Attachment [{}] "{}"'.format(self.index, self.filename))
+        return self._decoding_is_allowed
+
+    def get_hashes(self) -> AttachmentHashes or None:
+        """ returns the MD5, SHA1, SHA256 and, if the ssdeep package is installed, the fuzzy hash of the decoded content
+
+        the hashes are computed in one pass over the decoded chunks, None is returned if the content may not be decoded
+        """
+        if self._hashes is None and self._is_decoding_allowed():
+            if self._result_cache is None:
+                self._hashes = compute_hashes(chunks=self.iter_content_chunks())
+            else:
+                self._hashes = self._get_hashes_from_result_cache()
+        return self._hashes
+
+    def _get_hashes_from_result_cache(self) -> AttachmentHashes:
+        payload = self._message.get_payload(decode=False)
+        # undecodable bytes of a binary parsed email are replaced in the payload, so different payloads could have the same key
+        if not isinstance(payload, (str, bytes)) or (isinstance(payload, str) and '\ufffd' in payload):
+            return compute_hashes(chunks=self.iter_content_chunks())
+        # the transfer encoding is part of the key, as the same payload decodes differently with another encoding
+        key = get_content_key(content=payload, variant=str(self._message.get('content-transfer-encoding', '')).strip().lower())
+        cached_hashes = self._result_cache.get(namespace='attachment_hashes', key=key)
+        if cached_hashes is not None:
+            return AttachmentHashes(**cached_hashes)
+        hashes = compute_hashes(chunks=self.iter_content_chunks())
+        self._result_cache.put(namespace='attachment_hashes', key=key, value=hashes._asdict())
+        return hashes
+
+    def get_archive_listing(self, hash_members: bool = False) -> ArchiveListing or None:
+        """ lists the members of a zip, tar or gzip attachment and hashes them if requested, without extracting them to disk
+
+        None is returned if the attachment is no archive or may not be decoded, the limits of the budget apply to the members,
+        the archive is read from the decoded chunks, so the content is not kept in memory after the listing
+        """
+        if self._is_archive is None:
+            self._is_archive = get_archive_format(prefix=self._get_content_prefix(size=ARCHIVE_PREFIX_SIZE)) is not None
+        if not self._is_archive:
+            return None
+        if self._archive_listing is None or (hash_members and not self._archive_listing_is_hashed):
+            self._archive_listing = inspect_archive_chunks(iter_content_chunks=self.iter_content_chunks, filename=self.filename,
+                                                           description='Attachment [{}] "{}"'.format(self.index, self.filename), hash_members=hash_members, budget=self._budget)
+            self._archive_listing_is_hashed = hash_members
+        return self._archive_listing
+
+    def _get_content_prefix(self, size: int) -> bytes:
+        """ only the first chunk is decoded if the content was not decoded before """
+        for chunk in self.iter_content_chunks():
+            return bytes(chunk[:size])
+        return b''
+
+    @property
+    def encoded_size(self) -> int or None:
+        """ the size of the payload as it is contained in the email (e.g. base64 encoded), no decoding is needed for it """
+        payload = self._message.get_payload(decode=False)
+        if isinstance(payload, (str, bytes)):
+            return len(payload)
+        return None
+
+    def iter_content_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """ yields the decoded payload in chunks, the payload is decoded incrementally if it was not decoded before """
+        if self._content_is_decoded:
+            if self._content is not None:
+                yield from iter_chunks(data=self._content, chunk_size=chunk_size)
+        elif self._is_decoding_allowed():
+            yield from iter_decoded_payload(message=self._message, chunk_size=chunk_size)
+
+    def write_content_to_file(self, output_file: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """ writes the decoded payload chunk by chunk to the file and returns the number of written bytes,
+            raises a ResourceLimitException if the payload may not be decoded, so no empty file is mistaken for the content """
+        if not self._is_decoding_allowed():
+            raise ResourceLimitException('Attachment [{}] "{}" exceeds the resource limits and was not decoded'.format(self.index, self.filename))
+        return write_chunks_to_file(chunks=self.iter_content_chunks(chunk_size=chunk_size), output_file=output_file)
+
+    def get_content_base64_encoded(self) -> str or None:
+        content = self.content
+        if content is None:
+            return None
+        return base64.b64encode(content).decode()
@@ -0,0 +1,38 @@
+import hashlib
+from typing import NamedTuple, Iterable
+
+try:
+    # the fuzzy hash is optional, it is only computed if the ssdeep package is installed
+    import ssdeep
+except ImportError:
+    ssdeep = None
+
+
+class AttachmentHashes(NamedTuple):
+    md5: str
+    sha1: str
+    sha256: str
+    # None if the ssdeep package is not installed
+    ssdeep: str or None = None
+
+    def to_dict(self) -> dict:
+        hashes = {'md5': self.md5, 'sha1': self.sha1, 'sha256': self.sha256}
+        if self.ssdeep is not None:
+            hashes['ssdeep'] = self.ssdeep
+        return hashes
+
+
+def compute_hashes(chunks: Iterable[bytes]) -> AttachmentHashes:
+    """ updates all digests with every chunk, so the content is read only once for all hash algorithms """
+    md5 = hashlib.md5()
+    sha1 = hashlib.sha1()
+    sha256 = hashlib.sha256()
+    fuzzy_hash = ssdeep.Hash() if ssdeep is not None else None
+    for chunk in chunks:
+        md5.update(chunk)
+        sha1.update(chunk)
+        sha256.update(chunk)
+        if fuzzy_hash is not None:
+            fuzzy_hash.update(bytes(chunk))
+    return AttachmentHashes(md5=md5.hexdigest(), sha1=sha1.hexdigest(), sha256=sha256.hexdigest(),
+                            ssdeep=fuzzy_hash.digest() if fuzzy_hash is not None else None)
@@ -0,0 +1,70 @@
+import codecs
+import functools
+from typing import NamedTuple, List
+
+
+# charsets which are tried in this order if the declared charset is missing or does not fit the payload
+FALLBACK_CHARSETS = ['utf-8', 'windows-1251', 'iso-8859-1', 'us-ascii', 'iso-8859-15']
+
+# the size of the prefix which is decoded to rule out a charset before the whole payload is decoded
+VALIDATION_PREFIX_SIZE = 64 * 1024
+
+
+class DecodedPayload(NamedTuple):
+    text: str
+    # the normalized name of the charset which was used for decoding, e.g. 'cp1251', None if the payload needed no decoding
+    charset: str or None
+    # the charset as it is declared in the Content-Type header
+    declared_charset: str or None
+    # True if the payload could not be decoded with the declared charset
+    is_fallback: bool
+
+
+@functools.lru_cache(maxsize=256)
+def normalize_charset(charset: str or None) -> str or None:
+    """ returns the canonical codec name of a charset (e.g. 'UTF8' -> 'utf-8') or None if Python does not know the charset """
+    if charset is None:
+        return None
+    charset = charset.strip().strip('"\'').lower()
+    try:
+        return codecs.lookup(charset).name
+    except LookupError:
+        return None
+
+
+def get_candidate_charsets(declared_charset: str or None) -> List[str]:
+    """ returns the normalized declared charset followed by the fallback charsets without duplicates """
+    candidate_charsets = list()
+    for charset in [declared_charset] + FALLBACK_CHARSETS:
+        normalized_charset = normalize_charset(charset)
+        if normalized_charset is not None and normalized_charset not in candidate_charsets:
+            candidate_charsets.append(normalized_charset)
+    return candidate_charsets
+
+
+def _prefix_is_decodable(payload: bytes, charset: str) -> bool:
+    """ decodes only the beginning of the payload, a multibyte character which is cut off at the end of the prefix is no error """
+    if len(payload) <= VALIDATION_PREFIX_SIZE:
+        return True
+    decoder = codecs.getincrementaldecoder(charset)()
+    try:
+        decoder.decode(payload[:VALIDATION_PREFIX_SIZE], final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def decode_payload(payload: bytes, declared_charset: str or None) -> DecodedPayload or None:
+    """ decodes the payload with the first candidate charset which fits, returns None if no charset fits """
+    normalized_declared_charset = normalize_charset(declared_charset)
+    for charset in get_candidate_charsets(declared_charset=declared_charset):
+        # a payload which is larger than the prefix is only decoded completely if its prefix is valid for the charset
+        if not _prefix_is_decodable(payload=payload, charset=charset):
+            continue
+        try:
+            text = payload.decode(charset)
+        except UnicodeDecodeError:
+            continue
+        is_fallback = declared_charset is not None and charset != normalized_declared_charset
+        return DecodedPayload(text=text, charset=charset, declared_charset=declared_charset, is_fallback=is_fallback)
+    return None
@@ -0,0 +1,124 @@
+import base64
+import binascii
+import codecs
+import email.header
+import email.message
+import functools
+import quopri
+import re
+from typing import List, Tuple, Dict, Iterator, Match
+
+from eml_analyzer.library.parser.resource_limits import ResourceBudget
+
+
+# charset, encoding (B or Q) and payload of a RFC 2047 encoded word, e.g. =?UTF-8?B?w6Q=?=
+_ENCODED_WORD_PATTERN = re.compile(r'=\?([^?\s]+)\?([bq])\?([^?]*)\?=', re.IGNORECASE)
+
+# the number of distinct encoded words which are kept decoded, mails of a mailbox often repeat the same words
+_ENCODED_WORD_CACHE_SIZE = 4096
+
+
+def decode_encoded_words(string: str) -> str:
+    """ decodes all RFC 2047 encoded words of a string in one left-to-right pass, undecodable words are kept as they are """
+    if '=?' not in string:
+        return string
+    return _ENCODED_WORD_PATTERN.sub(_replace_encoded_word, string)
+
+
+def _replace_encoded_word(match: Match) -> str:
+    decoded_word = _decode_encoded_word(charset=match.group(1), encoding=match.group(2).upper(), payload=match.group(3))
+    return match.group(0) if decoded_word is None else decoded_word
+
+
+@functools.lru_cache(maxsize=_ENCODED_WORD_CACHE_SIZE)
+def _decode_encoded_word(charset: str, encoding: str, payload: str) -> str or None:
+    # RFC 2231 allows a language to be appended to the charset, e.g. UTF-8*en
+    charset = charset.split('*', 1)[0]
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        return None
+
+    try:
+        if encoding == 'B':
+            # missing padding is tolerated as many mailers do not add it
+            decoded_bytes = base64.b64decode(payload + '=' * (-len(payload) % 4))
+        else:
+            decoded_bytes = quopri.decodestring(payload)
+    except (binascii.Error, ValueError):
+        return None
+    return decoded_bytes.decode(charset, errors='replace')
+
+
+def decode_header_value(value: str or email.header.Header) -> str:
+    """ returns the value of a header as string with all encoded words decoded """
+    return decode_encoded_words(string=_get_header_value_as_string(value=value))
+
+
+def _get_header_value_as_string(value: str or email.header.Header) -> str:
+    """ header values which contain raw non-ASCII bytes are returned by the email package as Header objects """
+    if not isinstance(value, email.header.Header):
+        return value
+    decoded_parts = list()
+    for part, charset in email.header.decode_header(value):
+        if isinstance(part, str):
+            decoded_parts.append(part)
+        elif charset is None or charset == 'unknown-8bit':
+            # raw bytes in headers are UTF-8 according to RFC 6532, older mailers mostly used latin-1
+            try:
+                decoded_parts.append(part.decode('utf-8'))
+            except UnicodeDecodeError:
+                decoded_parts.append(part.decode('iso-8859-1'))
+        else:
+            decoded_parts.append(part.decode(charset, errors='replace'))
+    return ''.join(decoded_parts)
+
+
+class HeaderView:
+    """ the headers of an email in their original order with a case-insensitive lookup of the values by name """
+    def __init__(self, headers: List[Tuple[str, str]]):
+        self._headers: List[Tuple[str, str]] = headers
+        self._values_by_name: Dict[str, List[str]] = dict()
+        for name, value in headers:
+            self._values_by_name.setdefault(name.lower(), list()).append(value)
+
+    @staticmethod
+    def from_message(message: email.message.Message, budget: ResourceBudget or None = None) -> 'HeaderView':
+        """ indexes the raw header values of a single MIME part, encoded words are not decoded """
+        headers = message.items()
+        if budget is not None:
+            headers = budget.limit_headers(headers=headers)
+        return HeaderView(headers=[(str(name), str(value)) for name, value in headers])
+
+    def get(self, name: str, default: str or None = None) -> str or None:
+        """ returns the first value of the header with the given name """
+        values = self._values_by_name.get(name.lower())
+        if values is None:
+            return default
+        return values[0]
+
+    def get_all(self, name: str) -> List[str]:
+        """ returns all values of the header with the given name in their original order """
+        return list(self._values_by_name.get(name.lower(), list()))
+
+    def get_names(self) -> List[str]:
+        """ returns the lower-case names of all headers """
+        return list(self._values_by_name.keys())
+
+    def items(self) -> List[Tuple[str, str]]:
+        return list(self._headers)
+
+    def __getitem__(self, name: str) -> str:
+        values = self._values_by_name.get(name.lower())
+        if values is None:
+            raise KeyError(name)
+        return values[0]
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self._values_by_name
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return iter(self._headers)
+
+    def __len__(self) -> int:
+        return len(self._headers)
@@ -0,0 +1,59 @@
+import contextlib
+import time
+from typing import NamedTuple, Dict, Callable, Iterator
+
+
+class StageTiming(NamedTuple):
+    calls: int
+    seconds: float
+    processed_bytes: int
+
+    def to_dict(self) -> dict:
+        return {'calls': self.calls, 'seconds': self.seconds, 'bytes': self.processed_bytes}
+
+
+class Instrumentation:
+    """ records the wall time, the processed bytes and the number of calls per processing stage of an email
+
+    stages can be nested (e.g. the URL extraction decodes the HTML part), so the time of a stage includes its nested stages
+    """
+    def __init__(self, callback: Callable[[str, float, int], None] or None = None):
+        # the callback is called with the stage, the seconds and the processed bytes after every measurement
+        self._callback = callback
+        self._timings: Dict[str, StageTiming] = dict()
+
+    @property
+    def is_enabled(self) -> bool:
+        return True
+
+    @contextlib.contextmanager
+    def measure(self, stage: str, processed_bytes: int = 0) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage=stage, seconds=time.perf_counter() - start, processed_bytes=processed_bytes)
+
+    def record(self, stage: str, seconds: float, processed_bytes: int = 0) -> None:
+        timing = self._timings.get(stage, StageTiming(calls=0, seconds=0.0, processed_bytes=0))
+        self._timings[stage] = StageTiming(calls=timing.calls + 1, seconds=timing.seconds + seconds, processed_bytes=timing.processed_bytes + processed_bytes)
+        if self._callback is not None:
+            self._callback(stage, seconds, processed_bytes)
+
+    def get_timings(self) -> Dict[str, StageTiming]:
+        """ returns the accumulated timings per stage in the order in which the stages were first finished """
+        return dict(self._timings)
+
+
+class NullInstrumentation(Instrumentation):
+    """ used if no instrumentation is requested, nothing is measured or recorded """
+    @property
+    def is_enabled(self) -> bool:
+        return False
+
+    @contextlib.contextmanager
+    def measure(self, stage: str, processed_bytes: int = 0) -> Iterator[None]:
+        yield
+
+    def record(self, stage: str, seconds: float, processed_bytes: int = 0) -> None:
+        pass
@@ -0,0 +1,49 @@
+import mailbox
+import os
+from typing import Iterator, NamedTuple
+
+from eml_analyzer.library.parser.parsed_email import ParsedEmail
+
+
+class MailboxMessage(NamedTuple):
+    # the path of the mailbox and the key of the message within the mailbox, separated by '#'
+    source: str
+    eml_content: bytes
+
+
+def is_maildir(path: str) -> bool:
+    return all(os.path.isdir(os.path.join(path, sub_directory)) for sub_directory in ['cur', 'new', 'tmp'])
+
+
+def is_mbox(path: str) -> bool:
+    """ mbox files start with a 'From ' line which separates the messages """
+    try:
+        with open(path, mode='rb') as input_file:
+            return input_file.read(5) == b'From '
+    except OSError:
+        return False
+
+
+def iter_mailbox_messages(path: str) -> Iterator[MailboxMessage]:
+    """ yields the raw messages of a mbox file or a Maildir directory one at a time """
+    if os.path.isdir(path):
+        opened_mailbox = mailbox.Maildir(path, factory=None, create=False)
+        keys = sorted(opened_mailbox.iterkeys())
+    else:
+        # the mbox is scanned once for the message boundaries, the messages themselves are read on demand
+        opened_mailbox = mailbox.mbox(path, factory=None, create=False)
+        keys = opened_mailbox.iterkeys()
+    try:
+        for key in keys:
+            yield MailboxMessage(source='{}#{}'.format(path, key), eml_content=opened_mailbox.get_bytes(key))
+    finally:
+        opened_mailbox.close()
+
+
+def iter_parsed_emails(path: str) -> Iterator[ParsedEmail]:
+    """ yields the emails of a mbox file, a Maildir directory or a single EML file, only one message is held in memory at a time """
+    if is_maildir(path=path) or is_mbox(path=path):
+        for mailbox_message in iter_mailbox_messages(path=path):
+            yield ParsedEmail(eml_content=mailbox_message.eml_content)
+    else:
+        yield ParsedEmail.from_file(path=path)
@@ -1,14 +1,21 @@
-import re
+import io
+import os
 import email
 import email.message
-import urllib.parse
-import html
 import warnings
-from typing import NamedTuple, List, Tuple, Set
+from typing import NamedTuple, List, Tuple, Set, Dict, Callable, Iterator
 
 from eml_analyzer.library.parser.attachment import Attachment
-from eml_analyzer.library.parser.printable_filename import decode_ASCII_encoded_string
+from eml_analyzer.library.parser.charset_resolver import DecodedPayload, decode_payload
+from eml_analyzer.library.parser.instrumentation import Instrumentation, NullInstrumentation
+from eml_analyzer.library.parser.part_index import PartIndex, IndexedPart
+from eml_analyzer.library.parser.printable_filename import get_printable_filename
+from eml_analyzer.library.parser.resource_limits import ResourceLimits, ResourceBudget
+from eml_analyzer.library.parser.result_cache import ResultCache, get_content_key
+from eml_analyzer.library.parser.header_decoder import HeaderView, decode_header_value
 from eml_analyzer.library.parser.structure_item import StructureItem
+from eml_analyzer.library.parser.url_extractor import FoundUrl, HtmlUrlScan, scan_html, get_urls_from_text, get_clickable_urls_from_html, get_clickable_urls_from_html_scan
+from eml_analyzer.library.parser.view_cache import ViewCache, CacheStatistics
 
 
 class EmlParsingException(Exception):
@@ -19,140 +26,309 @@ class PayloadDecodingException(Exception):
     pass
 
 
-class FoundUrl(NamedTuple):
-    url: str
-    original: str
+# attachments with these extensions are parsed as embedded emails even if their content type is not message/rfc822
+EMBEDDED_EMAIL_EXTENSIONS = ('.eml',)
 
 
-class ParsedEmail:
-    def __init__(self, eml_content: str):
-        self._parsed_email = ParsedEmail._parse_email(eml_content=eml_content)
+class EmbeddedEmail(NamedTuple):
+    # the position of the part which contains the email in the part index of the enclosing email
+    part_position: int
+    filename: str or None
+    parsed_email: 'ParsedEmail'
 
-        self._html_was_analyzed: bool = False
-        self._html_content: str or None = None
 
+class ParsedEmail:
+    def __init__(self, eml_content: str or bytes or bytearray or memoryview or io.BufferedIOBase, instrumentation: Instrumentation or None = None,
+                 limits: ResourceLimits or None = None, result_cache: ResultCache or None = None):
+        """ the EML can be passed as string, as raw bytes or as file object which was opened in binary mode,
+            an instrumentation can be passed to record the time spent in the processing stages,
+            the limits bound the resources spent on the email, exceeded limits lead to partial results and a warning,
+            with a result cache the results of HTML parts and attachments which were analyzed before are reused """
         # an list containing error messages which occurred during parsing
         self._error_messages: List[str] = list()
+        budget = ResourceBudget(limits=limits if limits is not None else ResourceLimits(), report=self._add_error_messages)
+        self._initialize(eml_content=eml_content, instrumentation=instrumentation, budget=budget, result_cache=result_cache, depth_offset=0)
+
+    @classmethod
+    def _from_enclosing_email(cls, eml_content: email.message.Message or bytes, enclosing_email: 'ParsedEmail', depth_offset: int) -> 'ParsedEmail':
+        """ creates an embedded email, the limits apply to the outermost email as a whole, so the budget is shared instead of starting a new one """
+        embedded_email = cls.__new__(cls)
+        embedded_email._error_messages = list()
+        embedded_email._initialize(eml_content=eml_content, instrumentation=enclosing_email._instrumentation, budget=enclosing_email._budget,
+                                   result_cache=enclosing_email._result_cache, depth_offset=depth_offset)
+        return embedded_email
+
+    def _initialize(self, eml_content: str or bytes or bytearray or memoryview or io.BufferedIOBase or email.message.Message, instrumentation: Instrumentation or None,
+                    budget: ResourceBudget, result_cache: ResultCache or None, depth_offset: int) -> None:
+        self._budget: ResourceBudget = budget
+        self._instrumentation: Instrumentation = instrumentation if instrumentation is not None else NullInstrumentation()
+        self._result_cache: ResultCache or None = result_cache
+        # the depth of the root part within the outermost email
+        self._depth_offset: int = depth_offset
+
+        eml_content, input_size = self._limit_input_size(eml_content=eml_content)
+        with self._instrumentation.measure(stage='parse', processed_bytes=input_size):
+            self._parsed_email = ParsedEmail._parse_email(eml_content=eml_content)
+
+        # the views derived from the parsed email (e.g. the decoded HTML) are computed only once
+        self._view_cache: ViewCache = ViewCache()
+
+    @staticmethod
+    def from_file(path: str, instrumentation: Instrumentation or None = None, limits: ResourceLimits or None = None, result_cache: ResultCache or None = None) -> 'ParsedEmail':
+        """ parses the EML file in binary mode, so the content is read only once and no charset is assumed before parsing """
+        with open(path, mode='rb') as input_file:
+            return ParsedEmail(eml_content=input_file, instrumentation=instrumentation, limits=limits, result_cache=result_cache)
+
+    def _limit_input_size(self, eml_content: str or bytes or bytearray or memoryview or io.BufferedIOBase) -> Tuple[str or bytes or bytearray or memoryview or io.BufferedIOBase, int]:
+        """ rejects emails above the input size limit before they are parsed and returns the content with its size """
+        input_size = ParsedEmail._get_size_of_eml_content(eml_content=eml_content)
+        max_input_bytes = self._budget.limits.max_input_bytes
+        if max_input_bytes is not None and input_size == 0 and hasattr(eml_content, 'read'):
+            # the size of e.g. a pipe is unknown, so at most one byte more than the limit is read
+            eml_content = eml_content.read(max_input_bytes + 1)
+            input_size = len(eml_content)
+        if self._budget.is_input_size_exceeded(size=input_size):
+            raise EmlParsingException('The email exceeds the limit of {} bytes'.format(max_input_bytes))
+        return eml_content, input_size
+
+    @staticmethod
+    def _get_size_of_eml_content(eml_content: str or bytes or bytearray or memoryview or io.BufferedIOBase) -> int:
+        if isinstance(eml_content, (str, bytes, bytearray)):
+            return len(eml_content)
+        elif isinstance(eml_content, memoryview):
+            return eml_content.nbytes
+        try:
+            return os.fstat(eml_content.fileno()).st_size
+        except (AttributeError, OSError, ValueError):
+            # e.g. pipes or in-memory streams without a file descriptor
+            return 0
 
     @staticmethod
-    def _parse_email(eml_content: str) -> email.message.Message:
+    def _parse_email(eml_content: str or bytes or bytearray or memoryview or io.BufferedIOBase) -> email.message.Message:
         try:
-            return email.message_from_string(eml_content)
+            if isinstance(eml_content, str):
+                return email.message_from_string(eml_content)
+            elif isinstance(eml_content, email.message.Message):
+                # e.g. the payload of a message/rfc822 part, which was already parsed as part of the enclosing email
+                return eml_content
+            elif isinstance(eml_content, (bytes, bytearray, memoryview)):
+                # the parser reads the buffer in chunks, which prevents a full-size string copy of the raw bytes
+                return email.message_from_binary_file(io.BytesIO(eml_content))
+            elif hasattr(eml_content, 'read'):
+                return email.message_from_binary_file(eml_content)
         except Exception as e:
             raise EmlParsingException(e)
+        raise EmlParsingException('EML content of type "{}" is not supported'.format(type(eml_content).__name__))
 
     def get_error_messages(self) -> List[str]:
         return self._error_messages
 
     def _add_error_messages(self, error_message: str) -> None:
-        self._error_messages.append(error_message)
+        if error_message not in self._error_messages:
+            self._error_messages.append(error_message)
+
+    def invalidate(self, view: str or None = None) -> None:
+        """ discards the cached view with the given name (e.g. 'html') or all cached views, so they are computed again on the next access
+
+        the views which were derived from the view are discarded as well, e.g. the attachments and the structure with 'part_index',
+        the payloads which were decoded for the view are decoded again, together with the other views which contain them
+        """
+        if view is None:
+            self._view_cache.invalidate()
+            return
+        decoded_payloads = [key for key in self._view_cache.get_dependencies(key=view) if key.startswith('payload_')]
+        self._view_cache.invalidate(key=view)
+        for key in decoded_payloads:
+            self._view_cache.invalidate(key=key)
+
+    def get_cache_statistics(self) -> Dict[str, CacheStatistics]:
+        """ returns the number of cache hits and misses per view """
+        return self._view_cache.get_statistics()
+
+    def get_instrumentation(self) -> Instrumentation:
+        """ returns the instrumentation which records the time spent per processing stage """
+        return self._instrumentation
 
     def get_header(self) -> List[Tuple[str, any]]:
         """ returns list of key-value pairs of header entries """
-        return [(key, decode_ASCII_encoded_string(value)) for key, value in self._parsed_email.items()]
+        return list(self._view_cache.get_or_compute(key='header', compute=self._get_decoded_header))
+
+    def get_header_view(self) -> HeaderView:
+        """ returns the decoded headers with a case-insensitive lookup by name, e.g. get_header_view().get_all('received') """
+        return self._view_cache.get_or_compute(key='header_view', compute=lambda: HeaderView(headers=self.get_header()))
+
+    def _get_decoded_header(self) -> List[Tuple[str, any]]:
+        with self._instrumentation.measure(stage='header_decoding'):
+            decoded_header = list()
+            for key, value in self._budget.limit_headers(headers=self._parsed_email.items()):
+                if self._budget.is_time_exceeded():
+                    break
+                decoded_header.append((key, decode_header_value(value=value)))
+            return decoded_header
+
+    def get_part_index(self) -> PartIndex:
+        """ returns the index of all MIME parts, the MIME tree is traversed only once for all accessors """
+        return self._view_cache.get_or_compute(key='part_index', compute=self._create_part_index)
+
+    def _create_part_index(self) -> PartIndex:
+        with self._instrumentation.measure(stage='part_index'):
+            return PartIndex(message=self._parsed_email, budget=self._budget, depth_offset=self._depth_offset)
 
     def get_structure(self) -> StructureItem:
-        return StructureItem(message=self._parsed_email)
+        return self._view_cache.get_or_compute(key='structure', compute=self._create_structure)
+
+    def _create_structure(self) -> StructureItem:
+        part_index = self.get_part_index()
+        with self._instrumentation.measure(stage='structure'):
+            return StructureItem.from_part_index(part_index=part_index)
 
     def get_text_content(self) -> str or None:
-        return self._get_decoded_payload_with_first_matching_type(content_type='text/plain')
+        return self._view_cache.get_or_compute(key='text', compute=lambda: self._get_decoded_payload_with_first_matching_type(content_type='text/plain'))
 
     def get_html_content(self) -> str or None:
-        # check if the html was already extracted in the past to prevent double work
-        if not self._html_was_analyzed:
-            self._html_content = self._get_decoded_payload_with_first_matching_type(content_type='text/html')
-        return self._html_content
+        return self._view_cache.get_or_compute(key='html', compute=lambda: self._get_decoded_payload_with_first_matching_type(content_type='text/html'))
+
+    def iter_text_contents(self) -> Iterator[str]:
+        """ yields the decoded payloads of all text/plain parts in their order, a part is only decoded when it is reached,
+            like get_text_content() this includes parts which are attachments, e.g. an attached .txt file """
+        return self._iter_decoded_payloads_with_matching_type(content_type='text/plain')
+
+    def iter_html_contents(self) -> Iterator[str]:
+        """ yields the decoded payloads of all text/html parts in their order, a part is only decoded when it is reached,
+            like get_html_content() this includes parts which are attachments, as attached HTML files are common in phishing """
+        return self._iter_decoded_payloads_with_matching_type(content_type='text/html')
+
+    def _iter_decoded_payloads_with_matching_type(self, content_type: str) -> Iterator[str]:
+        # the parts are looked up in the part index, so the MIME tree is not walked again
+        for indexed_part in self.get_part_index().get_parts_with_content_type(content_type=content_type):
+            decoded_payload = self._get_decoded_payload_of_part(indexed_part=indexed_part)
+            if decoded_payload is not None:
+                yield decoded_payload
 
     def _get_decoded_payload_with_first_matching_type(self, content_type: str) -> str or None:
-        first_matched_payload = ParsedEmail._get_first_email_payload_with_matching_type(message=self._parsed_email, content_type=content_type)
-        if first_matched_payload is not None:
-            try:
-                return ParsedEmail._get_decoded_payload_from_message(message=first_matched_payload)
-            except PayloadDecodingException:
-                self._add_error_messages(error_message='Payload with the type "{}" could not be decoded'.format(content_type))
+        first_matched_part = self.get_part_index().get_first_part_with_content_type(content_type=content_type)
+        if first_matched_part is not None:
+            return self._get_decoded_payload_of_part(indexed_part=first_matched_part)
         return None
 
+    def _get_decoded_payload_of_part(self, indexed_part: IndexedPart) -> str or None:
+        """ every part is decoded at most once, no matter if it is accessed as first part or while iterating over all parts """
+        # the part is taken from the part index, so the payload has to be decoded again if the part index is invalidated
+        return self._view_cache.get_or_compute(key='payload_{}'.format(indexed_part.position), compute=lambda: self._decode_payload_of_part(indexed_part=indexed_part),
+                                               dependencies=['part_index'])
+
+    def _decode_payload_of_part(self, indexed_part: IndexedPart) -> str or None:
+        content_type = indexed_part.content_type
+        # the size of the encoded payload is an upper bound of the decoded size
+        if not self._budget.reserve_decoded_bytes(size=len(indexed_part.message.get_payload()), description='Payload with the type "{}"'.format(content_type)):
+            return None
+        try:
+            with self._instrumentation.measure(stage='payload_decoding', processed_bytes=len(indexed_part.message.get_payload())):
+                decoded_payload = ParsedEmail._decode_payload_from_message(message=indexed_part.message, headers=indexed_part.headers)
+        except PayloadDecodingException:
+            self._add_error_messages(error_message='Payload with the type "{}" could not be decoded'.format(content_type))
+            return None
+        if decoded_payload.is_fallback:
+            self._add_error_messages(error_message='Payload with the type "{}" could not be decoded with the declared charset "{}", the charset "{}" was used instead'.format(
+                content_type, decoded_payload.declared_charset, decoded_payload.charset))
+        return decoded_payload.text
+
     @staticmethod
-    def _get_first_email_payload_with_matching_type(message: email.message.Message, content_type: str) -> email.message.Message or None:
-        if message.get_content_type() == content_type:
-            return message
-
-        child_payloads = message.get_payload()
-        if type(child_payloads) is list:
-            for child_payload in child_payloads:
-                found_payload = ParsedEmail._get_first_email_payload_with_matching_type(message=child_payload, content_type=content_type)
-                if found_payload is not None:
-                    return found_payload
-        return None
+    def _get_decoded_payload_from_message(message: email.message.Message, headers: HeaderView or None = None) -> None or str:
+        """ the headers of the part can be passed if they are already indexed, otherwise they are indexed here """
+        return ParsedEmail._decode_payload_from_message(message=message, headers=headers).text
 
     @staticmethod
-    def _get_decoded_payload_from_message(message: email.message.Message) -> None or str:
-        transfer_encoding = ParsedEmail._header_lookup_first_element(message=message, key='content-transfer-encoding')
+    def _decode_payload_from_message(message: email.message.Message, headers: HeaderView or None = None) -> DecodedPayload:
+        if headers is None:
+            headers = HeaderView.from_message(message=message)
+        transfer_encoding = ParsedEmail._header_lookup_first_element(headers=headers, key='content-transfer-encoding')
         if transfer_encoding in {'7bit', '8bit', 'binary'}:
-            return message.get_payload(decode=False)
+            return DecodedPayload(text=message.get_payload(decode=False), charset=None, declared_charset=message.get_content_charset(), is_fallback=False)
 
         payload_in_bytes = message.get_payload(decode=True)
-
-        list_of_possible_encodings = ParsedEmail._create_list_of_possible_encodings(message=message)
-
-        for encoding_format in list_of_possible_encodings:
-            try:
-                return payload_in_bytes.decode(encoding_format)
-            except ValueError:
-                continue
-        raise PayloadDecodingException('Payload could not be decoded')
-
-    @staticmethod
-    def _create_list_of_possible_encodings(message: email.message.Message) -> list:
-        """ creates a list of the most possible encodings of a payload """
-        list_of_possible_encodings = list()
-
-        header_values = ParsedEmail._header_lookup(message=message, key='content-type')
-
-        # at first add the encodings mentioned in the object header
-        for v in header_values:
-            entries = v.split(';')
-            for entry in entries:
-                entry = entry.strip()
-                if entry.startswith('charset='):
-                    encoding = entry.replace('charset=', '').replace('"', '')
-                    list_of_possible_encodings.append(encoding)
-
-        for x in ['utf-8', 'windows-1251', 'iso-8859-1', 'us-ascii', 'iso-8859-15']:
-            if x not in list_of_possible_encodings:
-                list_of_possible_encodings.append(x)
-        return list_of_possible_encodings
+        decoded_payload = decode_payload(payload=payload_in_bytes, declared_charset=message.get_content_charset())
+        if decoded_payload is None:
+            raise PayloadDecodingException('Payload could not be decoded')
+        return decoded_payload
 
     @staticmethod
-    def _payload_needs_decoding(message: email.message.Message) -> bool:
-        transfer_encoding = ParsedEmail._header_lookup_first_element(message=message, key='content-transfer-encoding')
+    def _payload_needs_decoding(headers: HeaderView) -> bool:
+        transfer_encoding = ParsedEmail._header_lookup_first_element(headers=headers, key='content-transfer-encoding')
         if transfer_encoding is None:
             return True
         return transfer_encoding not in {'7bit', '8bit', 'binary'}
 
     @staticmethod
-    def _header_lookup_first_element(message: email.message.Message, key: str) -> str or None:
-        for header_key, value in message.items():
-            if str(header_key).lower() == key:
-                return str(value).lower()
-        return None
-
-    @staticmethod
-    def _header_lookup(message: email.message.Message, key: str) -> [str]:
-        values = list()
-        for header_key, value in message.items():
-            if str(header_key).lower() == key:
-                values.append(str(value).lower())
-        return values
+    def _header_lookup_first_element(headers: HeaderView, key: str) -> str or None:
+        value = headers.get(key)
+        if value is None:
+            return None
+        return value.lower()
 
     def get_attachments(self) -> List[Attachment]:
-        return_list = list()
-        counter = 0
-        for child in self._parsed_email.walk():
-            if child.get_filename() is not None:
-                counter += 1
-                return_list.append(Attachment(message=child, index=counter))
-        return return_list
+        return list(self._view_cache.get_or_compute(key='attachments', compute=self._create_attachments))
+
+    def _create_attachments(self) -> List[Attachment]:
+        parts_with_filename = self.get_part_index().get_parts_with_filename()
+        with self._instrumentation.measure(stage='attachments'):
+            return [Attachment(message=indexed_part.message, index=counter, budget=self._budget, result_cache=self._result_cache) for counter, indexed_part in enumerate(parts_with_filename, start=1)]
+
+    def get_embedded_emails(self) -> List[EmbeddedEmail]:
+        """ returns the emails which are attached to this email as message/rfc822 parts or as .eml files, they are parsed only once
+
+        the embedded emails share the resource budget, the instrumentation and the result cache of this email, emails which are
+        embedded into the embedded emails are returned by their get_embedded_emails()
+        """
+        return list(self._view_cache.get_or_compute(key='embedded_emails', compute=self._find_embedded_emails))
+
+    def _find_embedded_emails(self) -> List[EmbeddedEmail]:
+        part_index = self.get_part_index()
+        attachments_by_position = dict(zip([indexed_part.position for indexed_part in part_index.get_parts_with_filename()], self.get_attachments()))
+        embedded_emails = list()
+        for indexed_part in part_index.get_parts():
+            if ParsedEmail._is_inside_of_embedded_email(part_index=part_index, indexed_part=indexed_part):
+                # those are found by the embedded email itself
+                continue
+            if indexed_part.content_type == 'message/rfc822':
+                payload = indexed_part.message.get_payload()
+                if not isinstance(payload, list) or len(payload) == 0:
+                    continue
+                if not indexed_part.child_positions:
+                    # the embedded email was not indexed as part of this email, as it exceeded the depth or the part limit
+                    continue
+                eml_content = payload[0]
+            elif indexed_part.filename is not None and indexed_part.filename.lower().endswith(EMBEDDED_EMAIL_EXTENSIONS):
+                # the parts of an attached file are parsed anew, so they are only indexed if the part limit is not reached yet
+                if self._budget.is_part_count_exceeded():
+                    continue
+                # the decoded content of the attachment is reused if it was already accessed
+                eml_content = attachments_by_position[indexed_part.position].content
+                if eml_content is None:
+                    continue
+            else:
+                continue
+
+            depth_offset = self._depth_offset + indexed_part.depth + 1
+            if self._budget.is_depth_exceeded(depth=depth_offset) or self._budget.is_time_exceeded():
+                continue
+            try:
+                embedded_email = ParsedEmail._from_enclosing_email(eml_content=eml_content, enclosing_email=self, depth_offset=depth_offset)
+            except EmlParsingException:
+                self._add_error_messages(error_message='The embedded email "{}" could not be parsed'.format(indexed_part.filename))
+                continue
+            embedded_emails.append(EmbeddedEmail(part_position=indexed_part.position, filename=get_printable_filename(filename=indexed_part.filename), parsed_email=embedded_email))
+        return embedded_emails
+
+    @staticmethod
+    def _is_inside_of_embedded_email(part_index: PartIndex, indexed_part: IndexedPart) -> bool:
+        parent_position = indexed_part.parent_position
+        while parent_position is not None:
+            parent = part_index.get_part(position=parent_position)
+            if parent.content_type == 'message/rfc822':
+                return True
+            parent_position = parent.parent_position
+        return False
 
     def get_embedded_urls_from_html_and_text(self) -> List[str]:
         warnings.warn(
@@ -162,89 +338,82 @@ class ParsedEmail:
         return self.get_embedded_clickable_urls_from_html_and_text()
 
     def get_embedded_clickable_urls_from_html_and_text(self) -> List[str]:
+        return list(self._view_cache.get_or_compute(key='urls', compute=self._find_embedded_clickable_urls_in_html_and_text))
+
+    def _find_embedded_clickable_urls_in_html_and_text(self) -> List[str]:
         found_urls = set()
-        html_data: str or None = self.get_html_content()
-        if html_data is not None:
-            found_urls.update(ParsedEmail._get_embedded_clickable_urls_from_html(html_data=html_data))
-        text: str or None = self.get_text_content()
-        if text is not None:
-            found_urls.update(ParsedEmail._get_embedded_urls_from_text(text=text))
+        for urls_of_html_part in self._get_results_of_html_parts(namespace='html_clickable_urls', compute=self._find_embedded_clickable_urls_in_html_scan):
+            found_urls.update(urls_of_html_part)
+        for text in ParsedEmail._iter_distinct(contents=self.iter_text_contents()):
+            with self._instrumentation.measure(stage='url_extraction', processed_bytes=len(text)):
+                found_urls.update(get_urls_from_text(text=text))
         return list(found_urls)
 
-    @staticmethod
-    def _get_embedded_clickable_urls_from_html(html_data: str) -> Set[str]:
-        # find urls which are referenced in html links
-        found_urls_in_html_links = ParsedEmail._get_embedded_clickable_urls_from_html_links(html_data=html_data)
-        found_urls_in_html_text = ParsedEmail._get_embedded_clickable_urls_from_html_text(html_data=html_data, found_urls=found_urls_in_html_links)
-
-        found_urls = found_urls_in_html_text
-        found_url: FoundUrl
-        for found_url in found_urls_in_html_links:
-            found_urls.add(found_url.url)
-        return found_urls
+    def _find_embedded_clickable_urls_in_html_scan(self, html_scan: HtmlUrlScan) -> List[str]:
+        with self._instrumentation.measure(stage='url_extraction', processed_bytes=len(html_scan.remaining_html)):
+            return sorted(get_clickable_urls_from_html_scan(html_scan=html_scan))
 
     @staticmethod
-    def _get_embedded_clickable_urls_from_html_links(html_data: str) -> [FoundUrl]:
-        """ extracts URLs from HTML links """
-        found_urls = list()
-        for pattern_template in [r' href="(.+?)"', r" href='(.+?)'", r" originalsrc='(.+?)'", r' originalsrc="(.+?)"']:
-            pattern = re.compile(pattern_template, re.IGNORECASE)
-            for match in re.finditer(pattern, html_data):
-                extracted_url = match.group(1)
-                decoded_url = html.unescape(extracted_url)
-                decoded_url = urllib.parse.unquote(decoded_url)
-                found_url = FoundUrl(decoded_url, extracted_url)
-                found_urls.append(found_url)
-        return found_urls
+    def _iter_distinct(contents: Iterator[str]) -> Iterator[str]:
+        """ skips parts with the same content as an earlier part, e.g. the same HTML body in several parts of a multipart/mixed email """
+        seen_contents = set()
+        for content in contents:
+            if content not in seen_contents:
+                seen_contents.add(content)
+                yield content
+
+    def _get_distinct_html_contents(self) -> List[str]:
+        return self._view_cache.get_or_compute(key='distinct_html', compute=lambda: list(ParsedEmail._iter_distinct(contents=self.iter_html_contents())))
+
+    def _get_results_of_html_parts(self, namespace: str, compute: Callable[[HtmlUrlScan], List[str]]) -> List[List[str]]:
+        """ returns a result per distinct HTML part, with a result cache the result of a part is looked up by the hash of its HTML,
+            so emails which share an HTML part share its result and the HTML is only scanned if a result is missing """
+        if self._result_cache is None:
+            return [compute(html_scan) for html_scan in self._get_html_url_scans()]
+        html_content_keys = self._view_cache.get_or_compute(key='html_content_keys', compute=lambda: [
+            get_content_key(content=html_data) for html_data in self._get_distinct_html_contents()])
+        results = list()
+        for number, key in enumerate(html_content_keys):
+            result = self._result_cache.get(namespace=namespace, key=key)
+            if result is None:
+                result = compute(self._get_html_url_scans()[number])
+                self._result_cache.put(namespace=namespace, key=key, value=result)
+            results.append(result)
+        return results
+
+    def _get_html_url_scans(self) -> List[HtmlUrlScan]:
+        """ every distinct HTML part is scanned once for links and reloaded content """
+        return self._view_cache.get_or_compute(key='html_url_scan', compute=self._scan_html_contents)
+
+    def _scan_html_contents(self) -> List[HtmlUrlScan]:
+        html_scans = list()
+        for html_data in self._get_distinct_html_contents():
+            with self._instrumentation.measure(stage='html_scan', processed_bytes=len(html_data)):
+                html_scans.append(scan_html(html_data=html_data))
+        return html_scans
 
     @staticmethod
-    def _get_embedded_clickable_urls_from_html_text(html_data: str, found_urls: [FoundUrl]) -> Set[str]:
-        """ extracts URLs from HTML to capture also URLs which are embedded into the text rendered by the HTML payload """
-        # remove at first the reloaded content from the html to prevent that URL from reloaded content are added to the embedded clickable URLs
-        html_data = ParsedEmail._get_new_html_without_reloaded_content(html_data=html_data)
-        # then remove the already found URLs
-        found_url: FoundUrl
-        for found_url in found_urls:
-            html_data = html_data.replace(found_url.original, '')
+    def _get_embedded_clickable_urls_from_html(html_data: str) -> Set[str]:
+        return get_clickable_urls_from_html(html_data=html_data)
 
-        return ParsedEmail._get_embedded_urls_from_text(text=html_data)
+    @staticmethod
+    def _get_embedded_clickable_urls_from_html_links(html_data: str) -> List[FoundUrl]:
+        """ extracts URLs from HTML links """
+        return scan_html(html_data=html_data).clickable_urls
 
     @staticmethod
     def _get_embedded_urls_from_text(text: str) -> Set[str]:
-        found_urls = set()
-        pattern = re.compile(r'(http|https|ftp|ftps)\:\/\/[a-zA-Z0-9\-\.]+\.[a-zA-Z]{2,3}(\/\S*)?', re.IGNORECASE)
-        for match in re.finditer(pattern, text):
-            found_urls.add(match.group(0))
-        return found_urls
+        return get_urls_from_text(text=text)
 
     def get_reloaded_content_from_html(self) -> List[str]:
-        html_data: str or None = self.get_html_content()
-        if html_data is not None:
-            return ParsedEmail._get_reloaded_content_from_html(html_data=html_data)
-        return list()
-
-    @staticmethod
-    def _get_reloaded_content_from_html(html_data: str) -> List[str]:
-        sources = list()
-        for pattern_template in ParsedEmail._get_patterns_for_reloaded_content():
-            pattern = re.compile(pattern_template, re.IGNORECASE)
-            for match in re.finditer(pattern, html_data):
-                extracted_url = match.group(1)
-                # embedded items which are attached to the email as attachment are referred to with a staring 'cid:', so these will be ignored
-                if not extracted_url.startswith('cid:') and not extracted_url.startswith('data:'):
-                    # decode URL
-                    decoded_url: str = urllib.parse.unquote(extracted_url)
-                    sources.append(decoded_url)
-        return sources
+        return list(self._view_cache.get_or_compute(key='reloaded_content', compute=self._find_reloaded_content_in_html))
 
-    @staticmethod
-    def _get_new_html_without_reloaded_content(html_data: str) -> str:
-        for pattern_template in ParsedEmail._get_patterns_for_reloaded_content():
-            pattern = re.compile(pattern_template, re.IGNORECASE)
-            for match in re.finditer(pattern, html_data):
-                html_data = html_data.replace(match.group(0), '')
-        return html_data
+    def _find_reloaded_content_in_html(self) -> List[str]:
+        reloaded_content = list()
+        for reloaded_content_of_html_part in self._get_results_of_html_parts(namespace='html_reloaded_content', compute=lambda html_scan: html_scan.reloaded_content):
+            reloaded_content.extend(reloaded_content_of_html_part)
+        return reloaded_content
 
     @staticmethod
-    def _get_patterns_for_reloaded_content() -> List[str]:
-        return [r' src="(.+?)"', r" src='(.+?)'", r' background="(.+?)"', r" background='(.+?)'"]
+    def _get_reloaded_content_from_html(html_data: str) -> List[str]:
+        return scan_html(html_data=html_data).reloaded_content
@@ -0,0 +1,131 @@
+import email.message
+from typing import NamedTuple, List, Dict, Tuple
+
+from eml_analyzer.library.parser.header_decoder import HeaderView
+from eml_analyzer.library.parser.resource_limits import ResourceBudget
+
+
+class IndexedPart(NamedTuple):
+    message: email.message.Message
+    # position of the part in the order of email.message.Message.walk()
+    position: int
+    # positions of the part among its siblings on the way from the root part, the root part has an empty path
+    path: Tuple[int, ...]
+    depth: int
+    parent_position: int or None
+    child_positions: List[int]
+    content_type: str
+    content_disposition: str or None
+    filename: str or None
+    content_id: str or None
+    # the raw headers of the part with a case-insensitive lookup, e.g. headers.get_all('received')
+    headers: HeaderView
+
+
+class PartIndex:
+    """ indexes all MIME parts of an email in a single traversal, so that all lookups afterwards do not walk the tree again
+
+    if a budget is given, parts which exceed its depth or part count limit are not indexed, the depth offset is the depth of the
+    message within the email it is embedded in, the part count is kept by the budget, so it is shared with the enclosing email
+    """
+    def __init__(self, message: email.message.Message, budget: ResourceBudget or None = None, depth_offset: int = 0):
+        self._budget: ResourceBudget or None = budget
+        self._depth_offset: int = depth_offset
+        self._parts: List[IndexedPart] = list()
+        self._parts_by_content_type: Dict[str, List[IndexedPart]] = dict()
+        self._parts_by_disposition: Dict[str, List[IndexedPart]] = dict()
+        self._parts_by_filename: Dict[str, List[IndexedPart]] = dict()
+        self._parts_by_content_id: Dict[str, IndexedPart] = dict()
+        self._parts_with_filename: List[IndexedPart] = list()
+        self._index_parts(root_message=message)
+
+    def _index_parts(self, root_message: email.message.Message) -> None:
+        # the tree is traversed iteratively in the same (depth-first) order as email.message.Message.walk()
+        stack: List[Tuple[email.message.Message, int or None, Tuple[int, ...]]] = [(root_message, None, tuple())]
+        while stack:
+            message, parent_position, path = stack.pop()
+            if self._budget is not None:
+                is_part_reserved = self._budget.reserve_part(part=message)
+                # the root part is always indexed, so that there is a structure to report
+                if self._parts and (not is_part_reserved or self._budget.is_time_exceeded()):
+                    break
+            indexed_part = PartIndex._create_indexed_part(message=message, position=len(self._parts), parent_position=parent_position, path=path, budget=self._budget)
+            self._add_part(indexed_part=indexed_part)
+
+            if message.is_multipart():
+                children = message.get_payload()
+                if children and self._budget is not None and self._budget.is_depth_exceeded(depth=self._depth_offset + len(path) + 1):
+                    continue
+                for child_number in range(len(children) - 1, -1, -1):
+                    stack.append((children[child_number], indexed_part.position, path + (child_number,)))
+
+    @staticmethod
+    def _create_indexed_part(message: email.message.Message, position: int, parent_position: int or None, path: Tuple[int, ...], budget: ResourceBudget or None = None) -> IndexedPart:
+        headers = HeaderView.from_message(message=message, budget=budget)
+        content_id = headers.get('content-id')
+        if content_id is not None:
+            content_id = str(content_id).strip().strip('<>')
+        return IndexedPart(
+            message=message,
+            position=position,
+            path=path,
+            depth=len(path),
+            parent_position=parent_position,
+            child_positions=list(),
+            content_type=message.get_content_type(),
+            content_disposition=message.get_content_disposition(),
+            filename=message.get_filename(),
+            content_id=content_id,
+            headers=headers,
+        )
+
+    def _add_part(self, indexed_part: IndexedPart) -> None:
+        self._parts.append(indexed_part)
+        if indexed_part.parent_position is not None:
+            self._parts[indexed_part.parent_position].child_positions.append(indexed_part.position)
+
+        self._parts_by_content_type.setdefault(indexed_part.content_type, list()).append(indexed_part)
+        if indexed_part.content_disposition is not None:
+            self._parts_by_disposition.setdefault(indexed_part.content_disposition, list()).append(indexed_part)
+        if indexed_part.filename is not None:
+            self._parts_with_filename.append(indexed_part)
+            self._parts_by_filename.setdefault(indexed_part.filename, list()).append(indexed_part)
+        if indexed_part.content_id is not None and indexed_part.content_id not in self._parts_by_content_id:
+            self._parts_by_content_id[indexed_part.content_id] = indexed_part
+
+    def get_root(self) -> IndexedPart:
+        return self._parts[0]
+
+    def get_parts(self) -> List[IndexedPart]:
+        """ returns all parts in the order of email.message.Message.walk() """
+        return list(self._parts)
+
+    def get_part(self, position: int) -> IndexedPart:
+        return self._parts[position]
+
+    def get_children(self, indexed_part: IndexedPart) -> List[IndexedPart]:
+        return [self._parts[position] for position in indexed_part.child_positions]
+
+    def get_parts_with_content_type(self, content_type: str) -> List[IndexedPart]:
+        return list(self._parts_by_content_type.get(content_type.lower(), list()))
+
+    def get_first_part_with_content_type(self, content_type: str) -> IndexedPart or None:
+        parts = self._parts_by_content_type.get(content_type.lower())
+        if parts:
+            return parts[0]
+        return None
+
+    def get_parts_with_disposition(self, content_disposition: str) -> List[IndexedPart]:
+        return list(self._parts_by_disposition.get(content_disposition.lower(), list()))
+
+    def get_parts_with_filename(self, filename: str or None = None) -> List[IndexedPart]:
+        """ returns the parts with the given filename or all parts which have a filename if no filename is given """
+        if filename is None:
+            return list(self._parts_with_filename)
+        return list(self._parts_by_filename.get(filename, list()))
+
+    def get_part_with_content_id(self, content_id: str) -> IndexedPart or None:
+        return self._parts_by_content_id.get(content_id.strip().strip('<>'))
+
+    def __len__(self) -> int:
+        return len(self._parts)
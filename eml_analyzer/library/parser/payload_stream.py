@@ -0,0 +1,119 @@
+import binascii
+import email.message
+import io
+import quopri
+import re
+from typing import Iterator, BinaryIO
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# the email package joins the lines of a base64 payload before decoding it, so only line breaks are removed while streaming
+_BASE64_LINE_BREAKS = b'\r\n'
+# a payload which only consists of the base64 alphabet, line breaks and a final padding is decoded in chunks, others are left to the
+# email package, which tolerates invalid characters and internal padding in its own way
+_STREAMABLE_BASE64 = re.compile(r'[A-Za-z0-9+/\r\n]*(=[\r\n]*){0,2}')
+# get_payload(decode=False) replaces the undecodable bytes of a binary parsed email with this character, those payloads are left
+# to get_payload(decode=True), which decodes the original bytes
+_REPLACEMENT_CHARACTER = '\ufffd'
+
+
+def iter_decoded_payload(message: email.message.Message, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """ decodes the payload of a MIME part in chunks, so the decoded payload never needs to be held in memory as a whole """
+    payload = message.get_payload(decode=False)
+    transfer_encoding = str(message.get('content-transfer-encoding', '')).strip().lower()
+    if isinstance(payload, str) and transfer_encoding == 'base64' and _is_streamable_base64(payload=payload):
+        yield from _iter_decoded_base64(payload=payload, chunk_size=chunk_size)
+    elif isinstance(payload, str) and transfer_encoding == 'quoted-printable' and _REPLACEMENT_CHARACTER not in payload:
+        yield from _iter_decoded_quoted_printable(payload=payload, chunk_size=chunk_size)
+    else:
+        # other encodings are rare for large payloads, they and payloads which can not be streamed exactly are decoded by the email package
+        decoded_payload = message.get_payload(decode=True)
+        if decoded_payload is not None:
+            yield from iter_chunks(data=decoded_payload, chunk_size=chunk_size)
+
+
+def iter_chunks(data: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """ yields zero-copy slices of already decoded data """
+    view = memoryview(data)
+    for position in range(0, len(view), chunk_size):
+        yield view[position:position + chunk_size]
+
+
+def _is_streamable_base64(payload: str) -> bool:
+    """ True if decoding the payload in chunks gives the same result as email.message.Message.get_payload(decode=True) """
+    if _STREAMABLE_BASE64.fullmatch(payload) is None:
+        return False
+    length = len(payload) - payload.count('\r') - payload.count('\n')
+    if '=' in payload:
+        return length % 4 == 0
+    # a missing padding is tolerated like in the email package, a single remaining character can not be decoded
+    return length % 4 != 1
+
+
+def _iter_decoded_base64(payload: str, chunk_size: int) -> Iterator[bytes]:
+    # four base64 characters are decoded to three bytes
+    encoded_chunk_size = (chunk_size // 3 + 1) * 4
+    remainder = b''
+    for position in range(0, len(payload), encoded_chunk_size):
+        encoded_chunk = remainder + payload[position:position + encoded_chunk_size].encode('ascii').translate(None, _BASE64_LINE_BREAKS)
+        # only complete groups of four characters can be decoded, the rest is decoded with the next chunk
+        complete_length = len(encoded_chunk) - len(encoded_chunk) % 4
+        remainder = encoded_chunk[complete_length:]
+        if complete_length > 0:
+            yield binascii.a2b_base64(encoded_chunk[:complete_length])
+    if remainder:
+        yield binascii.a2b_base64(remainder + b'=' * (-len(remainder) % 4))
+
+
+def _iter_decoded_quoted_printable(payload: str, chunk_size: int) -> Iterator[bytes]:
+    position = 0
+    while position < len(payload):
+        # chunks end at line breaks, so that soft line breaks and escape sequences are never split
+        end = payload.find('\n', position + chunk_size)
+        end = len(payload) if end == -1 else end + 1
+        yield quopri.decodestring(_encode_payload_chunk(chunk=payload[position:end]))
+        position = end
+
+
+def _encode_payload_chunk(chunk: str) -> bytes:
+    """ converts the payload to bytes like email.message.Message.get_payload(decode=True) """
+    try:
+        return chunk.encode('ascii')
+    except UnicodeError:
+        # e.g. an email which was passed as string, raw-unicode-escape encodes ASCII characters like the ascii codec
+        return chunk.encode('raw-unicode-escape')
+
+
+def open_chunk_stream(chunks: Iterator[bytes]) -> BinaryIO:
+    """ returns a read-only file which is not seekable and reads the chunks one after another, only one chunk is held in memory """
+    return io.BufferedReader(_ChunkReader(chunks=chunks))
+
+
+class _ChunkReader(io.RawIOBase):
+    def __init__(self, chunks: Iterator[bytes]):
+        super().__init__()
+        self._chunks: Iterator[bytes] = chunks
+        self._chunk: memoryview = memoryview(b'')
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._chunk:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._chunk = memoryview(chunk).cast('B')
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+
+def write_chunks_to_file(chunks: Iterator[bytes], output_file: BinaryIO) -> int:
+    """ writes the chunks to the file and returns the number of written bytes """
+    written_bytes = 0
+    for chunk in chunks:
+        output_file.write(chunk)
+        written_bytes += len(chunk)
+    return written_bytes
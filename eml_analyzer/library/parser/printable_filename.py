@@ -1,12 +1,13 @@
-import base64
-import binascii
-import re
 import email.message
-import quopri
+
+from eml_analyzer.library.parser.header_decoder import decode_encoded_words
 
 
 def get_printable_filename_if_existent(message: email.message.Message) -> str or None:
-    filename = message.get_filename()
+    return get_printable_filename(filename=message.get_filename())
+
+
+def get_printable_filename(filename: str or None) -> str or None:
     if filename is None:
         return None
     return _make_string_printable(original_string=filename)
@@ -26,31 +27,4 @@ def _make_string_printable(original_string: str) -> str:
 
 
 def decode_ASCII_encoded_string(string: str) -> str:
-    string = _decode_ASCII_encoded_string_baseX(string=string)
-    string = _decode_ASCII_encoded_string_quoted_printable_string(string=string)
-    return string
-
-
-def _decode_ASCII_encoded_string_baseX(string: str) -> str:
-    """ decodes ASCII strings which are encoded like: name := "=?UTF-8?B?" + base64_encode(string) + "?=" """
-    pattern = re.compile(r'=\?(.+?)\?B\?(.+?)\?=', re.IGNORECASE)
-    for match in list(re.finditer(pattern=pattern, string=string)):
-        try:
-            string = string.replace(match.group(0), base64.b64decode(match.group(2)).decode(match.group(1)))
-        except binascii.Error:
-            pass
-    return string
-
-
-def _decode_ASCII_encoded_string_quoted_printable_string(string: str) -> str:
-    pattern = re.compile(r'=\?(.+?)\?Q\?(.+?)\?=', re.IGNORECASE)
-    for match in list(re.finditer(pattern=pattern, string=string)):
-        try:
-            encoding = match.group(1)
-            encoded_string = match.group(2)
-            decoded_string = quopri.decodestring(encoded_string)
-            replacement = decoded_string.decode(encoding)
-            string = string.replace(match.group(0), replacement)
-        except binascii.Error:
-            pass
-    return string
+    return decode_encoded_words(string=string)
@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import NamedTuple, Callable, List, Tuple, Set
+
+
+class ResourceLimitException(Exception):
+    """ raised if content is requested which was not processed as it exceeds a limit """
+    pass
+
+
+class ResourceLimits(NamedTuple):
+    """ bounds the resources which are spent on a single email, None disables a limit """
+    # the parser builds the whole MIME tree in memory before the other limits apply, so larger emails are not parsed at all
+    max_input_bytes: int or None = 200 * 1024 * 1024
+    # MIME parts which are nested deeper are not analyzed
+    max_depth: int or None = 100
+    max_parts: int or None = 10000
+    # the limits of the decoded bytes apply to the text, the HTML and the attachments
+    max_decoded_bytes_per_part: int or None = 100 * 1024 * 1024
+    max_decoded_bytes_total: int or None = 500 * 1024 * 1024
+    # applies to the header block of every MIME part
+    max_headers: int or None = 10000
+    max_header_bytes: int or None = 1024 * 1024
+    # applies to the archives which are attached, the ratio is the uncompressed size of a member divided by its compressed size
+    max_archive_members: int or None = 10000
+    max_archive_expansion_ratio: float or None = 200.0
+    # wall-clock budget of the analysis, starting with the parsing
+    max_seconds: float or None = None
+
+    @staticmethod
+    def unlimited() -> 'ResourceLimits':
+        return ResourceLimits(max_input_bytes=None, max_depth=None, max_parts=None, max_decoded_bytes_per_part=None, max_decoded_bytes_total=None,
+                              max_headers=None, max_header_bytes=None, max_archive_members=None, max_archive_expansion_ratio=None, max_seconds=None)
+
+
+class ResourceBudget:
+    """ keeps track of the resources which were spent on an email, exceeded limits are reported once with the given function """
+    def __init__(self, limits: ResourceLimits, report: Callable[[str], None] or None = None):
+        self.limits: ResourceLimits = limits
+        self._report: Callable[[str], None] or None = report
+        self._start: float = time.monotonic()
+        # the attachments of an email can be extracted by several threads which share the budget
+        self._lock: threading.RLock = threading.RLock()
+        self._decoded_bytes: int = 0
+        # the parts of embedded emails are indexed by the enclosing email and by the embedded email, but are counted once
+        self._counted_part_ids: Set[int] = set()
+        self._violations: List[str] = list()
+
+    def _add_violation(self, message: str) -> None:
+        with self._lock:
+            if message in self._violations:
+                return
+            self._violations.append(message)
+            if self._report is not None:
+                self._report(message)
+
+    def get_violations(self) -> List[str]:
+        return list(self._violations)
+
+    def is_time_exceeded(self) -> bool:
+        if self.limits.max_seconds is None or time.monotonic() - self._start <= self.limits.max_seconds:
+            return False
+        self._add_violation('The analysis exceeded the time budget of {} seconds, the results are incomplete'.format(self.limits.max_seconds))
+        return True
+
+    def is_input_size_exceeded(self, size: int) -> bool:
+        if self.limits.max_input_bytes is None or size <= self.limits.max_input_bytes:
+            return False
+        self._add_violation('The email exceeds the limit of {} bytes and was not parsed'.format(self.limits.max_input_bytes))
+        return True
+
+    def is_depth_exceeded(self, depth: int) -> bool:
+        if self.limits.max_depth is None or depth <= self.limits.max_depth:
+            return False
+        self._add_violation('MIME parts nested deeper than {} levels were skipped'.format(self.limits.max_depth))
+        return True
+
+    def is_part_count_exceeded(self) -> bool:
+        if self.limits.max_parts is None or len(self._counted_part_ids) < self.limits.max_parts:
+            return False
+        self._add_violation('The email has more than {} MIME parts, the remaining parts were skipped'.format(self.limits.max_parts))
+        return True
+
+    def reserve_part(self, part: object) -> bool:
+        """ returns False if indexing the MIME part would exceed the part limit, the part is counted otherwise
+
+        the count is shared by the outermost email and all emails embedded into it, a part which was counted before is not counted again
+        """
+        if self.limits.max_parts is None:
+            return True
+        with self._lock:
+            if id(part) in self._counted_part_ids:
+                return True
+            if self.is_part_count_exceeded():
+                return False
+            self._counted_part_ids.add(id(part))
+        return True
+
+    def reserve_decoded_bytes(self, size: int, description: str) -> bool:
+        """ returns False if decoding the given number of bytes would exceed a limit, the bytes are counted otherwise
+
+        the size of the encoded payload can be used as size, as base64 and quoted-printable never decode to more bytes
+        """
+        if self.is_time_exceeded():
+            return False
+        if self.limits.max_decoded_bytes_per_part is not None and size > self.limits.max_decoded_bytes_per_part:
+            self._add_violation('{} exceeds the limit of {} bytes per part and was not decoded'.format(description, self.limits.max_decoded_bytes_per_part))
+            return False
+        # the check and the update of the total are one step, so concurrent reservations can not exceed the limit together
+        with self._lock:
+            if self.limits.max_decoded_bytes_total is not None and self._decoded_bytes + size > self.limits.max_decoded_bytes_total:
+                self._add_violation('{} was not decoded as the limit of {} decoded bytes per email was reached'.format(description, self.limits.max_decoded_bytes_total))
+                return False
+            self._decoded_bytes += size
+        return True
+
+    def is_archive_member_count_exceeded(self, member_count: int, description: str) -> bool:
+        if self.limits.max_archive_members is None or member_count < self.limits.max_archive_members:
+            return False
+        self._add_violation('{} has more than {} members, the remaining members were skipped'.format(description, self.limits.max_archive_members))
+        return True
+
+    def is_expansion_ratio_exceeded(self, size: int, compressed_size: int, description: str) -> bool:
+        """ a high ratio of the uncompressed to the compressed size is typical for decompression bombs """
+        if self.limits.max_archive_expansion_ratio is None or size <= compressed_size * self.limits.max_archive_expansion_ratio:
+            return False
+        self._add_violation('{} exceeds the expansion ratio of {} and was not decompressed'.format(description, self.limits.max_archive_expansion_ratio))
+        return True
+
+    def limit_headers(self, headers: List[Tuple[str, any]]) -> List[Tuple[str, any]]:
+        """ returns the headers up to the limits of the number of headers and of the header bytes """
+        if self.limits.max_headers is not None and len(headers) > self.limits.max_headers:
+            self._add_violation('The header block has more than {} headers, the remaining headers were skipped'.format(self.limits.max_headers))
+            headers = headers[:self.limits.max_headers]
+        if self.limits.max_header_bytes is None:
+            return headers
+
+        header_bytes = 0
+        for position, (name, value) in enumerate(headers):
+            header_bytes += len(name) + len(str(value))
+            if header_bytes > self.limits.max_header_bytes:
+                self._add_violation('The header block exceeds {} bytes, the remaining headers were skipped'.format(self.limits.max_header_bytes))
+                return headers[:position]
+        return headers
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+
+# the version is part of every key, so results of an older format are never returned after an update
+CACHE_FORMAT_VERSION = 1
+
+DEFAULT_MAX_SIZE_BYTES = 256 * 1024 * 1024
+
+# the number of writes after which the access time of an entry is refreshed when it is read
+DEFAULT_ACCESS_REFRESH_INTERVAL = 1000
+
+DATABASE_FILENAME = 'eml_analyzer_cache.sqlite3'
+
+
+def get_content_key(content: str or bytes, variant: str = '') -> str:
+    """ returns the SHA256 of the content, the variant distinguishes results which are derived from the same content differently """
+    if isinstance(content, str):
+        # lone surrogates can be contained in strings which were decoded with errors='surrogateescape'
+        content = content.encode('utf-8', errors='surrogatepass')
+    content_hash = hashlib.sha256(content)
+    content_hash.update('\0{}\0{}'.format(CACHE_FORMAT_VERSION, variant).encode('utf-8'))
+    return content_hash.hexdigest()
+
+
+class ResultCache:
+    """ a persistent cache of analysis results in a SQLite database, shared by all processes which use the same directory
+
+    the values are stored as JSON per namespace (e.g. 'message' or 'attachment_hashes') and key, if the cache exceeds its
+    maximum size the least recently used entries are evicted, a lookup only takes the write lock to refresh the access time of
+    an entry if it was last refreshed more than access_refresh_interval writes ago, so the order of the evictions is approximate
+    """
+    def __init__(self, directory: str, max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES, access_refresh_interval: int = DEFAULT_ACCESS_REFRESH_INTERVAL):
+        os.makedirs(directory, exist_ok=True)
+        self.max_size_bytes: int = max_size_bytes
+        self.access_refresh_interval: int = access_refresh_interval
+        # the timeout covers the time other processes hold the write lock
+        self._connection: sqlite3.Connection = sqlite3.connect(os.path.join(directory, DATABASE_FILENAME), timeout=30, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        with self._transaction():
+            self._create_tables()
+
+    def _create_tables(self) -> None:
+        self._connection.execute('CREATE TABLE IF NOT EXISTS entries (namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, '
+                                 'size INTEGER NOT NULL, last_access INTEGER NOT NULL, PRIMARY KEY (namespace, key))')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS entries_by_last_access ON entries (last_access)')
+        # the total size is maintained by triggers, so it does not need to be summed up on every write
+        self._connection.execute('CREATE TABLE IF NOT EXISTS total_size (size INTEGER NOT NULL)')
+        self._connection.execute('INSERT INTO total_size (size) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM total_size)')
+        self._connection.execute('CREATE TRIGGER IF NOT EXISTS entries_inserted AFTER INSERT ON entries BEGIN UPDATE total_size SET size = size + NEW.size; END')
+        self._connection.execute('CREATE TRIGGER IF NOT EXISTS entries_deleted AFTER DELETE ON entries BEGIN UPDATE total_size SET size = size - OLD.size; END')
+
+    def _transaction(self) -> 'sqlite3.Connection':
+        # with the isolation level None, the connection is only a transaction context if the transaction is started explicitly
+        self._connection.execute('BEGIN IMMEDIATE')
+        return self._connection
+
+    def _get_next_access(self) -> int:
+        """ a logical clock instead of the wall-clock time, so the order of accesses is exact for all processes """
+        return self._connection.execute('SELECT COALESCE(MAX(last_access), 0) + 1 FROM entries').fetchone()[0]
+
+    def get(self, namespace: str, key: str) -> any or None:
+        """ returns the cached value or None if there is no value for the key """
+        # a single statement without an explicit transaction is a read transaction, which runs concurrently to the writers in WAL mode
+        row = self._connection.execute('SELECT value, last_access, (SELECT MAX(last_access) FROM entries) FROM entries WHERE namespace = ? AND key = ?',
+                                       (namespace, key)).fetchone()
+        if row is None:
+            return None
+        value, last_access, latest_access = row
+        if latest_access - last_access >= self.access_refresh_interval:
+            with self._transaction():
+                self._connection.execute('UPDATE entries SET last_access = ? WHERE namespace = ? AND key = ?', (self._get_next_access(), namespace, key))
+        return json.loads(value)
+
+    def put(self, namespace: str, key: str, value: any) -> None:
+        """ stores a value which can be serialized as JSON, values which are larger than the whole cache are not stored """
+        serialized_value = json.dumps(value, separators=(',', ':'))
+        size = len(key) + len(serialized_value)
+        if size > self.max_size_bytes:
+            return
+        with self._transaction():
+            self._connection.execute('DELETE FROM entries WHERE namespace = ? AND key = ?', (namespace, key))
+            self._connection.execute('INSERT INTO entries (namespace, key, value, size, last_access) VALUES (?, ?, ?, ?, ?)',
+                                     (namespace, key, serialized_value, size, self._get_next_access()))
+            self._evict_least_recently_used_entries()
+
+    def _evict_least_recently_used_entries(self) -> None:
+        while self.get_size() > self.max_size_bytes:
+            self._connection.execute('DELETE FROM entries WHERE rowid = (SELECT rowid FROM entries ORDER BY last_access LIMIT 1)')
+
+    def get_size(self) -> int:
+        """ returns the size of all cached keys and values in bytes """
+        return self._connection.execute('SELECT size FROM total_size').fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def close(self) -> None:
+        self._connection.close()
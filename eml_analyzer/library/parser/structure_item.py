@@ -1,14 +1,43 @@
 import email
-from eml_analyzer.library.parser.printable_filename import get_printable_filename_if_existent
+from eml_analyzer.library.parser.part_index import PartIndex
+from eml_analyzer.library.parser.printable_filename import get_printable_filename_if_existent, get_printable_filename
 
 
 class StructureItem:
+    # the structures of many emails can be held in memory, so the items have no instance dictionary
+    __slots__ = ('content_type', 'filename', 'content_disposition', 'child_items')
+
     def __init__(self, message: email.message.Message):
-        self.content_type = message.get_content_type()
+        self._set_attributes_of_message(message=message)
+
+        # the tree is built iteratively, so deeply nested emails do not exceed the recursion limit
+        stack = [(self, message)]
+        while stack:
+            structure_item, current_message = stack.pop()
+            if current_message.is_multipart():
+                for child in current_message.get_payload():
+                    child_item = StructureItem.__new__(StructureItem)
+                    child_item._set_attributes_of_message(message=child)
+                    structure_item.child_items.append(child_item)
+                    stack.append((child_item, child))
+
+    def _set_attributes_of_message(self, message: email.message.Message) -> None:
+        self.content_type: str = message.get_content_type()
         self.filename: str or None = get_printable_filename_if_existent(message=message)
         self.content_disposition: str or None = message.get_content_disposition()
+        self.child_items: list = list()
 
-        self.child_items = list()
-        if message.is_multipart():
-            for child in message.get_payload():
-                self.child_items.append(StructureItem(message=child))
+    @staticmethod
+    def from_part_index(part_index: PartIndex) -> 'StructureItem':
+        """ creates the structure from the indexed parts, so the MIME tree does not need to be traversed again """
+        structure_items = list()
+        for indexed_part in part_index.get_parts():
+            structure_item = StructureItem.__new__(StructureItem)
+            structure_item.content_type = indexed_part.content_type
+            structure_item.filename = get_printable_filename(filename=indexed_part.filename)
+            structure_item.content_disposition = indexed_part.content_disposition
+            structure_item.child_items = list()
+            structure_items.append(structure_item)
+            if indexed_part.parent_position is not None:
+                structure_items[indexed_part.parent_position].child_items.append(structure_item)
+        return structure_items[0]
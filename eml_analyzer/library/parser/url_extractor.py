@@ -0,0 +1,100 @@
+import bisect
+import html
+import os
+import re
+import urllib.parse
+from typing import NamedTuple, List, Set
+
+
+class FoundUrl(NamedTuple):
+    url: str
+    original: str
+
+
+class HtmlUrlScan(NamedTuple):
+    # URLs of HTML links (href and originalsrc attributes)
+    clickable_urls: List[FoundUrl]
+    # URLs of content which is reloaded from external resources when the HTML is rendered (src and background attributes)
+    reloaded_content: List[str]
+    # the HTML without the link and reloaded content attributes, used to find URLs in the text rendered by the HTML
+    remaining_html: str
+
+
+# all URL attributes are found in a single scan, the name of the attribute decides which kind of URL it is
+_HTML_URL_ATTRIBUTE_PATTERN = re.compile(r""" (href|originalsrc|src|background)=(?:"(.+?)"|'(.+?)')""", re.IGNORECASE)
+_LINK_ATTRIBUTES = {'href', 'originalsrc'}
+
+_TEXT_URL_PATTERN = re.compile(r'(http|https|ftp|ftps)\:\/\/[a-zA-Z0-9\-\.]+\.[a-zA-Z]{2,3}(\/\S*)?', re.IGNORECASE)
+
+
+def scan_html(html_data: str) -> HtmlUrlScan:
+    """ finds the URLs of links and of reloaded content in one pass and removes the matched attributes by their offsets """
+    clickable_urls = list()
+    reloaded_content = list()
+    remaining_parts = list()
+    last_end = 0
+    for match in _HTML_URL_ATTRIBUTE_PATTERN.finditer(html_data):
+        attribute = match.group(1).lower()
+        extracted_url = match.group(2) if match.group(2) is not None else match.group(3)
+        if attribute in _LINK_ATTRIBUTES:
+            decoded_url = urllib.parse.unquote(html.unescape(extracted_url))
+            clickable_urls.append(FoundUrl(decoded_url, extracted_url))
+        # embedded items which are attached to the email as attachment are referred to with a staring 'cid:', so these will be ignored
+        elif not extracted_url.startswith('cid:') and not extracted_url.startswith('data:'):
+            reloaded_content.append(urllib.parse.unquote(extracted_url))
+        remaining_parts.append(html_data[last_end:match.start()])
+        last_end = match.end()
+    remaining_parts.append(html_data[last_end:])
+    return HtmlUrlScan(clickable_urls=clickable_urls, reloaded_content=reloaded_content, remaining_html=''.join(remaining_parts))
+
+
+def get_urls_from_text(text: str) -> Set[str]:
+    return {match.group(0) for match in _TEXT_URL_PATTERN.finditer(text)}
+
+
+def get_clickable_urls_from_html(html_data: str) -> Set[str]:
+    return get_clickable_urls_from_html_scan(html_scan=scan_html(html_data=html_data))
+
+
+def get_clickable_urls_from_html_scan(html_scan: HtmlUrlScan) -> Set[str]:
+    """ returns the URLs of the HTML links and the URLs which are embedded into the text rendered by the HTML """
+    found_urls = _get_urls_from_text_without_found_urls(text=html_scan.remaining_html, found_urls=html_scan.clickable_urls)
+    found_urls.update(found_url.url for found_url in html_scan.clickable_urls)
+    return found_urls
+
+
+def _get_urls_from_text_without_found_urls(text: str, found_urls: List[FoundUrl]) -> Set[str]:
+    """ finds URLs in the text but skips occurrences of already found link URLs, e.g. the text of <a href="https://x.y">https://x.y</a> """
+    # only originals which look like a URL in a text can hide a URL, so all other originals are ignored
+    sorted_originals = sorted({found_url.original for found_url in found_urls if _TEXT_URL_PATTERN.match(found_url.original)})
+
+    urls_in_text = set()
+    position = 0
+    while True:
+        match = _TEXT_URL_PATTERN.search(text, position)
+        if match is None:
+            break
+        matched_url = match.group(0)
+        found_original = _get_longest_original_at_start(url=matched_url, sorted_originals=sorted_originals)
+        if found_original is None:
+            urls_in_text.add(matched_url)
+            position = match.end()
+        else:
+            # the rest of the match is searched again as it can contain another URL
+            position = match.start() + len(found_original)
+    return urls_in_text
+
+
+def _get_longest_original_at_start(url: str, sorted_originals: List[str]) -> str or None:
+    """ binary search for the longest original which is a prefix of the URL """
+    search_key = url
+    while search_key:
+        position = bisect.bisect_right(sorted_originals, search_key) - 1
+        if position < 0:
+            return None
+        candidate = sorted_originals[position]
+        if url.startswith(candidate):
+            return candidate
+        # a longer prefix of the URL would be sorted between the candidate and the URL, so only shorter prefixes are left
+        search_key = os.path.commonprefix([candidate, url])
+    return None
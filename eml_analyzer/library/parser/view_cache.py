@@ -0,0 +1,59 @@
+from typing import NamedTuple, Dict, Callable, List, Set, Iterable
+
+
+class CacheStatistics(NamedTuple):
+    hits: int
+    misses: int
+
+
+class ViewCache:
+    """ memoizes the views which are derived from a parsed email, each view is computed at most once until it is invalidated
+
+    a view which is accessed while another view is computed is recorded as its dependency, so invalidating a view
+    invalidates the views which were derived from it as well
+    """
+    def __init__(self):
+        self._values: Dict[str, any] = dict()
+        self._hits: Dict[str, int] = dict()
+        self._misses: Dict[str, int] = dict()
+        # maps a view to the views which were computed from it
+        self._dependents: Dict[str, Set[str]] = dict()
+        # the views which are computed at the moment, the innermost view is the last one
+        self._computing: List[str] = list()
+
+    def get_or_compute(self, key: str, compute: Callable[[], any], dependencies: Iterable[str] = ()) -> any:
+        """ the dependencies are only needed for views which are derived from another view without accessing it through the cache """
+        if self._computing:
+            self._dependents.setdefault(key, set()).add(self._computing[-1])
+        for dependency in dependencies:
+            self._dependents.setdefault(dependency, set()).add(key)
+        if key in self._values:
+            self._hits[key] = self._hits.get(key, 0) + 1
+            return self._values[key]
+        self._misses[key] = self._misses.get(key, 0) + 1
+        self._computing.append(key)
+        try:
+            value = compute()
+        finally:
+            self._computing.pop()
+        self._values[key] = value
+        return value
+
+    def invalidate(self, key: str or None = None) -> None:
+        """ removes the cached view with the given key and the views derived from it or all cached views if no key is given """
+        if key is None:
+            self._values.clear()
+            self._dependents.clear()
+            return
+        self._values.pop(key, None)
+        for dependent in self._dependents.pop(key, set()):
+            self.invalidate(key=dependent)
+
+    def get_dependencies(self, key: str) -> List[str]:
+        """ returns the views which were accessed while the view with the given key was computed """
+        return sorted(dependency for dependency, dependents in self._dependents.items() if key in dependents)
+
+    def get_statistics(self) -> Dict[str, CacheStatistics]:
+        """ returns the number of hits and misses per view """
+        keys = set(self._hits.keys()) | set(self._misses.keys())
+        return {key: CacheStatistics(hits=self._hits.get(key, 0), misses=self._misses.get(key, 0)) for key in sorted(keys)}
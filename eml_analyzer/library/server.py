@@ -0,0 +1,207 @@
+import concurrent.futures
+import http.server
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+import urllib.parse
+from typing import NamedTuple
+
+from eml_analyzer.library.analysis import AnalysisOptions, process_options
+from eml_analyzer.library.outputs import JsonOutput
+from eml_analyzer.library.parser import ParsedEmail, EmlParsingException, Instrumentation, ResourceLimits
+
+
+class ServerSettings(NamedTuple):
+    workers: int = os.cpu_count() or 1
+    # requests which exceed the limit are rejected instead of being queued
+    max_concurrent_requests: int = 16
+    timeout_seconds: float = 30.0
+    max_body_size: int = 50 * 1024 * 1024
+    # the wall-clock budget of the limits is replaced by the timeout
+    limits: ResourceLimits = ResourceLimits()
+
+
+class AnalysisResponse(NamedTuple):
+    status: int
+    body: str
+
+
+# maps the query parameters of an analysis request to the analysis options, the names are the ones of the cli arguments
+_QUERY_PARAMETERS = {
+    'header': 'show_header',
+    'structure': 'show_structure',
+    'url': 'show_urls',
+    'tracking': 'show_tracking',
+    'attachments': 'show_attachments',
+    'text': 'show_text',
+    'html': 'show_html',
+    'extract-all': 'extract_content',
+    'timings': 'show_timings',
+    'embedded': 'show_embedded_emails',
+    'archive-hashes': 'hash_archive_members',
+}
+
+
+def parse_options_from_query(query: str) -> AnalysisOptions:
+    """ e.g. 'header&text=1' selects the headers and the plaintext, without any parameter the default selection is used """
+    selected_options = dict()
+    for name, value in urllib.parse.parse_qsl(query, keep_blank_values=True):
+        if name not in _QUERY_PARAMETERS:
+            raise ValueError('unknown parameter "{}"'.format(name))
+        selected_options[_QUERY_PARAMETERS[name]] = value.lower() in {'', '1', 'true', 'yes'}
+    return AnalysisOptions(**selected_options).with_default_selection()
+
+
+def analyze_eml_content(eml_content: bytes, options: AnalysisOptions, timeout_seconds: float or None = None, limits: ResourceLimits or None = None) -> AnalysisResponse:
+    """ analyzes an email in a worker process and returns the same JSON as the cli script with '--format json',
+        the analysis stops with partial results after the timeout, so the worker is free again for the next request """
+    output_format = JsonOutput()
+    instrumentation = Instrumentation() if options.show_timings else None
+    try:
+        limits = (limits if limits is not None else ResourceLimits())._replace(max_seconds=timeout_seconds)
+        parsed_email = ParsedEmail(eml_content=eml_content, instrumentation=instrumentation, limits=limits)
+    except EmlParsingException as e:
+        return AnalysisResponse(status=422, body=output_format.get_error_output(exception=e, error_message='File could not be parsed. Sure it is an eml file?'))
+
+    try:
+        process_options(output_format=output_format, parsed_email=parsed_email, options=options)
+        return AnalysisResponse(status=200, body=output_format.get_final_output(parsed_email=parsed_email))
+    except Exception as e:
+        return AnalysisResponse(status=500, body=output_format.get_error_output(exception=e, error_message='File could not be analyzed'))
+
+
+def _warm_up() -> None:
+    pass
+
+
+class AnalysisService:
+    """ the warm pool of worker processes and the limits which are shared by all connections of the server """
+    def __init__(self, settings: ServerSettings):
+        self.settings: ServerSettings = settings
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=settings.workers)
+        self._request_slots = threading.BoundedSemaphore(value=settings.max_concurrent_requests)
+        # the worker processes are started before the first request arrives
+        for future in [self._executor.submit(_warm_up) for _ in range(settings.workers)]:
+            future.result()
+
+    def analyze(self, eml_content: bytes, options: AnalysisOptions) -> AnalysisResponse:
+        if not self._request_slots.acquire(blocking=False):
+            return AnalysisService._create_error_response(status=503, error_message='Too many concurrent requests')
+        try:
+            future = self._executor.submit(analyze_eml_content, eml_content, options, self.settings.timeout_seconds, self.settings.limits)
+        except Exception:
+            self._request_slots.release()
+            raise
+        # the slot is released when the analysis is finished and not when the request is answered,
+        # so analyses which are still running after a timeout count against the limit of concurrent requests
+        future.add_done_callback(lambda _: self._request_slots.release())
+        try:
+            return future.result(timeout=self.settings.timeout_seconds)
+        except concurrent.futures.TimeoutError:
+            # a running analysis can not be interrupted, it stops at the time budget of its limits and its result is discarded
+            future.cancel()
+            return AnalysisService._create_error_response(status=504, error_message='Analysis timed out after {} seconds'.format(self.settings.timeout_seconds))
+
+    @staticmethod
+    def _create_error_response(status: int, error_message: str) -> AnalysisResponse:
+        return AnalysisResponse(status=status, body=JsonOutput().get_error_output(exception=None, error_message=error_message))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+class AnalysisRequestHandler(http.server.BaseHTTPRequestHandler):
+    """ POST /analyze with the EML as body analyzes the email, GET /health can be used by monitoring """
+    server_version = 'emlAnalyzer'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if urllib.parse.urlsplit(self.path).path == '/health':
+            self._send_response(response=AnalysisResponse(status=200, body=json.dumps({'status': 'ok'})))
+        else:
+            self._send_error_response(status=404, error_message='Unknown path')
+
+    def do_POST(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != '/analyze':
+            self._send_error_response(status=404, error_message='Unknown path')
+            return
+
+        try:
+            options = parse_options_from_query(query=url.query)
+        except ValueError as e:
+            self._send_error_response(status=400, error_message=str(e))
+            return
+
+        content_length = self.headers.get('Content-Length')
+        if content_length is None or not content_length.isdigit():
+            self._send_error_response(status=411, error_message='Content-Length is required')
+            return
+        service: AnalysisService = self.server.analysis_service
+        if int(content_length) > service.settings.max_body_size:
+            self._send_error_response(status=413, error_message='The email exceeds the maximum size of {} bytes'.format(service.settings.max_body_size))
+            return
+
+        eml_content = self.rfile.read(int(content_length))
+        self._send_response(response=service.analyze(eml_content=eml_content, options=options))
+
+    def _send_error_response(self, status: int, error_message: str) -> None:
+        # the body of a rejected request is not read, so the connection can not be reused
+        self.close_connection = True
+        self._send_response(response=AnalysisService._create_error_response(status=status, error_message=error_message))
+
+    def _send_response(self, response: AnalysisResponse) -> None:
+        body = response.body.encode('utf-8')
+        self.send_response(response.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # clients of a Unix domain socket have no address
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return super().address_string()
+        return 'unix-socket'
+
+
+if hasattr(socket, 'AF_UNIX'):
+    class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+def create_server(analysis_service: AnalysisService, host: str = '127.0.0.1', port: int = 8025, unix_socket_path: str or None = None) -> socketserver.BaseServer:
+    """ creates the HTTP server on a local TCP port or on a Unix domain socket if a path is given """
+    if unix_socket_path is None:
+        server = http.server.ThreadingHTTPServer((host, port), AnalysisRequestHandler)
+    else:
+        if not hasattr(socket, 'AF_UNIX'):
+            raise OSError('Unix domain sockets are not supported on this platform')
+        # a socket file which is left over from a previous run would prevent binding
+        if os.path.exists(unix_socket_path) and stat.S_ISSOCK(os.stat(unix_socket_path).st_mode):
+            os.remove(unix_socket_path)
+        server = _ThreadingUnixHTTPServer(unix_socket_path, AnalysisRequestHandler)
+    server.analysis_service = analysis_service
+    return server
+
+
+def serve(settings: ServerSettings, host: str = '127.0.0.1', port: int = 8025, unix_socket_path: str or None = None) -> None:
+    """ serves analysis requests until the process is interrupted """
+    analysis_service = AnalysisService(settings=settings)
+    try:
+        server = create_server(analysis_service=analysis_service, host=host, port=port, unix_socket_path=unix_socket_path)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if unix_socket_path is not None and os.path.exists(unix_socket_path):
+                os.remove(unix_socket_path)
+    finally:
+        analysis_service.close()
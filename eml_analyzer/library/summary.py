@@ -0,0 +1,150 @@
+import functools
+from typing import NamedTuple, Iterable, List, Dict
+
+from eml_analyzer.library.batch import BatchInput, map_batch_inputs, open_result_cache
+from eml_analyzer.library.parser import ParsedEmail, EmlParsingException, ResourceLimits
+from eml_analyzer.library.parser.result_cache import DEFAULT_MAX_SIZE_BYTES, get_content_key
+
+
+# the kinds of items by which the messages of a corpus are clustered
+SUMMARY_KINDS = ['html', 'attachment', 'url_set', 'header_order']
+
+
+class FingerprintedItem(NamedTuple):
+    kind: str
+    digest: str
+    # a short description which is shown for the cluster, e.g. the filename of an attachment
+    label: any = None
+
+
+class MessageFingerprints(NamedTuple):
+    source: str
+    items: List[FingerprintedItem]
+    # the error message if the email could not be loaded or parsed
+    error_message: str or None = None
+
+
+class Cluster(NamedTuple):
+    kind: str
+    digest: str
+    count: int
+    label: any
+    # the sources of the first messages which contain the item
+    representatives: List[str]
+
+    def to_dict(self) -> dict:
+        cluster_dict = {'digest': self.digest, 'count': self.count, 'representatives': self.representatives}
+        if self.label is not None:
+            cluster_dict['label'] = self.label
+        return cluster_dict
+
+
+def fingerprint_batch_input(batch_input: BatchInput, cache_directory: str or None = None, cache_size: int = DEFAULT_MAX_SIZE_BYTES,
+                            limits: ResourceLimits or None = None) -> MessageFingerprints:
+    """ returns the digests of the HTML, the attachments, the set of URLs and the order of the header names of an email,
+        runs in a worker process, so only the digests and not the parsed email are sent back """
+    result_cache = open_result_cache(directory=cache_directory, max_size_bytes=cache_size) if cache_directory is not None else None
+    try:
+        if batch_input.eml_content is None:
+            parsed_email = ParsedEmail.from_file(path=batch_input.source, limits=limits, result_cache=result_cache)
+        else:
+            parsed_email = ParsedEmail(eml_content=batch_input.eml_content, limits=limits, result_cache=result_cache)
+    except OSError:
+        return MessageFingerprints(source=batch_input.source, items=list(), error_message='File could not be loaded')
+    except EmlParsingException:
+        return MessageFingerprints(source=batch_input.source, items=list(), error_message='File could not be parsed. Sure it is an eml file?')
+
+    try:
+        return MessageFingerprints(source=batch_input.source, items=get_fingerprinted_items(parsed_email=parsed_email))
+    except Exception:
+        return MessageFingerprints(source=batch_input.source, items=list(), error_message='File could not be analyzed')
+
+
+def get_fingerprinted_items(parsed_email: ParsedEmail) -> List[FingerprintedItem]:
+    items = list()
+    html = parsed_email.get_html_content()
+    if html is not None:
+        items.append(FingerprintedItem(kind='html', digest=get_content_key(content=html)))
+
+    # an attachment which is attached twice to the same message is counted once
+    attachment_digests = set()
+    for attachment in parsed_email.get_attachments():
+        hashes = attachment.get_hashes()
+        if hashes is not None and hashes.sha256 not in attachment_digests:
+            attachment_digests.add(hashes.sha256)
+            items.append(FingerprintedItem(kind='attachment', digest=hashes.sha256, label=attachment.filename))
+
+    urls = sorted(parsed_email.get_embedded_clickable_urls_from_html_and_text())
+    if len(urls) > 0:
+        items.append(FingerprintedItem(kind='url_set', digest=get_content_key(content='\n'.join(urls)), label=urls))
+
+    # the order of the header names is characteristic for the software which sent the message
+    header_names = [name.lower() for name, value in parsed_email.get_header()]
+    items.append(FingerprintedItem(kind='header_order', digest=get_content_key(content='\n'.join(header_names)), label=header_names))
+    return items
+
+
+class _ClusterEntry:
+    """ the count and the representatives of a distinct item, one entry is kept per distinct item and not per message """
+    __slots__ = ('count', 'label', 'representatives')
+
+    def __init__(self, label: any):
+        self.count: int = 0
+        self.label: any = label
+        self.representatives: List[str] = list()
+
+
+class CorpusSummary:
+    """ counts how many messages share the same items while the fingerprints of a batch run are streamed in """
+    def __init__(self, max_representatives: int = 3):
+        self.max_representatives: int = max_representatives
+        self.message_count: int = 0
+        self.failed_count: int = 0
+        # like the representatives of a cluster only the first sources are kept
+        self.failed_sources: List[str] = list()
+        self._entries: Dict[str, Dict[str, _ClusterEntry]] = {kind: dict() for kind in SUMMARY_KINDS}
+
+    def add(self, fingerprints: MessageFingerprints) -> None:
+        self.message_count += 1
+        if fingerprints.error_message is not None:
+            self.failed_count += 1
+            if len(self.failed_sources) < self.max_representatives:
+                self.failed_sources.append(fingerprints.source)
+            return
+        for item in fingerprints.items:
+            entries_of_kind = self._entries[item.kind]
+            entry = entries_of_kind.get(item.digest)
+            if entry is None:
+                entry = _ClusterEntry(label=item.label)
+                entries_of_kind[item.digest] = entry
+            entry.count += 1
+            if len(entry.representatives) < self.max_representatives:
+                entry.representatives.append(fingerprints.source)
+
+    def get_distinct_count(self, kind: str) -> int:
+        return len(self._entries[kind])
+
+    def get_clusters(self, kind: str, min_count: int = 2, limit: int or None = None) -> List[Cluster]:
+        """ returns the items which are shared by at least min_count messages, the largest clusters first """
+        clusters = [Cluster(kind=kind, digest=digest, count=entry.count, label=entry.label, representatives=list(entry.representatives))
+                    for digest, entry in self._entries[kind].items() if entry.count >= min_count]
+        clusters.sort(key=lambda cluster: (-cluster.count, cluster.digest))
+        return clusters[:limit] if limit is not None else clusters
+
+    def to_dict(self, min_count: int = 2, limit: int or None = None) -> dict:
+        return {
+            'messages': self.message_count,
+            'failed': {'count': self.failed_count, 'representatives': self.failed_sources},
+            'distinct': {kind: self.get_distinct_count(kind=kind) for kind in SUMMARY_KINDS},
+            'clusters': {kind: [cluster.to_dict() for cluster in self.get_clusters(kind=kind, min_count=min_count, limit=limit)] for kind in SUMMARY_KINDS},
+        }
+
+
+def summarize_batch(batch_inputs: Iterable[BatchInput], workers: int = 1, max_representatives: int = 3, cache_directory: str or None = None,
+                    cache_size: int = DEFAULT_MAX_SIZE_BYTES, limits: ResourceLimits or None = None) -> CorpusSummary:
+    """ fingerprints the emails on the worker processes and aggregates the fingerprints in this process while they arrive """
+    summary = CorpusSummary(max_representatives=max_representatives)
+    fingerprint = functools.partial(fingerprint_batch_input, cache_directory=cache_directory, cache_size=cache_size, limits=limits)
+    for fingerprints in map_batch_inputs(function=fingerprint, batch_inputs=batch_inputs, workers=workers):
+        summary.add(fingerprints=fingerprints)
+    return summary
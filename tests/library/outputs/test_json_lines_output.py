@@ -0,0 +1,61 @@
+import io
+import json
+import unittest
+from typing import List, Tuple
+
+from eml_analyzer.library.outputs import JsonLinesOutput
+
+
+class parsedEmailMock:
+    def __init__(self, error_messages: List[str] = None):
+        self.error_messages = error_messages if error_messages is not None else list()
+
+    def get_header(self) -> List[Tuple[str, any]]:
+        return [
+            ('key 1', 'value a'),
+            ('key 1', 'value b'),
+        ]
+
+    def get_embedded_clickable_urls_from_html_and_text(self):
+        return ["test_1", "test_2"]
+
+    def get_error_messages(self) -> List[str]:
+        return self.error_messages
+
+
+class TestJsonLinesOutput(unittest.TestCase):
+    def test_sections_are_written_as_they_are_produced(self):
+        output_stream = io.StringIO()
+        output = JsonLinesOutput(output_stream=output_stream)
+        output.process_option_show_header(parsed_email=parsedEmailMock())
+        self.assertTrue(output_stream.getvalue().startswith('{"headers":'))
+
+        output.process_option_show_embedded_urls_in_html_and_text(parsed_email=parsedEmailMock())
+        self.assertIsNone(output.get_final_output(parsed_email=parsedEmailMock()))
+
+        lines = output_stream.getvalue().split('\n')
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[1], '')
+        record = json.loads(lines[0])
+        self.assertEqual(record['headers']['key 1'], ['value a', 'value b'])
+        self.assertEqual(record['urls'], ["test_1", "test_2"])
+        self.assertNotIn('warnings', record)
+
+    def test_one_record_per_email(self):
+        output_stream = io.StringIO()
+        for file_path in ['a.eml', 'b.eml']:
+            output = JsonLinesOutput(output_stream=output_stream)
+            output.process_input_file(file_path=file_path)
+            output.get_final_output(parsed_email=parsedEmailMock(error_messages=['warning']))
+
+        records = [json.loads(line) for line in output_stream.getvalue().splitlines()]
+        self.assertEqual(records, [{'file': 'a.eml', 'warnings': ['warning']}, {'file': 'b.eml', 'warnings': ['warning']}])
+
+    def test_output_error_finishes_the_record(self):
+        output_stream = io.StringIO()
+        output = JsonLinesOutput(output_stream=output_stream)
+        output.process_input_file(file_path='a.eml')
+        output.output_error(exception=ValueError('broken'), error_message='File could not be parsed')
+
+        record = json.loads(output_stream.getvalue())
+        self.assertEqual(record, {'file': 'a.eml', 'error_message': 'File could not be parsed', 'exception': 'broken'})
@@ -3,7 +3,7 @@ import unittest
 from typing import List, Tuple
 
 from eml_analyzer.library.outputs import JsonOutput
-from eml_analyzer.library.parser import Attachment, StructureItem
+from eml_analyzer.library.parser import ArchiveListing, ArchiveMember, Attachment, AttachmentHashes, EmbeddedEmail, StructureItem, Instrumentation
 
 
 class TestJsonOutput(unittest.TestCase):
@@ -163,6 +163,14 @@ class TestJsonOutput(unittest.TestCase):
                 self.filename = filename
                 self.content_disposition = "attachment"
 
+            def get_hashes(self) -> AttachmentHashes:
+                return AttachmentHashes(md5='md5 of ' + self.filename, sha1='sha1 of ' + self.filename, sha256='sha256 of ' + self.filename)
+
+            def get_archive_listing(self, hash_members: bool = False) -> ArchiveListing or None:
+                if self.filename != 'file_2':
+                    return None
+                return ArchiveListing(archive_format='zip', members=[ArchiveMember(name='payload.js', size=100, compressed_size=40, is_encrypted=True)])
+
         class parsedEmailMock:
             def get_attachments(self) -> List[mockAttachment]:
                 return [mockAttachment("file_1"), mockAttachment("file_2")]
@@ -180,6 +188,10 @@ class TestJsonOutput(unittest.TestCase):
         self.assertEqual(output['attachments'][0]['type'], "text/plain")
         self.assertEqual(output['attachments'][0]['disposition'], "attachment")
         self.assertEqual(output['attachments'][1]['name'], "file_2")
+        self.assertEqual(output['attachments'][1]['hashes'], {'md5': 'md5 of file_2', 'sha1': 'sha1 of file_2', 'sha256': 'sha256 of file_2'})
+        self.assertNotIn('content_in_base64', output['attachments'][1])
+        self.assertNotIn('archive', output['attachments'][0])
+        self.assertEqual(output['attachments'][1]['archive'], {'format': 'zip', 'members': [{'name': 'payload.js', 'size': 100, 'compressed_size': 40, 'encrypted': True}]})
 
     def test_process_option_show_reloaded_content_from_html(self):
         class parsedEmailMock:
@@ -197,3 +209,43 @@ class TestJsonOutput(unittest.TestCase):
         self.assertEqual(len(output['reloaded_content']), 2)
         self.assertIn("test_1", output['reloaded_content'])
         self.assertIn("test_2", output['reloaded_content'])
+
+    def test_process_option_show_timings(self):
+        instrumentation = Instrumentation()
+        instrumentation.record(stage='parse', seconds=0.5, processed_bytes=100)
+
+        class parsedEmailMock:
+            def get_instrumentation(self) -> Instrumentation:
+                return instrumentation
+
+            def get_error_messages(self) -> List[str]:
+                return list()
+
+        output = JsonOutput()
+        output.process_option_show_timings(parsed_email=parsedEmailMock())
+        output = json.loads(output.get_final_output(parsed_email=parsedEmailMock()))
+        self.assertEqual(output['timings']['parse'], {'calls': 1, 'seconds': 0.5, 'bytes': 100})
+        self.assertEqual(output['timings']['serialization']['calls'], 1)
+
+    def test_process_option_show_embedded_emails(self):
+        class parsedEmailMock:
+            def __init__(self, subject: str, embedded_emails: list):
+                self.subject = subject
+                self.embedded_emails = embedded_emails
+
+            def get_embedded_emails(self) -> list:
+                return self.embedded_emails
+
+            def get_error_messages(self) -> List[str]:
+                return list()
+
+        inner_email = parsedEmailMock(subject='inner', embedded_emails=list())
+        outer_email = parsedEmailMock(subject='outer', embedded_emails=[EmbeddedEmail(part_position=2, filename='forwarded.eml', parsed_email=inner_email)])
+
+        def process_embedded_email(embedded_output: JsonOutput, embedded_email: parsedEmailMock) -> None:
+            embedded_output._add_section(key='subject', value=embedded_email.subject)
+
+        output = JsonOutput()
+        output.process_option_show_embedded_emails(parsed_email=outer_email, process_embedded_email=process_embedded_email)
+        output = json.loads(output.get_final_output(parsed_email=outer_email))
+        self.assertEqual(output['embedded_emails'], [{'part': 2, 'name': 'forwarded.eml', 'subject': 'inner'}])
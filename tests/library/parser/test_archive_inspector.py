@@ -0,0 +1,115 @@
+import base64
+import gzip
+import hashlib
+import io
+import tarfile
+import unittest
+import zipfile
+
+from eml_analyzer.library.parser import ParsedEmail, ResourceLimits
+from eml_analyzer.library.parser.archive_inspector import get_archive_format, inspect_archive, inspect_archive_chunks
+from eml_analyzer.library.parser.payload_stream import iter_chunks
+from eml_analyzer.library.parser.resource_limits import ResourceBudget
+
+
+def create_zip(members: dict) -> bytes:
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, mode='w', compression=zipfile.ZIP_DEFLATED) as zip_file:
+        for name, content in members.items():
+            zip_file.writestr(name, content)
+    return output.getvalue()
+
+
+def create_tar(members: dict, mode: str = 'w') -> bytes:
+    output = io.BytesIO()
+    with tarfile.open(fileobj=output, mode=mode) as tar_file:
+        for name, content in members.items():
+            tar_info = tarfile.TarInfo(name=name)
+            tar_info.size = len(content)
+            tar_file.addfile(tar_info, io.BytesIO(content))
+    return output.getvalue()
+
+
+class TestArchiveInspector(unittest.TestCase):
+    def test_get_archive_format(self):
+        self.assertEqual(get_archive_format(prefix=create_zip(members={'a.txt': b'a'})), 'zip')
+        self.assertEqual(get_archive_format(prefix=create_tar(members={'a.txt': b'a'})), 'tar')
+        self.assertEqual(get_archive_format(prefix=gzip.compress(b'a')), 'gzip')
+        self.assertIsNone(get_archive_format(prefix=b'GIF89a'))
+
+    def test_inspect_zip(self):
+        content = create_zip(members={'invoice.pdf.exe': b'MZ' + b'\0' * 1000, 'readme.txt': b'hello'})
+        listing = inspect_archive(content=content, filename='invoice.zip', description='Attachment [1] "invoice.zip"')
+        self.assertEqual(listing.archive_format, 'zip')
+        self.assertEqual([(member.name, member.size, member.is_encrypted, member.hashes) for member in listing.members],
+                         [('invoice.pdf.exe', 1002, False, None), ('readme.txt', 5, False, None)])
+        self.assertLess(listing.members[0].compressed_size, 1002)
+
+        listing = inspect_archive(content=content, filename='invoice.zip', description='Attachment [1] "invoice.zip"', hash_members=True)
+        self.assertEqual(listing.members[1].hashes.sha256, hashlib.sha256(b'hello').hexdigest())
+
+    def test_inspect_encrypted_zip(self):
+        content = bytearray(create_zip(members={'secret.txt': b'secret'}))
+        # sets the encryption flag in the local header and in the central directory
+        for position in [6, content.rfind(b'PK\x01\x02') + 8]:
+            content[position] |= 0x1
+        listing = inspect_archive(content=bytes(content), filename='secret.zip', description='Attachment [1] "secret.zip"', hash_members=True)
+        self.assertTrue(listing.members[0].is_encrypted)
+        self.assertIsNone(listing.members[0].hashes)
+
+    def test_inspect_tar_and_gzip(self):
+        for mode in ['w', 'w:gz', 'w:bz2', 'w:xz']:
+            listing = inspect_archive(content=create_tar(members={'a.txt': b'a', 'b.txt': b'bb'}, mode=mode), filename='a.tar', description='Attachment [1] "a.tar"', hash_members=True)
+            self.assertEqual(listing.archive_format, 'tar')
+            self.assertEqual([(member.name, member.size) for member in listing.members], [('a.txt', 1), ('b.txt', 2)])
+            self.assertEqual(listing.members[1].hashes.sha256, hashlib.sha256(b'bb').hexdigest())
+
+        listing = inspect_archive(content=gzip.compress(b'log line\n' * 10), filename='server.log.gz', description='Attachment [1] "server.log.gz"', hash_members=True)
+        self.assertEqual(listing.archive_format, 'gzip')
+        self.assertEqual(listing.members[0].name, 'server.log')
+        self.assertEqual(listing.members[0].size, 90)
+        self.assertEqual(listing.members[0].hashes.sha256, hashlib.sha256(b'log line\n' * 10).hexdigest())
+
+    def test_inspect_chunks(self):
+        contents = [create_zip(members={'a.txt': b'a' * 1000}), create_tar(members={'a.txt': b'a' * 1000}, mode='w:gz'), gzip.compress(b'a' * 1000)]
+        for content in contents:
+            for chunk_size in [1, 7, 4096]:
+                listing = inspect_archive_chunks(iter_content_chunks=lambda: iter_chunks(data=content, chunk_size=chunk_size), filename='a.txt.gz',
+                                                 description='Attachment [1] "a.txt.gz"', hash_members=True)
+                self.assertEqual(listing, inspect_archive(content=content, filename='a.txt.gz', description='Attachment [1] "a.txt.gz"', hash_members=True))
+                self.assertEqual(listing.members[0].size, 1000)
+                self.assertEqual(listing.members[0].hashes.sha256, hashlib.sha256(b'a' * 1000).hexdigest())
+
+    def test_limits(self):
+        errors = list()
+        budget = ResourceBudget(limits=ResourceLimits(max_archive_members=2, max_archive_expansion_ratio=10), report=errors.append)
+        content = create_zip(members={'a.txt': b'a', 'zeros.bin': b'\0' * 100000, 'c.txt': b'c'})
+        listing = inspect_archive(content=content, filename='bomb.zip', description='Attachment [1] "bomb.zip"', hash_members=True, budget=budget)
+        self.assertTrue(listing.is_truncated)
+        self.assertEqual([member.name for member in listing.members], ['a.txt', 'zeros.bin'])
+        self.assertIsNotNone(listing.members[0].hashes)
+        self.assertIsNone(listing.members[1].hashes)
+        self.assertEqual(errors, ['The member "zeros.bin" of Attachment [1] "bomb.zip" exceeds the expansion ratio of 10 and was not decompressed',
+                                  'Attachment [1] "bomb.zip" has more than 2 members, the remaining members were skipped'])
+
+    def test_corrupt_archive(self):
+        content = create_zip(members={'a.txt': b'a' * 100})
+        listing = inspect_archive(content=content[:len(content) // 2], filename='broken.zip', description='Attachment [1] "broken.zip"')
+        self.assertEqual(listing.members, list())
+        self.assertIsNotNone(listing.error_message)
+
+    def test_attachment_archive_listing(self):
+        eml_content = (b'Content-Type: multipart/mixed; boundary="b"\n\n'
+                       b'--b\nContent-Type: text/plain\n\nSee attachment\n'
+                       b'--b\nContent-Type: application/zip; name="invoice.zip"\nContent-Disposition: attachment; filename="invoice.zip"\n'
+                       b'Content-Transfer-Encoding: base64\n\n' + base64.encodebytes(create_zip(members={'invoice.js': b'alert(1)'})) + b'\n'
+                       b'--b\nContent-Type: text/plain; name="notes.txt"\nContent-Disposition: attachment; filename="notes.txt"\n\nno archive\n'
+                       b'--b--\n')
+        attachments = ParsedEmail(eml_content=eml_content).get_attachments()
+        listing = attachments[0].get_archive_listing(hash_members=True)
+        self.assertEqual(listing.members[0].name, 'invoice.js')
+        self.assertEqual(listing.members[0].hashes.sha256, hashlib.sha256(b'alert(1)').hexdigest())
+        self.assertIs(attachments[0].get_archive_listing(), listing)
+        # the archive is streamed, so the decoded content is not kept by the attachment
+        self.assertFalse(attachments[0]._content_is_decoded)
+        self.assertIsNone(attachments[1].get_archive_listing())
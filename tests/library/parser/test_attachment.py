@@ -4,9 +4,11 @@ from eml_analyzer.library.parser import Attachment
 
 
 class messageMock:
-    def __init__(self, filename: str, payload: bytes):
+    def __init__(self, filename: str, payload: bytes, encoded_payload: str = ''):
         self.filename = filename
         self.payload = payload
+        self.encoded_payload = encoded_payload
+        self.decode_counter = 0
 
     def get_filename(self):
         return self.filename
@@ -18,7 +20,10 @@ class messageMock:
         return "content_disposition"
 
     def get_payload(self, decode: bool):
-        return self.payload
+        if decode:
+            self.decode_counter += 1
+            return self.payload
+        return self.encoded_payload
 
 
 class TestAttachment(unittest.TestCase):
@@ -31,3 +36,25 @@ class TestAttachment(unittest.TestCase):
     def test_payload_base64_encoding(self):
         attachment = Attachment(message=messageMock(filename='filename', payload=b'HELLO WORLD'), index=0)
         self.assertEqual(attachment.get_content_base64_encoded(), 'SEVMTE8gV09STEQ=')
+
+    def test_payload_is_decoded_lazily_and_only_once(self):
+        message = messageMock(filename='filename', payload=b'HELLO WORLD', encoded_payload='SEVMTE8gV09STEQ=\n')
+        attachment = Attachment(message=message, index=0)
+        self.assertEqual(attachment.filename, 'filename')
+        self.assertEqual(attachment.encoded_size, 17)
+        self.assertEqual(message.decode_counter, 0)
+
+        self.assertEqual(attachment.content, b'HELLO WORLD')
+        self.assertEqual(attachment.content, b'HELLO WORLD')
+        self.assertEqual(message.decode_counter, 1)
+
+    def test_hashes_are_computed_in_one_pass(self):
+        message = messageMock(filename='filename', payload=b'HELLO WORLD', encoded_payload='SEVMTE8gV09STEQ=\n')
+        attachment = Attachment(message=message, index=0)
+        self.assertEqual(attachment.content, b'HELLO WORLD')
+        hashes = attachment.get_hashes()
+        self.assertEqual(hashes.md5, '361fadf1c712e812d198c4cab5712a79')
+        self.assertEqual(hashes.sha1, '4b68507f1746b0e5f3efe99b8ef42afef79da017')
+        self.assertEqual(hashes.sha256, '787ec76dcafd20c1908eb0936a12f91edd105ab5cd7ecc2b1ae2032648345dff')
+        self.assertIs(attachment.get_hashes(), hashes)
+        self.assertEqual(message.decode_counter, 1)
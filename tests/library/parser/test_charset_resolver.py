@@ -0,0 +1,46 @@
+import unittest
+from unittest import mock
+
+from eml_analyzer.library.parser import charset_resolver
+from eml_analyzer.library.parser.charset_resolver import normalize_charset, get_candidate_charsets, decode_payload
+
+
+class TestCharsetResolver(unittest.TestCase):
+    def test_normalize_charset(self):
+        # [(value, expected)]
+        test_cases = [
+            (None, None),
+            ('UTF8', 'utf-8'),
+            (' "Windows-1251" ', 'cp1251'),
+            ('x-unknown', None),
+        ]
+        for value, expected in test_cases:
+            self.assertEqual(normalize_charset(value), expected)
+
+    def test_candidate_charsets_start_with_declared_charset(self):
+        self.assertEqual(get_candidate_charsets(declared_charset='latin1'), ['iso8859-1', 'utf-8', 'cp1251', 'ascii', 'iso8859-15'])
+        self.assertEqual(get_candidate_charsets(declared_charset='x-unknown'), ['utf-8', 'cp1251', 'iso8859-1', 'ascii', 'iso8859-15'])
+
+    def test_decode_with_declared_charset(self):
+        decoded_payload = decode_payload(payload='Grüße'.encode('iso-8859-1'), declared_charset='iso-8859-1')
+        self.assertEqual(decoded_payload.text, 'Grüße')
+        self.assertFalse(decoded_payload.is_fallback)
+
+    def test_decode_with_fallback_charset(self):
+        decoded_payload = decode_payload(payload='Привет'.encode('windows-1251'), declared_charset='utf-8')
+        self.assertEqual(decoded_payload.text, 'Привет')
+        self.assertEqual(decoded_payload.charset, 'cp1251')
+        self.assertTrue(decoded_payload.is_fallback)
+
+    def test_payload_without_declared_charset_is_no_fallback(self):
+        decoded_payload = decode_payload(payload=b'Hello', declared_charset=None)
+        self.assertEqual(decoded_payload.charset, 'utf-8')
+        self.assertFalse(decoded_payload.is_fallback)
+
+    def test_invalid_prefix_skips_full_decoding(self):
+        payload = b'\xff' + b'a' * 100
+        with mock.patch.object(charset_resolver, 'VALIDATION_PREFIX_SIZE', 10):
+            self.assertFalse(charset_resolver._prefix_is_decodable(payload=payload, charset='utf-8'))
+            # a multibyte character which is cut off at the end of the prefix is valid
+            self.assertTrue(charset_resolver._prefix_is_decodable(payload=b'a' * 9 + 'ä'.encode('utf-8') * 50, charset='utf-8'))
+            self.assertEqual(decode_payload(payload=payload, declared_charset='utf-8').charset, 'cp1251')
@@ -0,0 +1,40 @@
+import email.header
+import unittest
+
+from eml_analyzer.library.parser import HeaderView
+from eml_analyzer.library.parser.header_decoder import decode_encoded_words, decode_header_value
+
+
+class TestHeaderDecoder(unittest.TestCase):
+    def test_decode_encoded_words(self):
+        # [(value, expected)]
+        test_cases = [
+            ('', ''),
+            ('Hello World', 'Hello World'),
+            ('=?UTF-8?B?w6Q=?= und =?iso-8859-1?q?=F6?=', 'ä und ö'),
+            ('=?UTF-8?B?w6Q?=', 'ä'),  # missing padding
+            ('=?UTF-8*de?Q?=c3=a4?=', 'ä'),  # charset with language
+            ('=?x-unknown?B?w6Q=?=', '=?x-unknown?B?w6Q=?='),  # unknown charset is kept
+            ('=?UTF-8?B?w6?Q?=', '=?UTF-8?B?w6?Q?='),  # invalid encoded word is kept
+            ('=?utf-8?B?/w==?=', '�'),  # invalid bytes are replaced
+        ]
+        for value, expected in test_cases:
+            self.assertEqual(decode_encoded_words(string=value), expected)
+
+    def test_decode_header_value(self):
+        self.assertEqual(decode_header_value(value='=?UTF-8?Q?Gr=c3=bc=c3=9fe?='), 'Grüße')
+        self.assertEqual(decode_header_value(value=email.header.Header('=?UTF-8?Q?Gr=c3=bc=c3=9fe?=')), 'Grüße')
+
+    def test_header_view_lookup_is_case_insensitive(self):
+        header_view = HeaderView(headers=[('Received', 'a'), ('Subject', 'b'), ('received', 'c')])
+        self.assertEqual(header_view.get('RECEIVED'), 'a')
+        self.assertEqual(header_view.get_all('Received'), ['a', 'c'])
+        self.assertEqual(header_view['subject'], 'b')
+        self.assertIn('SUBJECT', header_view)
+        self.assertNotIn('To', header_view)
+        self.assertIsNone(header_view.get('To'))
+        self.assertEqual(header_view.get_all('To'), [])
+        self.assertEqual(len(header_view), 3)
+        self.assertEqual(list(header_view), [('Received', 'a'), ('Subject', 'b'), ('received', 'c')])
+        with self.assertRaises(KeyError):
+            _ = header_view['To']
@@ -0,0 +1,62 @@
+import mailbox
+import os
+import shutil
+import tempfile
+import unittest
+
+from eml_analyzer.library.parser import iter_parsed_emails, iter_mailbox_messages
+from eml_analyzer.library.parser.mailbox_reader import is_maildir, is_mbox
+
+
+def get_test_eml_file_path(test_file: str) -> str:
+    current_directory_of_the_script = os.path.dirname(__file__)
+    return os.path.join(current_directory_of_the_script, 'test_emails', test_file)
+
+
+def load_test_eml_file_as_bytes(test_file: str) -> bytes:
+    with open(get_test_eml_file_path(test_file), mode='rb') as input_file:
+        return input_file.read()
+
+
+class TestMailboxReader(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.mbox_path = os.path.join(self.directory, 'archive.mbox')
+        self.maildir_path = os.path.join(self.directory, 'maildir')
+        mbox = mailbox.mbox(self.mbox_path)
+        maildir = mailbox.Maildir(self.maildir_path)
+        for test_file in ['file_1.eml', 'file_2.eml', 'utf8_with_umlauts.eml']:
+            eml_content = load_test_eml_file_as_bytes(test_file)
+            mbox.add(eml_content)
+            maildir.add(eml_content)
+        mbox.close()
+        maildir.close()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_detect_mailbox_formats(self):
+        self.assertTrue(is_mbox(path=self.mbox_path))
+        self.assertFalse(is_mbox(path=get_test_eml_file_path('file_1.eml')))
+        self.assertFalse(is_mbox(path=os.path.join(self.directory, 'missing.mbox')))
+        self.assertTrue(is_maildir(path=self.maildir_path))
+        self.assertFalse(is_maildir(path=self.directory))
+
+    def test_iter_mbox_messages(self):
+        mailbox_messages = list(iter_mailbox_messages(path=self.mbox_path))
+        self.assertEqual([mailbox_message.source for mailbox_message in mailbox_messages],
+                         ['{}#{}'.format(self.mbox_path, key) for key in range(3)])
+
+    def test_iter_parsed_emails_from_mbox(self):
+        subjects = [dict(parsed_email.get_header())['Subject'] for parsed_email in iter_parsed_emails(path=self.mbox_path)]
+        self.assertEqual(len(subjects), 3)
+        self.assertEqual(subjects[2], 'Dies_ist_ein_dämlicher_Test')
+
+    def test_iter_parsed_emails_from_maildir(self):
+        parsed_emails = list(iter_parsed_emails(path=self.maildir_path))
+        self.assertEqual(len(parsed_emails), 3)
+
+    def test_iter_parsed_emails_from_eml_file(self):
+        parsed_emails = list(iter_parsed_emails(path=get_test_eml_file_path('file_1.eml')))
+        self.assertEqual(len(parsed_emails), 1)
+        self.assertEqual(len(parsed_emails[0].get_attachments()), 3)
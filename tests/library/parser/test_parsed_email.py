@@ -1,21 +1,31 @@
+import base64
+import hashlib
 import unittest
 import os
 
-from eml_analyzer.library.parser import ParsedEmail, EmlParsingException
+from eml_analyzer.library.parser import ParsedEmail, EmlParsingException, Instrumentation, ResourceLimits
 
 
-def load_test_eml_file(test_file) -> str:
+def get_test_eml_file_path(test_file) -> str:
     current_directory_of_the_script = os.path.dirname(__file__)
     test_emails = os.path.join(current_directory_of_the_script, 'test_emails')
-    path_to_test_file = os.path.join(test_emails, test_file)
-    with open(path_to_test_file, mode='r', encoding='utf-8') as input_file:
+    return os.path.join(test_emails, test_file)
+
+
+def load_test_eml_file(test_file) -> str:
+    with open(get_test_eml_file_path(test_file), mode='r', encoding='utf-8') as input_file:
+        return input_file.read()
+
+
+def load_test_eml_file_as_bytes(test_file) -> bytes:
+    with open(get_test_eml_file_path(test_file), mode='rb') as input_file:
         return input_file.read()
 
 
 class TestParsedEmail(unittest.TestCase):
     def test_case_invalid_argument(self):
         try:
-            x = ParsedEmail(eml_content=b'ASDKSABD')  # a string is expected
+            x = ParsedEmail(eml_content=12345)  # a string, bytes or a binary file is expected
             self.fail(msg="no exception was raised")
         except EmlParsingException:
             pass
@@ -244,3 +254,192 @@ https://embedded-url.com
                 self.assertEqual(value, 'Dies_ist_ein_dämlicher_Test')
                 return
         self.fail(msg="header subject not found")
+
+    def test_case_1_parsed_from_bytes(self):
+        eml_content = load_test_eml_file_as_bytes('file_1.eml')
+        for content in [eml_content, bytearray(eml_content), memoryview(eml_content)]:
+            x = ParsedEmail(eml_content=content)
+            self.assertEqual(x.get_text_content(), ParsedEmail(eml_content=load_test_eml_file('file_1.eml')).get_text_content())
+            self.assertEqual(len(x.get_attachments()), 3)
+
+    def test_case_1_parsed_from_file(self):
+        x = ParsedEmail.from_file(path=get_test_eml_file_path('file_1.eml'))
+        self.assertIn(('Subject', 'UnitTest Subject München,'), x.get_header())
+
+    def test_case_8bit_latin1_body_and_raw_utf8_header(self):
+        # the file is not valid UTF-8, so it could not be loaded as text at all
+        x = ParsedEmail(eml_content=load_test_eml_file_as_bytes('latin1_8bit.eml'))
+        self.assertEqual(x.get_text_content().strip(), 'Dies ist ein dämlicher Test.')
+        header = dict(x.get_header())
+        self.assertEqual(header['Subject'], 'Grüße aus München')
+        self.assertEqual(header['From'], 'Jürgen <juergen@example.org>')
+
+    def test_derived_views_are_memoized(self):
+        x = ParsedEmail(eml_content=load_test_eml_file('file_1.eml'))
+        x.get_html_content()
+        x.get_embedded_clickable_urls_from_html_and_text()
+        x.get_reloaded_content_from_html()
+        x.get_header()
+        x.get_header()
+        statistics = x.get_cache_statistics()
+        self.assertEqual(statistics['html'].misses, 1)
+        self.assertEqual(statistics['html_url_scan'].misses, 1)
+        self.assertEqual(statistics['html_url_scan'].hits, 1)
+        self.assertEqual(statistics['header'].misses, 1)
+        self.assertEqual(statistics['header'].hits, 1)
+
+    def test_invalidate_views(self):
+        x = ParsedEmail(eml_content=load_test_eml_file('file_1.eml'))
+        attachments = x.get_attachments()
+        self.assertIs(x.get_attachments()[0], attachments[0])
+        x.invalidate(view='attachments')
+        self.assertIsNot(x.get_attachments()[0], attachments[0])
+        x.get_text_content()
+        x.invalidate()
+        x.get_text_content()
+        self.assertEqual(x.get_cache_statistics()['text'].misses, 2)
+
+    def test_invalidate_derived_views(self):
+        timings = Instrumentation()
+        x = ParsedEmail(eml_content=load_test_eml_file('file_1.eml'), instrumentation=timings)
+        x.get_html_content()
+        x.get_embedded_clickable_urls_from_html_and_text()
+        x.invalidate(view='html')
+        x.get_html_content()
+        x.get_embedded_clickable_urls_from_html_and_text()
+        self.assertEqual(timings.get_timings()['payload_decoding'].calls, 4)
+        self.assertEqual(x.get_cache_statistics()['urls'].misses, 2)
+
+        attachments = x.get_attachments()
+        structure = x.get_structure()
+        x.invalidate(view='part_index')
+        self.assertIsNot(x.get_attachments()[0], attachments[0])
+        self.assertIsNot(x.get_structure(), structure)
+        x.get_html_content()
+        self.assertEqual(timings.get_timings()['payload_decoding'].calls, 5)
+
+    def test_instrumentation_records_stages(self):
+        recorded_stages = list()
+        instrumentation = Instrumentation(callback=lambda stage, seconds, processed_bytes: recorded_stages.append(stage))
+        eml_content = load_test_eml_file_as_bytes('file_1.eml')
+        x = ParsedEmail(eml_content=eml_content, instrumentation=instrumentation)
+        x.get_embedded_clickable_urls_from_html_and_text()
+        x.get_embedded_clickable_urls_from_html_and_text()
+        timings = x.get_instrumentation().get_timings()
+        self.assertEqual(timings['parse'].processed_bytes, len(eml_content))
+        self.assertEqual(timings['html_scan'].calls, 1)
+        # the HTML part, the text part and the attached text file
+        self.assertEqual(timings['payload_decoding'].calls, 3)
+        self.assertEqual(recorded_stages.count('url_extraction'), 3)
+
+    def test_instrumentation_is_disabled_by_default(self):
+        x = ParsedEmail(eml_content=load_test_eml_file('file_1.eml'))
+        x.get_html_content()
+        self.assertFalse(x.get_instrumentation().is_enabled)
+        self.assertEqual(x.get_instrumentation().get_timings(), dict())
+
+    def test_get_header_view(self):
+        x = ParsedEmail(eml_content=load_test_eml_file('utf8_with_umlauts.eml'))
+        header_view = x.get_header_view()
+        self.assertEqual(header_view.get('SUBJECT'), 'Dies_ist_ein_dämlicher_Test')
+        self.assertEqual(header_view.items(), x.get_header())
+        self.assertIs(x.get_header_view(), header_view)
+
+    def test_fallback_charset_is_reported(self):
+        eml_content = (b'Content-Type: text/plain; charset="utf-8"\n'
+                       b'Content-Transfer-Encoding: quoted-printable\n\n'
+                       b'Gr=FC=DFe\n')
+        x = ParsedEmail(eml_content=eml_content)
+        self.assertEqual(x.get_text_content().strip(), 'GrьЯe')
+        self.assertEqual(x.get_error_messages(), ['Payload with the type "text/plain" could not be decoded with the declared charset "utf-8", the charset "cp1251" was used instead'])
+
+    def test_get_embedded_emails(self):
+        inner_eml = load_test_eml_file_as_bytes('file_2.eml')
+        eml_content = (b'Content-Type: multipart/mixed; boundary="outer"\n\n'
+                       b'--outer\nContent-Type: text/plain\n\nSee the forwarded emails\n'
+                       b'--outer\nContent-Type: message/rfc822\n\n' + inner_eml + b'\n'
+                       b'--outer\nContent-Type: application/octet-stream; name="report.eml"\nContent-Disposition: attachment; filename="report.eml"\n'
+                       b'Content-Transfer-Encoding: base64\n\n' + base64.encodebytes(load_test_eml_file_as_bytes('file_1.eml')) + b'\n'
+                       b'--outer--\n')
+        x = ParsedEmail(eml_content=eml_content)
+        embedded_emails = x.get_embedded_emails()
+        self.assertEqual(len(embedded_emails), 2)
+        self.assertIsNone(embedded_emails[0].filename)
+        self.assertEqual(embedded_emails[0].parsed_email.get_header(), ParsedEmail(eml_content=inner_eml).get_header())
+        self.assertEqual(embedded_emails[1].filename, 'report.eml')
+        self.assertEqual(len(embedded_emails[1].parsed_email.get_attachments()), 3)
+        self.assertEqual(sorted(embedded_emails[1].parsed_email.get_embedded_clickable_urls_from_html_and_text()), ['https://test-link2.com', 'https://www.unittest.de/test'])
+        self.assertEqual(embedded_emails[0].parsed_email.get_embedded_emails(), list())
+        self.assertIs(x.get_embedded_emails()[0].parsed_email, embedded_emails[0].parsed_email)
+
+    def test_embedded_emails_share_the_resource_budget(self):
+        eml_content = b'Content-Type: text/plain\n\nInnermost text\n'
+        for _ in range(4):
+            eml_content = b'Content-Type: message/rfc822\n\n' + eml_content
+        x = ParsedEmail(eml_content=eml_content, limits=ResourceLimits(max_depth=2))
+        depth = 0
+        embedded_emails = x.get_embedded_emails()
+        while embedded_emails:
+            depth += 1
+            embedded_emails = embedded_emails[0].parsed_email.get_embedded_emails()
+        self.assertEqual(depth, 2)
+        self.assertEqual(x.get_error_messages(), ['MIME parts nested deeper than 2 levels were skipped'])
+
+    def test_embedded_emails_share_the_part_limit(self):
+        innermost_eml = (b'Content-Type: multipart/mixed; boundary="c"\n\n'
+                         b'--c\nContent-Type: text/plain\n\nfirst\n--c\nContent-Type: text/plain\n\nsecond\n--c\nContent-Type: text/plain\n\nthird\n--c--\n')
+        inner_eml = (b'Content-Type: multipart/mixed; boundary="b"\n\n'
+                     b'--b\nContent-Type: text/plain\n\ninner\n--b\nContent-Type: message/rfc822\n\n' + innermost_eml + b'\n--b--\n')
+        eml_content = (b'Content-Type: multipart/mixed; boundary="a"\n\n'
+                       b'--a\nContent-Type: text/plain\n\nouter\n--a\nContent-Type: message/rfc822\n\n' + inner_eml + b'\n--a--\n')
+        x = ParsedEmail(eml_content=eml_content, limits=ResourceLimits(max_parts=6))
+        # the outer email indexes its parts up to the root, the text and the message/rfc822 part of the inner email
+        self.assertEqual(len(x.get_part_index()), 6)
+
+        embedded_emails = x.get_embedded_emails()
+        self.assertEqual(len(embedded_emails), 1)
+        # the inner email indexes the parts again which were counted by the outer email, but not the ones which were cut off
+        self.assertEqual(len(embedded_emails[0].parsed_email.get_part_index()), 3)
+        self.assertEqual(embedded_emails[0].parsed_email.get_embedded_emails(), list())
+        self.assertEqual(x.get_error_messages(), ['The email has more than 6 MIME parts, the remaining parts were skipped'])
+
+    def test_all_body_parts_are_analyzed(self):
+        eml_content = (b'Content-Type: multipart/mixed; boundary="b"\n\n'
+                       b'--b\nContent-Type: text/html\n\n<a href="https://first.example/">first</a><img src="https://tracker.example/1.gif">\n'
+                       b'--b\nContent-Type: text/plain\n\nVisit https://text.org/ today\n'
+                       b'--b\nContent-Type: text/html\n\n<a href="https://second.example/">second</a><img src="https://tracker.example/2.gif">\n'
+                       b'--b\nContent-Type: text/html\n\n<a href="https://first.example/">first</a><img src="https://tracker.example/1.gif">\n'
+                       b'--b\nContent-Type: text/plain; name="notes.txt"\nContent-Disposition: attachment; filename="notes.txt"\n\nhttps://attachment.org/\n'
+                       b'--b--\n')
+        x = ParsedEmail(eml_content=eml_content)
+        html_contents = x.iter_html_contents()
+        self.assertIn('first.example', next(html_contents))
+        # the other parts are decoded when they are reached
+        self.assertEqual(sorted(x.get_cache_statistics().keys()), ['part_index', 'payload_1'])
+        self.assertEqual(len(list(html_contents)), 2)
+        self.assertEqual([text.strip() for text in x.iter_text_contents()], ['Visit https://text.org/ today', 'https://attachment.org/'])
+        self.assertIn('first.example', x.get_html_content())
+
+        self.assertEqual(sorted(x.get_embedded_clickable_urls_from_html_and_text()), ['https://attachment.org/', 'https://first.example/', 'https://second.example/', 'https://text.org/'])
+        # the third HTML part is the same as the first one, so its reloaded content is not listed twice
+        self.assertEqual(x.get_reloaded_content_from_html(), ['https://tracker.example/1.gif', 'https://tracker.example/2.gif'])
+
+    def test_attached_html_file_is_analyzed(self):
+        eml_content = (b'Content-Type: multipart/mixed; boundary="b"\n\n'
+                       b'--b\nContent-Type: text/plain\n\nPlease log in with the attached form\n'
+                       b'--b\nContent-Type: text/html; name="login.html"\nContent-Disposition: attachment; filename="login.html"\n\n'
+                       b'<a href="https://evil.example/login">Login</a><img src="https://evil.example/pixel.gif">\n'
+                       b'--b--\n')
+        x = ParsedEmail(eml_content=eml_content)
+        self.assertIn('evil.example/login', x.get_html_content())
+        self.assertEqual(x.get_embedded_clickable_urls_from_html_and_text(), ['https://evil.example/login'])
+        self.assertEqual(x.get_reloaded_content_from_html(), ['https://evil.example/pixel.gif'])
+
+    def test_quoted_printable_attachment_of_string_email(self):
+        eml_content = ('Content-Type: multipart/mixed; boundary="b"\n\n'
+                       '--b\nContent-Type: text/plain; name="notes.txt"\nContent-Disposition: attachment; filename="notes.txt"\n'
+                       'Content-Transfer-Encoding: quoted-printable\n\nGrüße=3D\n'
+                       '--b--\n')
+        attachment = ParsedEmail(eml_content=eml_content).get_attachments()[0]
+        hashes = attachment.get_hashes()
+        self.assertEqual(hashes.sha256, hashlib.sha256(attachment.content).hexdigest())
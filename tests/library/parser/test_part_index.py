@@ -0,0 +1,49 @@
+import email
+import os
+import unittest
+
+from eml_analyzer.library.parser import PartIndex
+
+
+def load_test_email(test_file) -> email.message.Message:
+    current_directory_of_the_script = os.path.dirname(__file__)
+    path_to_test_file = os.path.join(current_directory_of_the_script, 'test_emails', test_file)
+    with open(path_to_test_file, mode='rb') as input_file:
+        return email.message_from_binary_file(input_file)
+
+
+class TestPartIndex(unittest.TestCase):
+    def test_parts_are_indexed_in_walk_order(self):
+        message = load_test_email('file_1.eml')
+        part_index = PartIndex(message=message)
+        self.assertEqual([part.message for part in part_index.get_parts()], list(message.walk()))
+        self.assertEqual(len(part_index), 8)
+
+    def test_tree_information(self):
+        part_index = PartIndex(message=load_test_email('file_1.eml'))
+        root = part_index.get_root()
+        self.assertEqual(root.depth, 0)
+        self.assertIsNone(root.parent_position)
+        self.assertEqual([child.content_type for child in part_index.get_children(root)], ['multipart/related', 'text/plain'])
+
+        html_part = part_index.get_first_part_with_content_type('text/html')
+        self.assertEqual(html_part.path, (0, 0, 1))
+        self.assertEqual(html_part.depth, 3)
+        self.assertEqual(part_index.get_part(html_part.parent_position).content_type, 'multipart/alternative')
+
+    def test_lookups(self):
+        part_index = PartIndex(message=load_test_email('file_1.eml'))
+        self.assertEqual([part.filename for part in part_index.get_parts_with_filename()], ['logo.gif', 'background.gif', 'attachment.txt'])
+        self.assertEqual(len(part_index.get_parts_with_filename('logo.gif')), 1)
+        self.assertEqual(len(part_index.get_parts_with_content_type('image/gif')), 2)
+        self.assertEqual(len(part_index.get_parts_with_disposition('inline')), 2)
+        self.assertEqual(part_index.get_part_with_content_id('<ae0357e57f04b8347f7621662cb63855.gif>').filename, 'logo.gif')
+        self.assertIsNone(part_index.get_first_part_with_content_type('application/pdf'))
+
+    def test_headers_of_parts(self):
+        part_index = PartIndex(message=load_test_email('file_1.eml'))
+        root_headers = part_index.get_root().headers
+        self.assertEqual(root_headers.get('X-MAILER'), 'UnitTest')
+        self.assertEqual(root_headers.get_all('subject'), ['UnitTest Subject =?UTF-8?B?TcO8bmNoZW4s?='])
+        for indexed_part in part_index.get_parts():
+            self.assertEqual(indexed_part.headers.get('content-type'), indexed_part.message.get('content-type'))
@@ -0,0 +1,69 @@
+import base64
+import email
+import io
+import quopri
+import random
+import unittest
+
+from eml_analyzer.library.parser.payload_stream import iter_decoded_payload, write_chunks_to_file
+
+
+def create_message(transfer_encoding: str, encoded_payload: str) -> email.message.Message:
+    return email.message_from_string('Content-Type: application/octet-stream\nContent-Transfer-Encoding: {}\n\n{}'.format(transfer_encoding, encoded_payload))
+
+
+class TestPayloadStream(unittest.TestCase):
+    def setUp(self) -> None:
+        random_generator = random.Random(1)
+        self.data = bytes(random_generator.getrandbits(8) for _ in range(10000))
+
+    def test_base64_in_chunks(self):
+        message = create_message(transfer_encoding='base64', encoded_payload=base64.encodebytes(self.data).decode())
+        for chunk_size in [1, 7, 100, 4096, 100000]:
+            chunks = list(iter_decoded_payload(message=message, chunk_size=chunk_size))
+            self.assertEqual(b''.join(chunks), self.data)
+            self.assertEqual(b''.join(chunks), message.get_payload(decode=True))
+            self.assertTrue(all(len(chunk) <= chunk_size + 3 for chunk in chunks))
+
+    def test_base64_with_missing_padding(self):
+        message = create_message(transfer_encoding='base64', encoded_payload='SEVMTE8gV09STEQ')
+        self.assertEqual(b''.join(iter_decoded_payload(message=message, chunk_size=4)), b'HELLO WORLD')
+
+    def test_quoted_printable_in_chunks(self):
+        message = create_message(transfer_encoding='quoted-printable', encoded_payload=quopri.encodestring(self.data).decode())
+        for chunk_size in [1, 100, 4096]:
+            self.assertEqual(b''.join(iter_decoded_payload(message=message, chunk_size=chunk_size)), self.data)
+
+    def test_decoding_matches_the_email_package(self):
+        payloads = [
+            ('base64', 'YWI=\nY2Q=\n'),
+            ('base64', 'YWJj!ZGVm\n'),
+            ('base64', '  YWJj  \n'),
+            ('base64', 'YWJjZA==\n'),
+            ('base64', 'YWJjZA\r\n'),
+            ('base64', 'YW=\n'),
+            ('base64', 'Y\n'),
+            ('base64', 'Y===\n'),
+            ('base64', 'YWJj\nZGVm\nZw==\n'),
+            ('quoted-printable', 'Gr=C3=BC=C3=9Fe ä €\n'),
+            ('quoted-printable', 'soft=\nline break=3D\n'),
+        ]
+        for transfer_encoding, encoded_payload in payloads:
+            message = create_message(transfer_encoding=transfer_encoding, encoded_payload=encoded_payload)
+            for chunk_size in [1, 3, 4096]:
+                self.assertEqual(b''.join(iter_decoded_payload(message=message, chunk_size=chunk_size)), message.get_payload(decode=True),
+                                 msg='{} payload {!r} with chunk size {}'.format(transfer_encoding, encoded_payload, chunk_size))
+
+        # non-ASCII bytes of a binary parsed email are contained as surrogates in the payload
+        message = email.message_from_bytes(b'Content-Transfer-Encoding: quoted-printable\n\nGr\xfc\xdfe=3D\n')
+        self.assertEqual(b''.join(iter_decoded_payload(message=message, chunk_size=1)), message.get_payload(decode=True))
+
+    def test_other_transfer_encoding(self):
+        message = create_message(transfer_encoding='7bit', encoded_payload='Hello World')
+        self.assertEqual(b''.join(iter_decoded_payload(message=message, chunk_size=4)), b'Hello World')
+
+    def test_write_chunks_to_file(self):
+        output_file = io.BytesIO()
+        written_bytes = write_chunks_to_file(chunks=iter([b'abc', b'de']), output_file=output_file)
+        self.assertEqual(written_bytes, 5)
+        self.assertEqual(output_file.getvalue(), b'abcde')
@@ -0,0 +1,99 @@
+import concurrent.futures
+import io
+import os
+import unittest
+
+from eml_analyzer.library.parser import ParsedEmail, ResourceLimits, EmlParsingException
+from eml_analyzer.library.parser.resource_limits import ResourceBudget
+
+
+def load_test_eml_file_as_bytes(test_file: str) -> bytes:
+    current_directory_of_the_script = os.path.dirname(__file__)
+    with open(os.path.join(current_directory_of_the_script, 'test_emails', test_file), mode='rb') as input_file:
+        return input_file.read()
+
+
+def create_nested_email(depth: int) -> bytes:
+    parts = ['Content-Type: multipart/mixed; boundary="level-0"\n\n']
+    for level in range(depth):
+        parts.append('--level-{}\nContent-Type: multipart/mixed; boundary="level-{}"\n\n'.format(level, level + 1))
+    parts.append('--level-{}\nContent-Type: text/plain\n\nInnermost text\n--level-{}--\n'.format(depth, depth))
+    for level in reversed(range(depth)):
+        parts.append('--level-{}--\n'.format(level))
+    return ''.join(parts).encode('ascii')
+
+
+class TestResourceLimits(unittest.TestCase):
+    def test_input_size_limit(self):
+        eml_content = load_test_eml_file_as_bytes('file_1.eml')
+        with self.assertRaises(EmlParsingException):
+            ParsedEmail(eml_content=eml_content, limits=ResourceLimits(max_input_bytes=100))
+
+        # a stream without a file descriptor is read up to the limit
+        with self.assertRaises(EmlParsingException):
+            ParsedEmail(eml_content=io.BufferedReader(io.BytesIO(eml_content)), limits=ResourceLimits(max_input_bytes=100))
+        x = ParsedEmail(eml_content=io.BufferedReader(io.BytesIO(eml_content)), limits=ResourceLimits(max_input_bytes=len(eml_content)))
+        self.assertEqual(len(x.get_attachments()), 3)
+
+    def test_depth_limit(self):
+        x = ParsedEmail(eml_content=create_nested_email(depth=20), limits=ResourceLimits(max_depth=5))
+        self.assertEqual(len(x.get_part_index()), 6)
+        self.assertIsNone(x.get_text_content())
+        self.assertEqual(x.get_error_messages(), ['MIME parts nested deeper than 5 levels were skipped'])
+
+        x = ParsedEmail(eml_content=create_nested_email(depth=20))
+        self.assertEqual(x.get_text_content().strip(), 'Innermost text')
+        self.assertEqual(x.get_error_messages(), [])
+
+    def test_part_limit(self):
+        x = ParsedEmail(eml_content=load_test_eml_file_as_bytes('file_1.eml'), limits=ResourceLimits(max_parts=3))
+        self.assertEqual(len(x.get_part_index()), 3)
+        self.assertEqual(x.get_structure().child_items[0].child_items[0].content_type, 'multipart/alternative')
+        self.assertEqual(x.get_error_messages(), ['The email has more than 3 MIME parts, the remaining parts were skipped'])
+
+    def test_decoded_bytes_limits(self):
+        x = ParsedEmail(eml_content=load_test_eml_file_as_bytes('file_1.eml'), limits=ResourceLimits(max_decoded_bytes_per_part=10))
+        self.assertIsNone(x.get_html_content())
+        self.assertEqual(x.get_error_messages(), ['Payload with the type "text/html" exceeds the limit of 10 bytes per part and was not decoded'])
+
+        x = ParsedEmail(eml_content=load_test_eml_file_as_bytes('file_1.eml'), limits=ResourceLimits(max_decoded_bytes_total=800))
+        self.assertIsNotNone(x.get_html_content())
+        attachments = x.get_attachments()
+        self.assertIsNone(attachments[0].content)
+        self.assertIsNone(attachments[0].get_content_base64_encoded())
+        self.assertEqual(len(x.get_error_messages()), 1)
+
+    def test_decoded_bytes_are_reserved_once_per_attachment(self):
+        x = ParsedEmail(eml_content=load_test_eml_file_as_bytes('file_1.eml'), limits=ResourceLimits(max_decoded_bytes_total=40))
+        attachment = x.get_attachments()[0]
+        first_content = b''.join(attachment.iter_content_chunks())
+        self.assertGreater(len(first_content), 0)
+        self.assertEqual(b''.join(attachment.iter_content_chunks()), first_content)
+        self.assertIsNotNone(attachment.get_hashes())
+        self.assertEqual(x.get_error_messages(), [])
+
+    def test_concurrent_reservations(self):
+        reported_violations = list()
+        budget = ResourceBudget(limits=ResourceLimits(max_decoded_bytes_total=1000), report=reported_violations.append)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            reservations = list(executor.map(lambda _: budget.reserve_decoded_bytes(size=1, description='Part'), range(2000)))
+        self.assertEqual(sum(reservations), 1000)
+        self.assertEqual(reported_violations, ['Part was not decoded as the limit of 1000 decoded bytes per email was reached'])
+
+    def test_header_limits(self):
+        x = ParsedEmail(eml_content=load_test_eml_file_as_bytes('file_1.eml'), limits=ResourceLimits(max_headers=3))
+        self.assertEqual([key for key, _ in x.get_header()], ['To', 'Subject', 'From'])
+
+        budget = ResourceBudget(limits=ResourceLimits(max_header_bytes=10))
+        self.assertEqual(budget.limit_headers(headers=[('To', 'a@b.c'), ('From', 'd@e.f')]), [('To', 'a@b.c')])
+        self.assertEqual(budget.get_violations(), ['The header block exceeds 10 bytes, the remaining headers were skipped'])
+
+    def test_time_budget(self):
+        x = ParsedEmail(eml_content=load_test_eml_file_as_bytes('file_1.eml'), limits=ResourceLimits(max_seconds=-1))
+        self.assertEqual(len(x.get_part_index()), 1)
+        self.assertEqual(x.get_header(), [])
+        self.assertEqual(x.get_error_messages(), ['The analysis exceeded the time budget of -1 seconds, the results are incomplete'])
+
+    def test_unlimited(self):
+        x = ParsedEmail(eml_content=create_nested_email(depth=200), limits=ResourceLimits.unlimited())
+        self.assertEqual(len(x.get_part_index()), 202)
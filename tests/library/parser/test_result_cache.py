@@ -0,0 +1,98 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+from eml_analyzer.library.parser import ParsedEmail, ResultCache
+from eml_analyzer.library.parser.result_cache import get_content_key
+
+
+def load_test_eml_file_as_bytes(test_file: str) -> bytes:
+    current_directory_of_the_script = os.path.dirname(__file__)
+    with open(os.path.join(current_directory_of_the_script, 'test_emails', test_file), mode='rb') as input_file:
+        return input_file.read()
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_get_content_key(self):
+        self.assertEqual(get_content_key(content='abc'), get_content_key(content=b'abc'))
+        self.assertNotEqual(get_content_key(content=b'abc'), get_content_key(content=b'abc', variant='base64'))
+
+    def test_put_and_get(self):
+        result_cache = ResultCache(directory=self.directory)
+        self.assertIsNone(result_cache.get(namespace='message', key='a'))
+        result_cache.put(namespace='message', key='a', value={'urls': ['https://example.com']})
+        self.assertIsNone(result_cache.get(namespace='attachment_hashes', key='a'))
+        result_cache.close()
+
+        # the results are persisted for later runs
+        result_cache = ResultCache(directory=self.directory)
+        self.assertEqual(result_cache.get(namespace='message', key='a'), {'urls': ['https://example.com']})
+        self.assertEqual(result_cache.get_size(), len('a') + len('{"urls":["https://example.com"]}'))
+        result_cache.close()
+
+    def test_least_recently_used_entries_are_evicted(self):
+        result_cache = ResultCache(directory=self.directory, max_size_bytes=20, access_refresh_interval=1)
+        result_cache.put(namespace='message', key='a', value='x' * 5)
+        result_cache.put(namespace='message', key='b', value='x' * 5)
+        result_cache.get(namespace='message', key='a')
+        result_cache.put(namespace='message', key='c', value='x' * 5)
+        self.assertEqual(len(result_cache), 2)
+        self.assertIsNone(result_cache.get(namespace='message', key='b'))
+        self.assertIsNotNone(result_cache.get(namespace='message', key='a'))
+        self.assertIsNotNone(result_cache.get(namespace='message', key='c'))
+        self.assertEqual(result_cache.get_size(), 16)
+
+        # values which are larger than the whole cache are not stored
+        result_cache.put(namespace='message', key='d', value='x' * 100)
+        self.assertIsNone(result_cache.get(namespace='message', key='d'))
+        self.assertEqual(len(result_cache), 2)
+        result_cache.close()
+
+    def test_access_time_is_refreshed_lazily(self):
+        result_cache = ResultCache(directory=self.directory, access_refresh_interval=2)
+        get_last_access = lambda key: result_cache._connection.execute('SELECT last_access FROM entries WHERE key = ?', (key,)).fetchone()[0]
+        result_cache.put(namespace='message', key='a', value='x')
+        result_cache.put(namespace='message', key='b', value='x')
+        # the entry was written less than two writes ago, so the lookup does not write
+        self.assertEqual(result_cache.get(namespace='message', key='a'), 'x')
+        self.assertEqual(get_last_access('a'), 1)
+
+        result_cache.put(namespace='message', key='c', value='x')
+        self.assertEqual(result_cache.get(namespace='message', key='a'), 'x')
+        self.assertEqual(get_last_access('a'), 4)
+        result_cache.close()
+
+    def test_parsed_email_reuses_cached_parts(self):
+        result_cache = ResultCache(directory=self.directory)
+        eml_content = load_test_eml_file_as_bytes(test_file='file_1.eml')
+        x = ParsedEmail(eml_content=eml_content, result_cache=result_cache)
+        expected_urls = x.get_embedded_clickable_urls_from_html_and_text()
+        expected_reloaded_content = x.get_reloaded_content_from_html()
+        expected_hashes = [attachment.get_hashes() for attachment in x.get_attachments()]
+        self.assertEqual(expected_hashes, [attachment.get_hashes() for attachment in ParsedEmail(eml_content=eml_content).get_attachments()])
+
+        y = ParsedEmail(eml_content=eml_content, result_cache=result_cache)
+        self.assertEqual(sorted(y.get_embedded_clickable_urls_from_html_and_text()), sorted(expected_urls))
+        self.assertEqual(y.get_reloaded_content_from_html(), expected_reloaded_content)
+        self.assertEqual([attachment.get_hashes() for attachment in y.get_attachments()], expected_hashes)
+        # the HTML was not scanned again
+        self.assertNotIn('html_url_scan', y.get_cache_statistics())
+        result_cache.close()
+
+    def test_binary_attachments_with_replaced_bytes_are_not_mixed_up(self):
+        result_cache = ResultCache(directory=self.directory)
+        eml_template = (b'Content-Type: multipart/mixed; boundary="b"\n\n'
+                        b'--b\nContent-Type: application/octet-stream; name="a.bin"\nContent-Disposition: attachment; filename="a.bin"\n'
+                        b'Content-Transfer-Encoding: 8bit\n\n%s\n--b--\n')
+        for payload in [b'\xff\xfe', b'\xfe\xff']:
+            attachment = ParsedEmail(eml_content=eml_template % payload, result_cache=result_cache).get_attachments()[0]
+            self.assertEqual(attachment.get_hashes().sha256, hashlib.sha256(payload).hexdigest())
+        result_cache.close()
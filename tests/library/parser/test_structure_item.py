@@ -44,3 +44,21 @@ class TestPrintableFilename(unittest.TestCase):
         self.assertEqual(structure_item.filename, "parent")
         self.assertEqual(structure_item.child_items[0].filename, "child_1")
         self.assertEqual(structure_item.child_items[1].filename, "child_2")
+
+    def test_deeply_nested_structure(self):
+        root_message = messageMock(filename="level_0")
+        message = root_message
+        for level in range(1, 5000):
+            child = messageMock(filename="level_{}".format(level))
+            message.children.append(child)
+            message = child
+
+        structure_item = StructureItem(message=root_message)
+        for level in range(5000):
+            self.assertEqual(structure_item.filename, "level_{}".format(level))
+            structure_item = structure_item.child_items[0] if structure_item.child_items else None
+        self.assertIsNone(structure_item)
+
+    def test_structure_item_has_no_instance_dictionary(self):
+        structure_item = StructureItem(message=messageMock(filename="filename"))
+        self.assertFalse(hasattr(structure_item, '__dict__'))
@@ -0,0 +1,31 @@
+import unittest
+
+from eml_analyzer.library.parser.url_extractor import scan_html, get_clickable_urls_from_html
+
+
+class TestUrlExtractor(unittest.TestCase):
+    def test_scan_html_finds_all_attributes_in_document_order(self):
+        html_scan = scan_html(html_data="""<body background='https://a.com/bg.png'>
+        <a href="https://b.com/?x=1&amp;y=%7C" originalsrc="https://c.com/">link</a>
+        <img SRC="https://d.com/pixel.gif"><img src="cid:logo.gif"><img src="data:image/gif;base64,AAAA">
+        <a href='https://e.com/'>e</a>
+        """)
+        self.assertEqual([found_url.url for found_url in html_scan.clickable_urls], ['https://b.com/?x=1&y=|', 'https://c.com/', 'https://e.com/'])
+        self.assertEqual(html_scan.clickable_urls[0].original, 'https://b.com/?x=1&amp;y=%7C')
+        self.assertEqual(html_scan.reloaded_content, ['https://a.com/bg.png', 'https://d.com/pixel.gif'])
+        self.assertNotIn('https://', html_scan.remaining_html)
+        self.assertIn('<a>link</a>', html_scan.remaining_html)
+
+    def test_link_text_is_not_reported_as_additional_url(self):
+        found_urls = get_clickable_urls_from_html(html_data="""
+        <a href="https://x.com/">https://x.com/</a><br>https://y.com/path<br>
+        <a href="https://z.com/">https://z.com/https://w.com/</a>
+        """)
+        self.assertEqual(found_urls, {'https://x.com/', 'https://y.com/path<br>', 'https://z.com/', 'https://w.com/</a>'})
+
+    def test_scan_of_large_html(self):
+        links = ''.join('<a href="https://link-{0}.com/">https://link-{0}.com/</a><img src="https://img-{0}.com/p.gif">\n'.format(x) for x in range(5000))
+        html_scan = scan_html(html_data='<html>' + links + '</html>')
+        self.assertEqual(len(html_scan.clickable_urls), 5000)
+        self.assertEqual(len(html_scan.reloaded_content), 5000)
+        self.assertEqual(len(get_clickable_urls_from_html(html_data=links)), 5000)
@@ -0,0 +1,84 @@
+import asyncio
+import concurrent.futures
+import json
+import os
+import threading
+import unittest
+
+from eml_analyzer.library.analysis import AnalysisOptions, process_options
+from eml_analyzer.library.async_analyzer import AsyncEmlAnalyzer
+from eml_analyzer.library.outputs import JsonOutput
+from eml_analyzer.library.parser import ParsedEmail, EmlParsingException, ResourceLimits
+
+
+def get_test_eml_file_path(test_file: str) -> str:
+    current_directory_of_the_script = os.path.dirname(__file__)
+    return os.path.join(current_directory_of_the_script, 'parser', 'test_emails', test_file)
+
+
+def load_test_eml_file(test_file: str) -> bytes:
+    with open(get_test_eml_file_path(test_file), mode='rb') as input_file:
+        return input_file.read()
+
+
+class TestAsyncEmlAnalyzer(unittest.TestCase):
+    def test_result_equals_json_output(self):
+        eml_content = load_test_eml_file('file_1.eml')
+        options = AnalysisOptions().with_default_selection()
+
+        async def analyze() -> dict:
+            async with AsyncEmlAnalyzer(max_concurrency=2) as analyzer:
+                return await analyzer.analyze(eml_content=eml_content)
+
+        output_format = JsonOutput()
+        parsed_email = ParsedEmail(eml_content=eml_content)
+        process_options(output_format=output_format, parsed_email=parsed_email, options=options)
+        self.assertEqual(asyncio.run(analyze()), json.loads(output_format.get_final_output(parsed_email=parsed_email)))
+
+    def test_analyze_many_emails_with_bounded_concurrency(self):
+        lock = threading.Lock()
+        running = [0]
+        max_running = [0]
+
+        class CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+            def submit(self, function, *args, **kwargs):
+                def counting_function():
+                    with lock:
+                        running[0] += 1
+                        max_running[0] = max(max_running[0], running[0])
+                    try:
+                        return function(*args, **kwargs)
+                    finally:
+                        with lock:
+                            running[0] -= 1
+                return super().submit(counting_function)
+
+        paths = [get_test_eml_file_path(test_file) for test_file in ['file_1.eml', 'file_2.eml', 'utf8_with_umlauts.eml'] * 10]
+
+        async def analyze_all() -> list:
+            analyzer = AsyncEmlAnalyzer(executor=executor, max_concurrency=3, options=AnalysisOptions(show_structure=True))
+            return await asyncio.gather(*[analyzer.analyze_file(path=path) for path in paths])
+
+        with CountingExecutor(max_workers=8) as executor:
+            results = asyncio.run(analyze_all())
+        self.assertEqual(len(results), 30)
+        self.assertTrue(all('structure' in result for result in results))
+        self.assertLessEqual(max_running[0], 3)
+
+    def test_parsing_errors_are_raised(self):
+        async def analyze():
+            async with AsyncEmlAnalyzer(executor=executor) as analyzer:
+                await analyzer.analyze(eml_content=12345)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            with self.assertRaises(EmlParsingException):
+                asyncio.run(analyze())
+
+    def test_limits_apply_to_every_email(self):
+        async def analyze():
+            async with AsyncEmlAnalyzer(executor=executor, limits=ResourceLimits(max_input_bytes=100)) as analyzer:
+                await analyzer.analyze_file(path=get_test_eml_file_path('file_1.eml'))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            with self.assertRaises(EmlParsingException):
+                asyncio.run(analyze())
@@ -0,0 +1,114 @@
+import json
+import mailbox
+import os
+import shutil
+import tempfile
+import unittest
+
+from eml_analyzer.library.analysis import AnalysisOptions
+from eml_analyzer.library.batch import collect_inputs, analyze_batch_input, run_batch, BatchInput
+from eml_analyzer.library.parser import ResourceLimits
+
+
+def get_test_email_directory() -> str:
+    current_directory_of_the_script = os.path.dirname(__file__)
+    return os.path.join(current_directory_of_the_script, 'parser', 'test_emails')
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, 'sub'))
+        shutil.copy(os.path.join(get_test_email_directory(), 'file_1.eml'), os.path.join(self.directory, 'a.eml'))
+        shutil.copy(os.path.join(get_test_email_directory(), 'file_2.eml'), os.path.join(self.directory, 'sub', 'b.eml'))
+        with open(os.path.join(self.directory, 'notes.txt'), mode='w') as output_file:
+            output_file.write('not an email')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_collect_inputs_from_directory(self):
+        sources = [batch_input.source for batch_input in collect_inputs(inputs=[self.directory])]
+        self.assertEqual(sources, [os.path.join(self.directory, 'a.eml'), os.path.join(self.directory, 'sub', 'b.eml')])
+
+    def test_collect_inputs_from_glob_and_file(self):
+        sources = [batch_input.source for batch_input in collect_inputs(inputs=[os.path.join(self.directory, '*.txt'), os.path.join(self.directory, 'a.eml')])]
+        self.assertEqual(sources, [os.path.join(self.directory, 'notes.txt'), os.path.join(self.directory, 'a.eml')])
+
+    def test_collect_inputs_from_mailboxes(self):
+        mbox_path = os.path.join(self.directory, 'sub', 'archive.mbox')
+        mbox = mailbox.mbox(mbox_path)
+        maildir = mailbox.Maildir(os.path.join(self.directory, 'maildir'))
+        for test_file in ['file_1.eml', 'utf8_with_umlauts.eml']:
+            with open(os.path.join(get_test_email_directory(), test_file), mode='rb') as input_file:
+                eml_content = input_file.read()
+            mbox.add(eml_content)
+            maildir.add(eml_content)
+        mbox.close()
+        maildir.close()
+
+        batch_inputs = list(collect_inputs(inputs=[self.directory]))
+        self.assertEqual(len(batch_inputs), 6)
+        self.assertEqual(batch_inputs[3].source, mbox_path + '#0')
+        self.assertEqual(batch_inputs[4].source, mbox_path + '#1')
+        for batch_input in batch_inputs[1:3] + batch_inputs[3:5]:
+            self.assertIsNotNone(batch_input.eml_content)
+
+        results = list(run_batch(batch_inputs=batch_inputs, output_format_name='jsonl', options=AnalysisOptions(show_structure=True), workers=2))
+        self.assertTrue(all(result.successful for result in results))
+        self.assertEqual(json.loads(results[4].output)['structure'], {'type': 'text/plain'})
+
+    def test_analyze_eml_file(self):
+        path = os.path.join(self.directory, 'a.eml')
+        result = analyze_batch_input(batch_input=BatchInput(source=path), output_format_name='json', options=AnalysisOptions().with_default_selection())
+        self.assertTrue(result.successful)
+        output = json.loads(result.output)
+        self.assertEqual(output['file'], path)
+        self.assertEqual(len(output['attachments']), 3)
+
+    def test_analyze_missing_file_returns_error_record(self):
+        path = os.path.join(self.directory, 'missing.eml')
+        result = analyze_batch_input(batch_input=BatchInput(source=path), output_format_name='json', options=AnalysisOptions().with_default_selection())
+        self.assertFalse(result.successful)
+        output = json.loads(result.output)
+        self.assertEqual(output['file'], path)
+        self.assertEqual(output['error_message'], 'File could not be loaded')
+
+    def test_run_batch_with_process_pool(self):
+        paths = [
+            os.path.join(self.directory, 'a.eml'),
+            os.path.join(self.directory, 'missing.eml'),
+            os.path.join(self.directory, 'sub', 'b.eml'),
+        ]
+        results = list(run_batch(batch_inputs=[BatchInput(source=path) for path in paths], output_format_name='json', options=AnalysisOptions(show_structure=True), workers=2))
+        self.assertEqual([result.source for result in results], paths)
+        self.assertEqual([result.successful for result in results], [True, False, True])
+
+    def test_run_batch_with_result_cache(self):
+        cache_directory = os.path.join(self.directory, 'cache')
+        shutil.copy(os.path.join(self.directory, 'a.eml'), os.path.join(self.directory, 'copy_of_a.eml'))
+        paths = [os.path.join(self.directory, 'a.eml'), os.path.join(self.directory, 'copy_of_a.eml')]
+        options = AnalysisOptions().with_default_selection()
+        results = list(run_batch(batch_inputs=[BatchInput(source=path) for path in paths], output_format_name='json', options=options, cache_directory=cache_directory))
+        self.assertTrue(os.path.isdir(cache_directory))
+        outputs = [json.loads(result.output) for result in results]
+        self.assertEqual([output.pop('file') for output in outputs], paths)
+        self.assertEqual(outputs[0], outputs[1])
+
+        uncached_output = json.loads(analyze_batch_input(batch_input=BatchInput(source=paths[1]), output_format_name='json', options=options).output)
+        uncached_output.pop('file')
+        self.assertEqual(outputs[1], uncached_output)
+
+    def test_run_batch_with_limits(self):
+        cache_directory = os.path.join(self.directory, 'cache')
+        batch_inputs = [BatchInput(source=os.path.join(self.directory, 'a.eml'))]
+        options = AnalysisOptions().with_default_selection()
+        for directory in [None, cache_directory]:
+            results = list(run_batch(batch_inputs=batch_inputs, output_format_name='json', options=options, cache_directory=directory,
+                                     limits=ResourceLimits(max_input_bytes=100)))
+            self.assertFalse(results[0].successful)
+            self.assertIn('exceeds the limit of 100 bytes', results[0].output)
+
+        # the limits are part of the key of the cached result
+        results = list(run_batch(batch_inputs=batch_inputs, output_format_name='json', options=options, cache_directory=cache_directory))
+        self.assertTrue(results[0].successful)
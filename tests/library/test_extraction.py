@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from eml_analyzer.library.extraction import extract_attachments, get_unique_output_paths
+from eml_analyzer.library.parser import ParsedEmail, ResourceLimits
+
+
+class attachmentMock:
+    def __init__(self, index: int, filename: str or None, content: bytes = b''):
+        self.index = index
+        self.filename = filename
+        self.content = content
+
+    def write_content_to_file(self, output_file) -> int:
+        output_file.write(self.content)
+        return len(self.content)
+
+
+class TestExtraction(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_unique_output_paths(self):
+        with open(os.path.join(self.directory, 'a.txt'), mode='w') as output_file:
+            output_file.write('existing')
+        attachments = [attachmentMock(1, 'a.txt'), attachmentMock(2, 'a.txt'), attachmentMock(3, 'b'), attachmentMock(4, None)]
+        output_paths = get_unique_output_paths(attachments=attachments, directory=self.directory)
+        self.assertEqual([os.path.basename(path) for path in output_paths], ['a (1).txt', 'a (2).txt', 'b', 'attachment_4'])
+
+    def test_extract_attachments_concurrently(self):
+        attachments = [attachmentMock(index, 'same.bin', content=bytes([index]) * index * 1000) for index in range(1, 9)]
+        results = extract_attachments(attachments=attachments, directory=self.directory, jobs=4)
+        self.assertEqual([result.attachment.index for result in results], list(range(1, 9)))
+        for result in results:
+            self.assertIsNone(result.error_message)
+            self.assertEqual(result.written_bytes, result.attachment.index * 1000)
+            with open(result.output_path, mode='rb') as input_file:
+                self.assertEqual(input_file.read(), result.attachment.content)
+
+    def test_extract_attachments_of_email(self):
+        path = os.path.join(os.path.dirname(__file__), 'parser', 'test_emails', 'file_1.eml')
+        parsed_email = ParsedEmail.from_file(path=path)
+        results = extract_attachments(attachments=parsed_email.get_attachments(), directory=self.directory, jobs=2)
+        self.assertEqual(sorted(os.listdir(self.directory)), ['attachment.txt', 'background.gif', 'logo.gif'])
+        self.assertEqual(sum(result.written_bytes for result in results), 49)
+
+    def test_attachment_above_the_limits_is_reported(self):
+        path = os.path.join(os.path.dirname(__file__), 'parser', 'test_emails', 'file_1.eml')
+        parsed_email = ParsedEmail.from_file(path=path, limits=ResourceLimits(max_decoded_bytes_per_part=20))
+        results = extract_attachments(attachments=parsed_email.get_attachments(), directory=self.directory)
+        self.assertEqual([result.error_message is None for result in results], [False, False, True])
+        self.assertEqual(results[0].error_message, 'Attachment [1] "logo.gif" exceeds the resource limits and was not decoded')
+        # no empty files are left for the attachments which were not extracted
+        self.assertEqual(os.listdir(self.directory), ['attachment.txt'])
@@ -0,0 +1,115 @@
+import http.client
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from eml_analyzer.library.analysis import AnalysisOptions, process_options
+from eml_analyzer.library.outputs import JsonOutput
+from eml_analyzer.library.parser import ParsedEmail
+from eml_analyzer.library.server import ServerSettings, AnalysisService, create_server, parse_options_from_query
+
+
+def load_test_eml_file(test_file: str) -> bytes:
+    current_directory_of_the_script = os.path.dirname(__file__)
+    with open(os.path.join(current_directory_of_the_script, 'parser', 'test_emails', test_file), mode='rb') as input_file:
+        return input_file.read()
+
+
+class UnixSocketHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, unix_socket_path: str):
+        super().__init__('localhost')
+        self.unix_socket_path = unix_socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_socket_path)
+
+
+class TestServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.analysis_service = AnalysisService(settings=ServerSettings(workers=1, max_body_size=100 * 1024))
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.analysis_service.close()
+
+    def _start_server(self, unix_socket_path: str or None = None):
+        server = create_server(analysis_service=self.analysis_service, port=0, unix_socket_path=unix_socket_path)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def _post(self, connection: http.client.HTTPConnection, path: str, body: bytes) -> (int, dict):
+        connection.request('POST', path, body=body)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_parse_options_from_query(self):
+        self.assertEqual(parse_options_from_query(query=''), AnalysisOptions().with_default_selection())
+        self.assertEqual(parse_options_from_query(query='header&text=1&html=0'), AnalysisOptions(show_header=True, show_text=True))
+        with self.assertRaises(ValueError):
+            parse_options_from_query(query='unknown')
+
+    def test_analyze_returns_json_output(self):
+        eml_content = load_test_eml_file('file_1.eml')
+        server = self._start_server()
+        connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+        self.addCleanup(connection.close)
+
+        status, result = self._post(connection=connection, path='/analyze?structure&attachments', body=eml_content)
+        self.assertEqual(status, 200)
+
+        output_format = JsonOutput()
+        parsed_email = ParsedEmail(eml_content=eml_content)
+        process_options(output_format=output_format, parsed_email=parsed_email, options=AnalysisOptions(show_structure=True, show_attachments=True))
+        self.assertEqual(result, json.loads(output_format.get_final_output(parsed_email=parsed_email)))
+
+        # the connection is kept alive for further requests
+        status, result = self._post(connection=connection, path='/analyze?header', body=eml_content)
+        self.assertEqual(status, 200)
+        self.assertIn('headers', result)
+
+    def test_rejected_requests(self):
+        server = self._start_server()
+        for path, body, expected_status in [('/analyze', b'x' * (100 * 1024 + 1), 413), ('/analyze?unknown', b'', 400), ('/unknown', b'', 404)]:
+            connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+            status, result = self._post(connection=connection, path=path, body=body)
+            connection.close()
+            self.assertEqual(status, expected_status)
+            self.assertIn('error_message', result)
+
+    def test_timed_out_request_keeps_its_slot(self):
+        analysis_service = AnalysisService(settings=ServerSettings(workers=1, max_concurrent_requests=1, timeout_seconds=0.5))
+        self.addCleanup(analysis_service.close)
+        eml_content = load_test_eml_file('file_1.eml')
+        options = AnalysisOptions(show_structure=True)
+
+        # the only worker is busy, so the analysis is still running when the request times out
+        blocking_future = analysis_service._executor.submit(time.sleep, 2)
+        self.assertEqual(analysis_service.analyze(eml_content=eml_content, options=options).status, 504)
+        self.assertEqual(analysis_service.analyze(eml_content=eml_content, options=options).status, 503)
+
+        # the worker runs the tasks in order, so the timed out analysis is finished before the next task
+        blocking_future.result()
+        analysis_service._executor.submit(time.sleep, 0).result()
+        self.assertEqual(analysis_service.analyze(eml_content=eml_content, options=options).status, 200)
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'Unix domain sockets are not supported')
+    def test_analyze_over_unix_socket(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        unix_socket_path = os.path.join(directory, 'emlAnalyzer.sock')
+        self._start_server(unix_socket_path=unix_socket_path)
+
+        connection = UnixSocketHTTPConnection(unix_socket_path=unix_socket_path)
+        self.addCleanup(connection.close)
+        status, result = self._post(connection=connection, path='/analyze?structure', body=load_test_eml_file('file_2.eml'))
+        self.assertEqual(status, 200)
+        self.assertIn('structure', result)
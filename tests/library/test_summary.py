@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from eml_analyzer.library.batch import BatchInput, collect_inputs
+from eml_analyzer.library.summary import CorpusSummary, FingerprintedItem, MessageFingerprints, fingerprint_batch_input, summarize_batch
+
+
+def get_test_email_directory() -> str:
+    current_directory_of_the_script = os.path.dirname(__file__)
+    return os.path.join(current_directory_of_the_script, 'parser', 'test_emails')
+
+
+class TestSummary(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        for name in ['a.eml', 'b.eml', 'c.eml']:
+            shutil.copy(os.path.join(get_test_email_directory(), 'file_1.eml'), os.path.join(self.directory, name))
+        shutil.copy(os.path.join(get_test_email_directory(), 'file_2.eml'), os.path.join(self.directory, 'd.eml'))
+        with open(os.path.join(self.directory, 'e.eml'), mode='w') as output_file:
+            output_file.write('Subject: empty\n\nno html')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_fingerprint_batch_input(self):
+        fingerprints = fingerprint_batch_input(batch_input=BatchInput(source=os.path.join(self.directory, 'a.eml')))
+        self.assertIsNone(fingerprints.error_message)
+        kinds = [item.kind for item in fingerprints.items]
+        self.assertEqual(kinds, ['html', 'attachment', 'attachment', 'url_set', 'header_order'])
+
+        fingerprints = fingerprint_batch_input(batch_input=BatchInput(source=os.path.join(self.directory, 'missing.eml')))
+        self.assertEqual(fingerprints.error_message, 'File could not be loaded')
+
+    def test_summarize_batch(self):
+        summary = summarize_batch(batch_inputs=collect_inputs(inputs=[self.directory]), workers=2, max_representatives=2)
+        self.assertEqual(summary.message_count, 5)
+        self.assertEqual(summary.failed_count, 0)
+
+        html_clusters = summary.get_clusters(kind='html')
+        self.assertEqual(len(html_clusters), 1)
+        self.assertEqual(html_clusters[0].count, 3)
+        self.assertEqual(html_clusters[0].representatives, [os.path.join(self.directory, 'a.eml'), os.path.join(self.directory, 'b.eml')])
+
+        summary_dict = summary.to_dict(limit=1)
+        self.assertEqual(summary_dict['messages'], 5)
+        self.assertEqual(summary_dict['distinct']['header_order'], 2)
+        self.assertEqual(len(summary_dict['clusters']['attachment']), 1)
+        self.assertEqual(summary_dict['clusters']['attachment'][0]['count'], 3)
+
+    def test_memory_scales_with_distinct_items(self):
+        summary = CorpusSummary(max_representatives=3)
+        for index in range(1000):
+            summary.add(fingerprints=MessageFingerprints(source='message {}'.format(index), items=[FingerprintedItem(kind='html', digest='same html')]))
+        summary.add(fingerprints=MessageFingerprints(source='broken', items=list(), error_message='File could not be parsed. Sure it is an eml file?'))
+        self.assertEqual(summary.message_count, 1001)
+        self.assertEqual(summary.get_distinct_count(kind='html'), 1)
+        self.assertEqual(summary.get_clusters(kind='html')[0].representatives, ['message 0', 'message 1', 'message 2'])
+        self.assertEqual(summary.to_dict()['failed'], {'count': 1, 'representatives': ['broken']})